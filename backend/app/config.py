@@ -2,6 +2,7 @@ from datetime import timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Type
 
+from funasr_client.types import InitMessageMode
 from pydantic import BaseModel, ConfigDict, Field
 from pydantic_settings import (
     BaseSettings,
@@ -11,6 +12,8 @@ from pydantic_settings import (
     YamlConfigSettingsSource,
 )
 
+from app.types import IngestPolicyType
+
 
 # ref: https://github.com/pydantic/pydantic/discussions/4170#discussioncomment-9668111
 class YamlBaseSettings(BaseSettings):
@@ -48,6 +51,7 @@ class Endpoint(BaseModel):
     # 防止前缀为 model_ 的配置有冲突
     model_config = ConfigDict(protected_namespaces=())
 
+    name: Optional[str] = None
     api_type: Optional[str] = None
     api_key: str
     api_base: Optional[str] = None
@@ -56,6 +60,17 @@ class Endpoint(BaseModel):
     model_engine_map: Optional[Dict[str, str]] = None
 
 
+class StageRoute(BaseModel):
+    model: Optional[str] = None
+    """Model for this stage, defaults to `llm_model`."""
+    escalation_model: Optional[str] = None
+    """Larger model used on retries, or once after the output of `model` fails validation."""
+    latency_slo: Optional[timedelta] = None
+    """Target p95 latency of `model` for this stage."""
+    slo_fallback_model: Optional[str] = None
+    """Faster model used while `model` violates `latency_slo`."""
+
+
 class Settings(YamlBaseSettings):
     host: str = "127.0.0.1"
     """The host address for the FastAPI application."""
@@ -66,11 +81,33 @@ class Settings(YamlBaseSettings):
     """List of API endpoints configurations."""
 
     llm_model: str
-    """The LLM model to use."""
+    """The default LLM model, used by stages without their own routing."""
+
+    stage_models: Dict[str, StageRoute] = {}
+    """Per-stage model routing, keyed by stage name
+    (`text_to_position`, `text_to_issue`, `summary`, `summary_section`,
+    `summary_abstract`, `minutes_map`, `minutes_reduce`, `minutes_abstract`)."""
+
+    llm_structured_output: bool = False
+    """Whether agent stages request JSON schema structured output.
+    Invalid structured output falls back to the legacy text parser."""
+
+    summary_hierarchical: bool = False
+    """Whether the summary agent merges chunk summaries into section summaries
+    and a running meeting abstract, so long meetings get a coherent document."""
+
+    minutes_concurrency: int = 4
+    """Maximum number of concurrent LLM calls of a post-meeting minutes job."""
 
     db_url: str
     """Database connection URL."""
 
+    db_pool_size: int = 4
+    """Number of threads that run database queries off the event loop."""
+
+    db_slow_query_ms: float = 200
+    """Queries slower than this (including wait for a DB thread) are logged."""
+
     meeting_data_root: Path
     """Root directory for meeting data storage."""
 
@@ -80,9 +117,33 @@ class Settings(YamlBaseSettings):
     funasr_uri: str
     """URI for the FunASR service."""
 
+    funasr_pool_size: int = 2
+    """Number of idle pre-connected FunASR sessions kept per URI, 0 to disable."""
+
+    funasr_pool_health_interval: float = 30
+    """Interval in seconds between health checks of idle FunASR sessions."""
+
+    funasr_mode: InitMessageMode = "offline"
+    """FunASR recognition mode; set to "2pass" to also show partial transcripts while speaking."""
+
+    vad_gate: bool = True
+    """Whether to drop silent audio before sending it to FunASR and saving PCM."""
+
+    ingest_queue_policy: IngestPolicyType = "coalesce"
+    """What to do with incoming audio when a speaker's ingest queue is full."""
+
+    ingest_queue_size: int = 50
+    """Maximum number of audio chunks queued per speaker."""
+
+    ingest_queue_max_bytes: int = 1024 * 1024
+    """Maximum number of audio bytes queued per speaker (about 32 seconds)."""
+
     save_pcm: bool = False
     """Whether to save PCM audio files. It consumes a lot of disk space."""
 
+    pcm_writer_threads: int = 2
+    """Number of threads shared by all meetings for writing PCM segment files."""
+
     access_token_expire: timedelta = timedelta(days=1)
     """Access token expiration duration."""
 
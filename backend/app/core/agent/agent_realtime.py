@@ -1,13 +1,20 @@
 import logging
 import asyncio
-from handyllm import OpenAIClient, load_from, ChatPrompt, VM, RunConfig
+import time
+from typing import Any, Dict, Optional, Type
+from pydantic import BaseModel
+from handyllm import OpenAIClient, EndpointManager, load_from, ChatPrompt, VM, RunConfig
 from handyllm.types import PathType
 from pathlib import Path
 
 from app.core.agent.utils import (
+    estimate_tokens,
     extract_xml_tag,
 )
 from app.core.agent.constants import PROMPT_ROOT_ECHOMIND, PROMPT_ROOT_AUTODOC
+from app.core.agent.models import PositionAndNoteOutput, SubIssueListOutput
+from app.core.agent.router import ModelRouter
+from app.core.metrics import LLMCallRecord, metrics_registry
 from app.types import MeetingLanguageType
 
 
@@ -15,11 +22,62 @@ prompt_position = load_from(PROMPT_ROOT_ECHOMIND / "position.hprompt", cls=ChatP
 prompt_issue = load_from(PROMPT_ROOT_ECHOMIND / "issue.hprompt", cls=ChatPrompt)
 
 prompt_summary = load_from(PROMPT_ROOT_AUTODOC / "summary.hprompt", cls=ChatPrompt)
+prompt_section = load_from(PROMPT_ROOT_AUTODOC / "section.hprompt", cls=ChatPrompt)
+prompt_abstract = load_from(PROMPT_ROOT_AUTODOC / "abstract.hprompt", cls=ChatPrompt)
+
+# 结构化输出模式：追加一条消息，用 JSON 输出覆盖 prompt 中的 XML 输出格式要求
+prompt_position_structured = prompt_position + {
+    "role": "user",
+    "content": (
+        "Output format override: instead of the XML tags, respond with a single JSON object. "
+        "Put your natural language analysis in `analysis`, and every updated or new position under the current issue in `positions`, "
+        "each with its `full_id` (e.g. 1.3), `position` content and English `note`. "
+        "Follow the same numbering rules as above; use an empty `positions` list if there is no content."
+    ),
+}
+prompt_issue_structured = prompt_issue + {
+    "role": "user",
+    "content": (
+        "Output format override: instead of the XML tags, respond with a single JSON object. "
+        "Put your natural language analysis in `analysis`, and in `positions` list each position that gets new issues, "
+        "with its unchanged `position_full_id` (e.g. 1.1), `position_content` and the split issues in `sub_issues`. "
+        "Use an empty `positions` list if no issue is generated."
+    ),
+}
+
+
+def json_schema_format(name: str, model: Type[BaseModel]) -> Dict[str, Any]:
+    """生成 OpenAI 的 response_format（strict JSON schema）"""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": model.model_json_schema(),
+        },
+    }
 
 
 class AgentRealtime:
-    def __init__(self, client: OpenAIClient, base_dir: PathType):
+    def __init__(
+        self,
+        client: OpenAIClient,
+        base_dir: PathType,
+        endpoint_manager: Optional[EndpointManager] = None,
+        meeting_id: Optional[str] = None,
+        structured_output: bool = False,
+        router: Optional[ModelRouter] = None,
+    ):
         self.client = client
+        # 按阶段选择模型，未配置时使用 prompt 中的模型
+        self.router = router
+        # 是否使用结构化输出（JSON schema）
+        self.structured_output = structured_output
+        # 自行轮询 endpoint，以便在遥测中记录实际使用的 endpoint
+        self.endpoint_manager = endpoint_manager
+        self.meeting_id = meeting_id
+        # 最近一次 LLM 调用的遥测记录，供调用方补记是否被丢弃
+        self.last_call: Optional[LLMCallRecord] = None
         self.is_running = False  # 是否正在进行实时处理
         self.edit_node = False  # 用户是否进行了修改
 
@@ -41,6 +99,78 @@ class AgentRealtime:
                 则将当前队列推入total队列，累计字数清零
         """
 
+    async def arun_with_telemetry(
+        self,
+        p_evaled: ChatPrompt,
+        stage: str,
+        cnt: int,
+        retry_count: int,
+        enqueue_time: float,
+        **kwargs,
+    ) -> ChatPrompt:
+        """
+        按阶段路由模型，调用 LLM 并记录遥测数据：
+        排队等待、首 token 时间、总延迟、token 数、重试次数
+        """
+        endpoint = (
+            self.endpoint_manager.get_next_endpoint() if self.endpoint_manager else None
+        )
+        route_reason = None
+        if self.router and "model" not in kwargs:
+            kwargs["model"], route_reason = self.router.select(stage, retry_count)
+        record = LLMCallRecord(
+            stage=stage,
+            meeting_id=self.meeting_id,
+            cnt=cnt,
+            endpoint=endpoint.name if endpoint else None,
+            model=kwargs.get("model", p_evaled.request.get("model")),
+            route_reason=route_reason,
+            retry_count=retry_count,
+            prompt_tokens=sum(
+                estimate_tokens(str(message.get("content") or ""))
+                for message in p_evaled.messages
+            ),
+        )
+        dispatch_time = time.perf_counter()
+        record.queue_wait_ms = (dispatch_time - enqueue_time) * 1000
+        completion_text = []
+
+        def on_chunk(role, content, tool_call):
+            if content:
+                if record.ttft_ms is None:
+                    record.ttft_ms = (time.perf_counter() - dispatch_time) * 1000
+                completion_text.append(content)
+
+        p_evaled.run_config.on_chunk = on_chunk
+        if endpoint:
+            kwargs["endpoint"] = endpoint
+        try:
+            result_prompt = await p_evaled.arun(
+                client=self.client, timeout=60, **kwargs
+            )  # 增加到60秒
+            record.latency_ms = (time.perf_counter() - dispatch_time) * 1000
+            # 非流式模式下接口会返回真实的 usage
+            usage = (
+                result_prompt.response.get("usage") if result_prompt.response else None
+            )
+            if usage:
+                record.prompt_tokens = usage.get("prompt_tokens", record.prompt_tokens)
+                record.completion_tokens = usage.get("completion_tokens", 0)
+                record.usage_estimated = False
+            else:
+                record.completion_tokens = estimate_tokens(
+                    "".join(completion_text) or result_prompt.result_str
+                )
+            return result_prompt
+        except Exception as e:
+            record.latency_ms = (time.perf_counter() - dispatch_time) * 1000
+            record.success = False
+            record.error = repr(e)
+            raise
+        finally:
+            self.last_call = record
+            metrics_registry.record_llm_call(record)
+
     # DONE 加上evaled path和output path
     async def gamma_text_to_position(
         self,
@@ -53,10 +183,12 @@ class AgentRealtime:
         position_number_limitation: str,
         file_suffix: str,
         meeting_language: MeetingLanguageType,
+        retry_count: int = 0,
     ):
         """
         生成新的position and note
         """
+        enqueue_time = time.perf_counter()
         output_path = (
             Path(self.base_dir)
             / "text_to_position"
@@ -67,7 +199,18 @@ class AgentRealtime:
             / "text_to_position"
             / f"t2p_{cnt}_eval{file_suffix}.hprompt"
         ).resolve()
-        p_evaled = prompt_position.eval(
+        if self.structured_output:
+            prompt = prompt_position_structured
+            run_kwargs = {
+                "response_format": json_schema_format(
+                    "position_and_note", PositionAndNoteOutput
+                )
+            }
+        else:
+            # 在结束标签处停止生成，节省 token
+            prompt = prompt_position
+            run_kwargs = {"stop": ["</position_and_note>"]}
+        p_evaled = prompt.eval(
             var_map=VM(
                 context=context,
                 issue_chain=issue_chain,
@@ -85,8 +228,13 @@ class AgentRealtime:
         logger.info(f"[prompt_position_in] {cnt} {output_evaled_prompt_path=}")
 
         await asyncio.sleep(1)
-        result_prompt = await p_evaled.arun(client=self.client, timeout=60)  # 增加到60秒
+        result_prompt = await self.arun_with_telemetry(
+            p_evaled, "text_to_position", cnt, retry_count, enqueue_time, **run_kwargs
+        )
         logger.info(f"[prompt_position_out] {cnt} {output_path=}")
+        if self.structured_output:
+            # 原样返回，由调用方校验，校验失败时回退到旧的解析方式
+            return result_prompt.result_str.strip()
         output = extract_xml_tag(result_prompt.result_str, "position_and_note").strip()
         return output
 
@@ -100,10 +248,12 @@ class AgentRealtime:
         logger: logging.Logger,
         file_suffix: str,
         meeting_language: MeetingLanguageType,
+        retry_count: int = 0,
     ):
         """
         生成新的sub_issue_list
         """
+        enqueue_time = time.perf_counter()
         output_path = (
             Path(self.base_dir)
             / "text_to_issue"
@@ -114,7 +264,18 @@ class AgentRealtime:
             / "text_to_issue"
             / f"t2i_{cnt}_eval{file_suffix}.hprompt"
         ).resolve()
-        p_evaled = prompt_issue.eval(
+        if self.structured_output:
+            prompt = prompt_issue_structured
+            run_kwargs = {
+                "response_format": json_schema_format(
+                    "sub_issue_list", SubIssueListOutput
+                )
+            }
+        else:
+            # 在结束标签处停止生成，节省 token
+            prompt = prompt_issue
+            run_kwargs = {"stop": ["</sub_issue_list>"]}
+        p_evaled = prompt.eval(
             var_map=VM(
                 context=context,
                 issue_chain=issue_chain,
@@ -131,8 +292,13 @@ class AgentRealtime:
         logger.info(f"[prompt_issue_in] {cnt} {output_evaled_prompt_path=}")
         # await asyncio.sleep(1)
         # raise ValueError(f"evaled path: {p_evaled.run_config.output_evaled_prompt_path}")
-        result_prompt = await p_evaled.arun(client=self.client, timeout=60)  # 增加到60秒
+        result_prompt = await self.arun_with_telemetry(
+            p_evaled, "text_to_issue", cnt, retry_count, enqueue_time, **run_kwargs
+        )
         logger.info(f"[prompt_issue_out] {cnt} {output_path=}")
+        if self.structured_output:
+            # 原样返回，由调用方校验，校验失败时回退到旧的解析方式
+            return result_prompt.result_str.strip()
         output = extract_xml_tag(result_prompt.result_str, "sub_issue_list").strip()
         return output
 
@@ -143,10 +309,13 @@ class AgentRealtime:
         logger: logging.Logger,
         file_suffix: str,
         meeting_language: MeetingLanguageType,
+        retry_count: int = 0,
+        stage: str = "summary",
     ):
         """
         生成新的 summary points
         """
+        enqueue_time = time.perf_counter()
         logger.info(f"[in summary_points] {cnt}")
         output_path = (
             Path(self.base_dir) / "summary" / f"sum_{cnt}_result{file_suffix}.hprompt"
@@ -163,7 +332,113 @@ class AgentRealtime:
         )
         p_evaled.run_config.credential_path = None  # 覆盖hprompt中的credential_path
         logger.info(f"[prompt_summary_in] {cnt} {output_evaled_prompt_path=}")
-        result_prompt = await p_evaled.arun(client=self.client, timeout=60)  # 增加到60秒
+        result_prompt = await self.arun_with_telemetry(
+            p_evaled, stage, cnt, retry_count, enqueue_time
+        )
         logger.info(f"[prompt_summary_out] {cnt} {output_path=}")
         output = extract_xml_tag(result_prompt.result_str, "summary").strip()
         return output
+
+    async def summary_section(
+        self,
+        summary_points: str,
+        cnt: int,
+        logger: logging.Logger,
+        file_suffix: str,
+        meeting_language: MeetingLanguageType,
+        max_tokens: int,
+        retry_count: int = 0,
+        stage: str = "summary_section",
+    ):
+        """
+        将若干段 summary points 合并为一个 section summary，返回 (title, summary)
+        """
+        enqueue_time = time.perf_counter()
+        output_path = (
+            Path(self.base_dir)
+            / "summary_section"
+            / f"sec_{cnt}_result{file_suffix}.hprompt"
+        ).resolve()
+        output_evaled_prompt_path = (
+            Path(self.base_dir)
+            / "summary_section"
+            / f"sec_{cnt}_eval{file_suffix}.hprompt"
+        ).resolve()
+        p_evaled = prompt_section.eval(
+            var_map=VM(
+                summary_points=summary_points,
+                # 词数要求留一半余量，max_tokens 只作为硬上限
+                word_limit=str(max_tokens // 2),
+                meeting_language=meeting_language,
+            ),
+            run_config=RunConfig(
+                output_path=output_path,
+                output_evaled_prompt_path=output_evaled_prompt_path,
+            ),
+        )
+        p_evaled.run_config.credential_path = None  # 覆盖hprompt中的credential_path
+        logger.info(f"[prompt_section_in] {cnt} {output_evaled_prompt_path=}")
+        result_prompt = await self.arun_with_telemetry(
+            p_evaled,
+            stage,
+            cnt,
+            retry_count,
+            enqueue_time,
+            max_tokens=max_tokens,
+        )
+        logger.info(f"[prompt_section_out] {cnt} {output_path=}")
+        title = extract_xml_tag(result_prompt.result_str, "title").strip()
+        summary = extract_xml_tag(result_prompt.result_str, "summary").strip()
+        return title, summary
+
+    async def summary_abstract(
+        self,
+        abstract: str,
+        section: str,
+        cnt: int,
+        logger: logging.Logger,
+        file_suffix: str,
+        meeting_language: MeetingLanguageType,
+        max_tokens: int,
+        retry_count: int = 0,
+        stage: str = "summary_abstract",
+    ):
+        """
+        用最新的 section summary 更新会议摘要
+        """
+        enqueue_time = time.perf_counter()
+        output_path = (
+            Path(self.base_dir)
+            / "summary_abstract"
+            / f"abs_{cnt}_result{file_suffix}.hprompt"
+        ).resolve()
+        output_evaled_prompt_path = (
+            Path(self.base_dir)
+            / "summary_abstract"
+            / f"abs_{cnt}_eval{file_suffix}.hprompt"
+        ).resolve()
+        p_evaled = prompt_abstract.eval(
+            var_map=VM(
+                abstract=abstract or "None",
+                section=section,
+                word_limit=str(max_tokens // 2),
+                meeting_language=meeting_language,
+            ),
+            run_config=RunConfig(
+                output_path=output_path,
+                output_evaled_prompt_path=output_evaled_prompt_path,
+            ),
+        )
+        p_evaled.run_config.credential_path = None  # 覆盖hprompt中的credential_path
+        logger.info(f"[prompt_abstract_in] {cnt} {output_evaled_prompt_path=}")
+        result_prompt = await self.arun_with_telemetry(
+            p_evaled,
+            stage,
+            cnt,
+            retry_count,
+            enqueue_time,
+            max_tokens=max_tokens,
+        )
+        logger.info(f"[prompt_abstract_out] {cnt} {output_path=}")
+        output = extract_xml_tag(result_prompt.result_str, "abstract").strip()
+        return output
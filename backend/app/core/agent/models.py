@@ -1,5 +1,5 @@
 from typing import List, Literal, Optional, Union
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class Sentence(BaseModel):
@@ -19,6 +19,19 @@ class SummaryBlock(BaseModel):
     object_relation: str
 
 
+class SummarySection(BaseModel):
+    id: int
+    title: str
+    summary: List[str]
+    first_chunk: int
+    last_chunk: int
+
+
+class SummaryHierarchy(BaseModel):
+    sections: List[SummarySection]
+    abstract: str
+
+
 class NodeElement(BaseModel):
     full_id: str
     content: str
@@ -69,3 +82,47 @@ class DeleteOperation(Operation):
 class ModifyOperation(Operation):
     op: Literal["MODIFY"] = "MODIFY"
     new_content: str
+
+
+# 以下为 agent 结构化输出（JSON schema）对应的模型
+
+
+class StructuredOutput(BaseModel):
+    # 严格模式：不允许多余字段
+    model_config = ConfigDict(extra="forbid")
+
+
+class NewPositionOutput(StructuredOutput):
+    full_id: str = Field(pattern=r"^\d+\.\d+$")
+    position: str
+    note: str
+
+    @field_validator("position")
+    @classmethod
+    def check_not_empty(cls, value: str) -> str:
+        if not value.strip():
+            raise ValueError("position content is empty")
+        return value.strip()
+
+
+class PositionAndNoteOutput(StructuredOutput):
+    analysis: str
+    positions: List[NewPositionOutput]
+
+
+class PositionSubIssuesOutput(StructuredOutput):
+    position_full_id: str = Field(pattern=r"^\d+\.\d+$")
+    position_content: str
+    sub_issues: List[str]
+
+    @field_validator("sub_issues")
+    @classmethod
+    def check_not_empty(cls, value: List[str]) -> List[str]:
+        if any(not sub_issue.strip() for sub_issue in value):
+            raise ValueError("sub issue content is empty")
+        return [sub_issue.strip() for sub_issue in value]
+
+
+class SubIssueListOutput(StructuredOutput):
+    analysis: str
+    positions: List[PositionSubIssuesOutput]
@@ -2,7 +2,7 @@ import datetime
 import re
 from typing import Dict, List
 
-from app.core.agent.models import Issue
+from app.core.agent.models import Issue, PositionAndNoteOutput, SubIssueListOutput
 
 
 def parse_summary(new_summary_output: str) -> List[str]:
@@ -158,3 +158,35 @@ def gamma_parse_new_issue(new_issue: str) -> List[str]:
             sub_issue_content = sub_issue_match.group(4)
             current_position["sub_issues"].append(sub_issue_content)
     return result
+
+
+"""
+下面的两个函数是结构化输出（JSON schema）模式下的解析函数，
+输出格式与 gamma_parse_new_position / gamma_parse_new_issue 一致；
+校验失败时抛出 pydantic.ValidationError（ValueError 的子类）
+"""
+
+
+def gamma_parse_new_position_json(new_position: str) -> List[Dict]:
+    output = PositionAndNoteOutput.model_validate_json(new_position)
+    return [
+        {
+            "order_id": position.full_id,
+            "position": position.position,
+            "note": position.note,
+        }
+        for position in output.positions
+    ]
+
+
+def gamma_parse_new_issue_json(new_issue: str) -> List[Dict]:
+    output = SubIssueListOutput.model_validate_json(new_issue)
+    return [
+        {
+            "position_id": position.position_full_id,
+            "position_content": position.position_content,
+            "sub_issues": position.sub_issues,
+        }
+        for position in output.positions
+        if position.sub_issues
+    ]
@@ -0,0 +1,62 @@
+from typing import Dict, Optional, Set, Tuple
+
+from app.config import StageRoute
+from app.core.metrics import metrics_registry
+from app.utils import get_logger
+
+
+logger = get_logger()
+
+# 因违反 SLO 而切换到备用模型后，每隔多少次调用重新试探一次主模型
+SLO_PROBE_INTERVAL = 10
+# 判断 SLO 只看主模型最近的调用：回退期间主模型只有试探的样本，
+# 窗口太长会让恢复后的快速样本长时间无法抵消之前的慢样本
+SLO_WINDOW_CALLS = 20
+SLO_WINDOW_S = 120
+
+
+class ModelRouter:
+    """
+    按阶段选择模型：
+    - 默认使用阶段配置的 model（未配置时使用全局 llm_model）
+    - 重试时，或上一次输出未通过校验时，升级到 escalation_model
+    - 主模型最近的 p95 延迟超过 latency_slo 时，切换到 slo_fallback_model，
+      并定期试探主模型，以便其恢复后切回
+    """
+
+    def __init__(self, default_model: str, routes: Dict[str, StageRoute]) -> None:
+        self.default_model = default_model
+        self.routes = routes
+        self.pending_escalation: Set[str] = set()
+        self.slo_fallback_cnt: Dict[str, int] = {}
+
+    def select(self, stage: str, retry_count: int = 0) -> Tuple[str, str]:
+        """返回 (模型, 路由原因)"""
+        route = self.routes.get(stage, StageRoute())
+        model = route.model or self.default_model
+        if route.escalation_model and (
+            retry_count > 0 or stage in self.pending_escalation
+        ):
+            self.pending_escalation.discard(stage)
+            return route.escalation_model, "escalation"
+        if route.latency_slo and route.slo_fallback_model:
+            p95 = metrics_registry.latency_percentile(
+                stage, model, 0.95, window=SLO_WINDOW_CALLS, max_age_s=SLO_WINDOW_S
+            )
+            slo_ms = route.latency_slo.total_seconds() * 1000
+            if p95 is not None and p95 > slo_ms:
+                cnt = self.slo_fallback_cnt.get(stage, 0) + 1
+                if cnt < SLO_PROBE_INTERVAL:
+                    self.slo_fallback_cnt[stage] = cnt
+                    logger.info(
+                        f"[slo_fallback] {stage=} {model=} {p95=:.0f}ms > {slo_ms=:.0f}ms"
+                    )
+                    return route.slo_fallback_model, "slo_fallback"
+            self.slo_fallback_cnt[stage] = 0
+        return model, "default"
+
+    def report_invalid_output(self, stage: str, model: Optional[str] = None):
+        """输出未通过校验，下一次调用升级模型（已经是升级模型时不再升级）"""
+        route = self.routes.get(stage)
+        if route and route.escalation_model and model != route.escalation_model:
+            self.pending_escalation.add(stage)
@@ -19,6 +19,14 @@ def extract_xml_tag(text: str, tag: str):
     return text[start:end]
 
 
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算 token 数：CJK 字符按 1 个 token 计，其余字符按 4 个字符 1 个 token 计
+    """
+    cjk = sum(1 for ch in text if "\u4e00" <= ch <= "\u9fff")
+    return cjk + (len(text) - cjk + 3) // 4
+
+
 def parse_sub_issue_list(sub_issue_list: str):
     """
     <sub_issue_list>
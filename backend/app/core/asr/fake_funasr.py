@@ -0,0 +1,112 @@
+"""
+本地的假 FunASR websocket 服务，用于在没有 FunASR 的环境下测试：
+按收到的音频长度生成识别结果，每 PARTIAL_MS 输出一条 2pass-online 中间结果（增量），
+每 SENTENCE_MS 输出一条 2pass-offline 句子，is_speaking=False 时输出剩余部分并结束。
+
+    python -m app.core.asr.fake_funasr --port 10095
+"""
+
+from typing import List, Optional
+import argparse
+import asyncio
+import json
+
+from websockets.asyncio.server import Server, ServerConnection, serve
+
+
+SAMPLE_RATE = 16000
+BYTES_PER_MS = SAMPLE_RATE * 2 // 1000  # 16-bit mono
+PARTIAL_MS = 600
+SENTENCE_MS = 2000
+# 每个字对应的音频时长
+CHAR_MS = 200
+
+
+class FakeFunASRSession:
+    def __init__(self, ws: ServerConnection, wav_name: str):
+        self.ws = ws
+        self.wav_name = wav_name
+        self.received_ms = 0  # 已收到的音频时长
+        self.sentence_start_ms = 0  # 当前句子的起始时间
+        self.partial_ms = 0  # 上次输出中间结果时的音频时长
+        self.sentence_cnt = 0
+
+    def text(self, start_ms: int, end_ms: int) -> str:
+        n = max(1, (end_ms - start_ms) // CHAR_MS)
+        return f"句子{self.sentence_cnt}" + "字" * n
+
+    async def send(
+        self,
+        mode: str,
+        text: str,
+        is_final: bool,
+        timestamp: Optional[List[List[int]]] = None,
+    ):
+        msg = {
+            "mode": mode,
+            "wav_name": self.wav_name,
+            "text": text,
+            "is_final": is_final,
+        }
+        if timestamp is not None:
+            msg["timestamp"] = json.dumps(timestamp)
+        await self.ws.send(json.dumps(msg, ensure_ascii=False))
+
+    async def send_sentence(self, end_ms: int, is_final: bool):
+        start_ms = self.sentence_start_ms
+        if end_ms > start_ms:
+            timestamp = [
+                [t, min(t + CHAR_MS, end_ms)] for t in range(start_ms, end_ms, CHAR_MS)
+            ]
+            await self.send(
+                "2pass-offline", self.text(start_ms, end_ms), is_final, timestamp
+            )
+            self.sentence_cnt += 1
+        elif is_final:
+            # 与真实服务一致：没有内容时 text 为空
+            await self.send("2pass-offline", "", is_final)
+        self.sentence_start_ms = end_ms
+        self.partial_ms = end_ms
+
+    async def on_audio(self, data: bytes):
+        self.received_ms += len(data) // BYTES_PER_MS
+        if self.received_ms - self.partial_ms >= PARTIAL_MS:
+            # 与真实服务一致：中间结果只包含新识别的部分
+            n = (self.received_ms - self.partial_ms) // CHAR_MS
+            self.partial_ms = self.received_ms
+            await self.send("2pass-online", "字" * n, False)
+        if self.received_ms - self.sentence_start_ms >= SENTENCE_MS:
+            await self.send_sentence(self.received_ms, False)
+
+
+async def handle(ws: ServerConnection):
+    session: Optional[FakeFunASRSession] = None
+    async for message in ws:
+        if isinstance(message, bytes):
+            if session is not None:
+                await session.on_audio(message)
+            continue
+        msg = json.loads(message)
+        if msg.get("is_speaking", True):
+            session = FakeFunASRSession(ws, msg.get("wav_name", "demo"))
+        elif session is not None:
+            await session.send_sentence(session.received_ms, True)
+            session = None
+
+
+async def start_server(host: str = "127.0.0.1", port: int = 10095) -> Server:
+    return await serve(handle, host, port, subprotocols=["binary"])  # type: ignore
+
+
+async def main(host: str, port: int):
+    server = await start_server(host, port)
+    print(f"fake funasr listening on ws://{host}:{port}")
+    await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=10095)
+    args = parser.parse_args()
+    asyncio.run(main(args.host, args.port))
@@ -0,0 +1,177 @@
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+import asyncio
+
+from funasr_client import AsyncFunASRClient, FunASRMessageDecoded
+from funasr_client.types import InitMessageMode
+
+from app.config import settings
+from app.utils.log import get_logger
+
+
+# 健康检查时等待 pong 的超时时间
+PING_TIMEOUT = 5
+
+logger = get_logger()
+
+
+class PooledFunASRClient(AsyncFunASRClient[FunASRMessageDecoded]):
+    """
+    池中的 FunASR 会话。funasr_client 不开启 websocket 的 ping_interval，
+    对端断开后 connected 仍为 True，这里补充一个 ping 供健康检查使用。
+    funasr_client 没有公开的 ping 接口，只能直接使用其内部的 websocket 连接
+    """
+
+    async def ping(self, timeout: float) -> bool:
+        """连接已建立且在 timeout 秒内收到 pong"""
+        if not self.connected:
+            return False
+        try:
+            assert self._ws is not None
+            pong_waiter = await self._ws.ping()
+            await asyncio.wait_for(pong_waiter, timeout)
+        except Exception:
+            return False
+        return True
+
+
+class FunASRPool:
+    """
+    预先建立好连接的 FunASR 会话池，每个 FunASR URI 一个。
+    FunASR 的一个 websocket 会话在发送 is_speaking=False 之后就结束了，不能复用，
+    因此开麦时从池中租用一个已连接的会话，闭麦时在后台结束该会话，同时补充新的连接，
+    开麦后的音频不需要等待 websocket 握手
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        mode: InitMessageMode,
+        size: int,
+        health_interval: float,
+    ):
+        self.uri = uri
+        self.mode: InitMessageMode = mode
+        self.size = size
+        self.health_interval = health_interval
+        self.idle: Deque[PooledFunASRClient] = deque()
+        self.connecting = 0
+        self.health_task: Optional[asyncio.Task] = None
+        # 后台任务的引用，避免被回收
+        self.tasks: Set[asyncio.Task] = set()
+
+    def new_client(self) -> PooledFunASRClient:
+        return PooledFunASRClient(uri=self.uri, mode=self.mode)
+
+    def start(self):
+        """开始预热连接和健康检查，重复调用无影响"""
+        if self.size <= 0 or self.health_task is not None:
+            return
+        self.health_task = asyncio.create_task(self.loop_health_check())
+        self.refill()
+
+    def spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def refill(self):
+        while len(self.idle) + self.connecting < self.size:
+            self.connecting += 1
+            self.spawn(self.connect_idle())
+
+    async def connect_idle(self):
+        client = self.new_client()
+        try:
+            await client.connect()
+        except Exception as e:
+            # 连接失败时等下次租用或健康检查再补充
+            logger.warning(f"funasr pool connect failed: {self.uri} {e}")
+            return
+        finally:
+            self.connecting -= 1
+        self.idle.append(client)
+
+    def discard(self, client: AsyncFunASRClient):
+        """关闭不健康的连接，不等待结果"""
+        self.spawn(self.close_client(client, wait_for_final=False))
+
+    async def close_client(self, client: AsyncFunASRClient, wait_for_final=True):
+        try:
+            await client.close(wait_for_final=wait_for_final)
+        except Exception as e:
+            logger.warning(f"funasr client close failed: {self.uri} {e}")
+
+    async def loop_health_check(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for client in list(self.idle):
+                healthy = await client.ping(PING_TIMEOUT)
+                # 检查期间可能已经被租用
+                if not healthy and client in self.idle:
+                    self.idle.remove(client)
+                    self.discard(client)
+            self.refill()
+
+    async def acquire(
+        self, callback: Callable[[FunASRMessageDecoded], Any], start_time: int
+    ) -> AsyncFunASRClient[FunASRMessageDecoded]:
+        """
+        租用一个已连接的会话，池为空（或都已断开）时直接建立连接。
+        开麦时持有说话人的锁，这里不做 ping，只检查 connected；
+        对端已断开的会话由调用方在第一次发送失败时通过 connect 换成新连接
+        """
+        self.start()
+        client = None
+        while self.idle:
+            candidate = self.idle.popleft()
+            if candidate.connected:
+                client = candidate
+                break
+            self.discard(candidate)
+        if self.size > 0:
+            self.refill()
+        if client is None:
+            return await self.connect(callback, start_time)
+        # 解码时用 start_time 计算 real_timestamp，接收循环每次都读取最新的 callback
+        client.start_time = start_time
+        client.on_message(callback)
+        return client
+
+    async def connect(
+        self, callback: Callable[[FunASRMessageDecoded], Any], start_time: int
+    ) -> AsyncFunASRClient[FunASRMessageDecoded]:
+        """不经过池，直接建立一个新连接"""
+        client = self.new_client()
+        client.start_time = start_time
+        client.on_message(callback)
+        await client.connect()
+        return client
+
+    def release(self, client: AsyncFunASRClient) -> asyncio.Task:
+        """结束会话，在后台等待最终的识别结果"""
+        return self.spawn(self.close_client(client))
+
+    async def close(self):
+        if self.health_task is not None:
+            self.health_task.cancel()
+            self.health_task = None
+        while self.idle:
+            await self.close_client(self.idle.popleft(), wait_for_final=False)
+
+
+funasr_pools: Dict[Tuple[str, InitMessageMode], FunASRPool] = {}
+
+
+def get_funasr_pool(uri: str, mode: InitMessageMode = "offline") -> FunASRPool:
+    pool = funasr_pools.get((uri, mode))
+    if pool is None:
+        pool = FunASRPool(
+            uri,
+            mode,
+            settings.funasr_pool_size,
+            settings.funasr_pool_health_interval,
+        )
+        funasr_pools[(uri, mode)] = pool
+    return pool
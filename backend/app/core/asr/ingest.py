@@ -0,0 +1,203 @@
+from collections import deque
+from time import monotonic, perf_counter
+from typing import Callable, Deque, Optional, Union
+import asyncio
+
+from app.core.metrics import IngestQueueMetrics
+from app.types import IngestPolicyType
+
+
+# 16k 16-bit mono
+BYTES_PER_MS = 32
+# 合并后每条发给 FunASR 的消息的目标时长
+BATCH_MS = 160
+BATCH_BYTES = BATCH_MS * BYTES_PER_MS
+# 批次中第一个字节等待超过该时间后，即使不满也发送（如说话停顿、网络卡顿）
+BATCH_MAX_DELAY_MS = 200
+
+AudioData = Union[bytes, bytearray, memoryview]
+
+
+class AudioIngestQueue:
+    """
+    单个说话人的有界音频队列，socket 处理函数只负责入队，由发送任务发给 FunASR。
+    队列满（块数达到 maxsize 或字节数超过 max_bytes）时按 policy 处理：
+    - block：等待发送任务腾出空间，背压传递到 socket 处理函数
+    - drop_oldest：丢弃最旧的音频
+    - coalesce：把新音频合并到队尾，发送时帧更少、追赶更快；
+      字节数仍超过上限时丢弃最旧的音频
+    丢弃音频时调用 on_drop(nbytes)，此时被丢弃的块已从队首移除
+    """
+
+    def __init__(
+        self,
+        policy: IngestPolicyType,
+        maxsize: int,
+        max_bytes: int,
+        on_drop: Optional[Callable[[int], None]] = None,
+    ):
+        self.policy: IngestPolicyType = policy
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.on_drop = on_drop
+        # 入队时不复制，只在 coalesce 合并时把队尾转为 bytearray
+        self.chunks: Deque[AudioData] = deque()
+        self.nbytes = 0
+        self.not_empty = asyncio.Event()
+        self.not_full = asyncio.Event()
+        self.not_full.set()
+
+        # 统计
+        self.enqueued_chunks = 0
+        self.enqueued_bytes = 0  # 也是下一个入队字节在整个流中的位置
+        self.sent_messages = 0
+        self.sent_bytes = 0
+        self.dropped_chunks = 0
+        self.dropped_bytes = 0
+        self.coalesced_chunks = 0
+        self.blocked_count = 0
+        self.blocked_ms = 0.0
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def is_full(self, incoming: int) -> bool:
+        return (
+            len(self.chunks) >= self.maxsize or self.nbytes + incoming > self.max_bytes
+        )
+
+    def append(self, chunk: AudioData):
+        self.chunks.append(chunk)
+        self.nbytes += len(chunk)
+        self.enqueued_bytes += len(chunk)
+        self.not_empty.set()
+
+    def drop_oldest(self):
+        while self.chunks and (
+            len(self.chunks) > self.maxsize or self.nbytes > self.max_bytes
+        ):
+            dropped = self.chunks.popleft()
+            self.nbytes -= len(dropped)
+            self.dropped_chunks += 1
+            self.dropped_bytes += len(dropped)
+            if self.on_drop is not None:
+                self.on_drop(len(dropped))
+        if not self.chunks:
+            self.not_empty.clear()
+
+    async def put(self, chunk: bytes):
+        self.enqueued_chunks += 1
+        if self.policy == "block":
+            # 队列为空时总能放入，避免单个超大的块永远等待
+            if self.chunks and self.is_full(len(chunk)):
+                self.blocked_count += 1
+                start = perf_counter()
+                while self.chunks and self.is_full(len(chunk)):
+                    self.not_full.clear()
+                    await self.not_full.wait()
+                self.blocked_ms += (perf_counter() - start) * 1000
+            self.append(chunk)
+        elif self.policy == "coalesce" and len(self.chunks) >= self.maxsize:
+            tail = self.chunks[-1]
+            if not isinstance(tail, bytearray):
+                tail = self.chunks[-1] = bytearray(tail)
+            tail += chunk
+            self.nbytes += len(chunk)
+            self.enqueued_bytes += len(chunk)
+            self.coalesced_chunks += 1
+            self.drop_oldest()
+        else:
+            self.append(chunk)
+            self.drop_oldest()
+        self.max_depth = max(self.max_depth, len(self.chunks))
+
+    def pop(self) -> AudioData:
+        """取出队首的音频，先出队再发送，发送期间丢弃最旧音频不会影响该块"""
+        chunk = self.chunks.popleft()
+        self.nbytes -= len(chunk)
+        if not self.chunks:
+            self.not_empty.clear()
+        self.not_full.set()
+        return chunk
+
+    def unget(self, chunk: AudioData):
+        """把没有取完的部分放回队首"""
+        self.chunks.appendleft(chunk)
+        self.nbytes += len(chunk)
+        self.not_empty.set()
+
+    def record_sent(self, nbytes: int):
+        self.sent_messages += 1
+        self.sent_bytes += nbytes
+
+    async def wait(self):
+        await self.not_empty.wait()
+
+    def to_model(self, meeting_id: str, speaker_id: str) -> IngestQueueMetrics:
+        return IngestQueueMetrics(
+            meeting_id=meeting_id,
+            speaker_id=speaker_id,
+            policy=self.policy,
+            depth_chunks=len(self.chunks),
+            depth_bytes=self.nbytes,
+            max_depth_chunks=self.max_depth,
+            enqueued_chunks=self.enqueued_chunks,
+            sent_messages=self.sent_messages,
+            sent_bytes=self.sent_bytes,
+            dropped_chunks=self.dropped_chunks,
+            dropped_bytes=self.dropped_bytes,
+            coalesced_chunks=self.coalesced_chunks,
+            blocked_count=self.blocked_count,
+            blocked_ms=self.blocked_ms,
+        )
+
+
+class AudioBatcher:
+    """
+    把浏览器发来的小音频帧拼成约 BATCH_MS 的批次再发给 FunASR，减少 websocket 消息数。
+    缓冲预分配并复用，帧通过 memoryview 直接复制进缓冲，不产生中间对象
+    """
+
+    def __init__(
+        self, target_bytes: int = BATCH_BYTES, max_delay_ms: int = BATCH_MAX_DELAY_MS
+    ):
+        self.buffer = bytearray(target_bytes)
+        self.view = memoryview(self.buffer)
+        self.max_delay = max_delay_ms / 1000
+        self.size = 0
+        self.first_time: Optional[float] = None  # 批次中第一个字节到达的时间
+
+    def __len__(self) -> int:
+        return self.size
+
+    def is_full(self) -> bool:
+        return self.size == len(self.buffer)
+
+    def fill(self, data: AudioData) -> int:
+        """复制尽可能多的数据到缓冲，返回复制的字节数"""
+        n = min(len(data), len(self.buffer) - self.size)
+        if n == 0:
+            return 0
+        if self.size == 0:
+            self.first_time = monotonic()
+        self.view[self.size : self.size + n] = memoryview(data)[:n]
+        self.size += n
+        return n
+
+    def remaining(self) -> Optional[float]:
+        """距离必须发送的剩余秒数，批次为空时返回 None"""
+        if self.first_time is None:
+            return None
+        return max(0.0, self.first_time + self.max_delay - monotonic())
+
+    def is_due(self) -> bool:
+        return self.remaining() == 0
+
+    def batch(self) -> memoryview:
+        """当前批次，发送完成后才能 reset"""
+        return self.view[: self.size]
+
+    def reset(self):
+        self.size = 0
+        self.first_time = None
@@ -1,19 +1,41 @@
-from typing import Dict, List
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+from pydantic import BaseModel, ConfigDict
 
-from app.core.agent.models import Issue
+from app.core.agent.models import Issue, SummaryHierarchy
 from app.types import AiType, RoleType
 
 
 class AsrSentence(BaseModel):
+    # 句子提交到 transcript 后会被多处共享引用，禁止修改
+    model_config = ConfigDict(frozen=True)
+
     content: str
     time_range: List[int]
     speaker_id: str
 
 
 class SendAsrData(BaseModel):
+    # 说话人表与上次发送的 speaker_version 相同时为空，客户端按 user_id 合并
     speaker: Dict[str, str]
     sentences: List[AsrSentence]
+    speaker_version: int = 0
+
+
+class PartialSentence(BaseModel):
+    """说话人正在说的句子的中间识别结果（2pass-online），定稿后被 AsrSentence 取代"""
+
+    speaker_id: str
+    content: str
+    # 第一段中间结果到达的时间（相对会议开始）
+    start_time: int
+
+
+class SendPartialData(BaseModel):
+    # 与 SendAsrData 相同，说话人表没有变化时为空
+    speaker: Dict[str, str]
+    # 所有说话人当前的中间结果，整体替换客户端的状态，不在其中的说话人已定稿
+    partials: List[PartialSentence]
+    speaker_version: int = 0
 
 
 class TotalData(SendAsrData):
@@ -22,7 +44,23 @@ class TotalData(SendAsrData):
     topic: str
     role: RoleType
     ai_type: AiType
-    issue_map: List[Issue]
+    # 客户端的 issue_map_version 已是最新时为 None
+    issue_map: Optional[List[Issue]]
+    issue_map_version: int = 0
+    # sentences 中第一句在会议 transcript 中的下标
+    sentence_offset: int = 0
+    # 本次返回覆盖到的 transcript 长度，重连时作为 sentence_cursor 传回
+    sentence_cursor: int = 0
+    # document 会议的分层摘要（section summary 和会议摘要）
+    summary_hierarchy: Optional[SummaryHierarchy] = None
+
+
+class TranscriptPage(BaseModel):
+    sentences: List[AsrSentence]
+    # sentences 中第一句的下标
+    start: int
+    # transcript 的总句数
+    total: int
 
 
 class AudioData(BaseModel):
@@ -0,0 +1,228 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+import asyncio
+
+import numpy as np
+
+from app.config import settings
+
+
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2  # 16-bit mono
+# 每个分段文件的大小上限（约 17 分钟）
+SEGMENT_BYTES = 32 * 1024 * 1024
+# 缓冲达到该大小时提交写入（约 8 秒）
+FLUSH_BYTES = 256 * 1024
+# 写入跟不上时缓冲的上限，超过后等待写入完成
+MAX_BUFFER_BYTES = 4 * FLUSH_BYTES
+# 接收时间比按采样数推算的时间晚超过该值时（中间有停顿，如重新打开麦克风），另起一段
+DRIFT_TOLERANCE_MS = 500
+# 索引的每一项为 (offset_ms, byte_pos)
+INDEX_DTYPE = np.dtype("<i8")
+
+# 所有会议共用的写文件线程池
+pcm_executor = ThreadPoolExecutor(
+    max_workers=settings.pcm_writer_threads, thread_name_prefix="pcm-writer"
+)
+
+
+class PcmRun(NamedTuple):
+    """一段连续的音频：相对会议开始的偏移、所在文件、字节位置和长度"""
+
+    offset_ms: int
+    path: Path
+    byte_pos: int
+    nbytes: int
+
+
+def append_segment(pcm_path: Path, index_path: Path, data: bytes, index: List):
+    pcm_path.parent.mkdir(parents=True, exist_ok=True)
+    # 先写音频再写索引，保证索引指向的数据已经存在
+    with open(pcm_path, "ab") as f:
+        f.write(data)
+    if index:
+        with open(index_path, "ab") as f:
+            f.write(np.array(index, dtype=INDEX_DTYPE).tobytes())
+
+
+class PcmSegmentWriter:
+    """
+    单个说话人的 pcm 写入器：
+    音频先缓冲在内存中，批量追加到分段文件 seg_{n}.pcm，
+    连续的音频只在 seg_{n}.idx 中记一条 (offset_ms, byte_pos) 索引。
+    同一说话人同时最多只有一个写入任务，保证文件内容按顺序追加
+    """
+
+    def __init__(self, speaker_dir: Path, executor: ThreadPoolExecutor):
+        self.speaker_dir = speaker_dir
+        self.executor = executor
+        self.lock = asyncio.Lock()
+
+        self.segment = 0
+        self.segment_bytes = 0  # 当前分段已分配的字节数（包括尚未写入的缓冲）
+        self.run_offset_ms: Optional[int] = None  # 当前连续段的起始偏移
+        self.run_bytes = 0
+
+        self.buffer = bytearray()
+        self.buffer_start_ms: Optional[int] = None  # 缓冲中第一个采样的偏移
+        self.index: List = []  # 尚未写入的索引
+        self.flushing: Optional[asyncio.Future] = None
+        self.flushing_start_ms: Optional[int] = None
+
+    def segment_paths(self, segment: int):
+        return (
+            self.speaker_dir / f"seg_{segment:05d}.pcm",
+            self.speaker_dir / f"seg_{segment:05d}.idx",
+        )
+
+    async def write(self, data: bytes, offset_ms: int):
+        async with self.lock:
+            new_run = (
+                self.run_offset_ms is None
+                or offset_ms - self.expected_offset_ms() > DRIFT_TOLERANCE_MS
+            )
+            if self.segment_bytes >= SEGMENT_BYTES:
+                # 写完当前分段再切换到下一个分段
+                await self.flush()
+                self.segment += 1
+                self.segment_bytes = 0
+                if not new_run:
+                    # 新分段从推算的时间继续当前连续段
+                    offset_ms = self.expected_offset_ms()
+                    new_run = True
+            if new_run:
+                self.run_offset_ms = offset_ms
+                self.run_bytes = 0
+                self.index.append((offset_ms, self.segment_bytes))
+            if not self.buffer:
+                self.buffer_start_ms = self.expected_offset_ms()
+            self.buffer += data
+            self.segment_bytes += len(data)
+            self.run_bytes += len(data)
+
+            if len(self.buffer) >= FLUSH_BYTES:
+                if self.flushing is None or self.flushing.done():
+                    self.check_flushed()
+                    self.start_flush()
+                elif len(self.buffer) >= MAX_BUFFER_BYTES:
+                    await self.flush()
+
+    def expected_offset_ms(self) -> int:
+        assert self.run_offset_ms is not None
+        return self.run_offset_ms + self.run_bytes * 1000 // BYTES_PER_SECOND
+
+    def check_flushed(self):
+        """取出已完成写入任务的异常，写入失败只丢失这一批数据"""
+        if self.flushing is not None and self.flushing.done():
+            try:
+                self.flushing.result()
+            except Exception as e:
+                print(f"write pcm failed: {self.speaker_dir} {e}")
+            self.flushing = None
+            self.flushing_start_ms = None
+
+    def pending_offset_ms(self) -> Optional[int]:
+        """尚未写入磁盘的第一个采样的偏移，全部写入时返回 None"""
+        if self.flushing is not None and not self.flushing.done():
+            return self.flushing_start_ms
+        return self.buffer_start_ms
+
+    def start_flush(self):
+        data, index = bytes(self.buffer), self.index
+        self.flushing_start_ms = self.buffer_start_ms
+        self.buffer = bytearray()
+        self.buffer_start_ms = None
+        self.index = []
+        self.flushing = asyncio.get_running_loop().run_in_executor(
+            self.executor,
+            append_segment,
+            *self.segment_paths(self.segment),
+            data,
+            index,
+        )
+
+    async def flush(self):
+        """等待进行中的写入完成，再写出剩余的缓冲"""
+        if self.flushing is not None:
+            await asyncio.wait([self.flushing])
+            self.check_flushed()
+        if self.buffer or self.index:
+            self.start_flush()
+            await asyncio.wait([self.flushing])
+            self.check_flushed()
+
+
+class PcmStore:
+    """一场会议的 pcm 存储：pcm/{speaker_id}/seg_{n}.pcm + seg_{n}.idx"""
+
+    def __init__(
+        self, pcm_root_path: Path, executor: ThreadPoolExecutor = pcm_executor
+    ):
+        self.pcm_root_path = pcm_root_path
+        self.executor = executor
+        self.writers: Dict[str, PcmSegmentWriter] = {}
+        self.closed = False
+
+    async def write(self, speaker_id: str, data: bytes, offset_ms: int):
+        if self.closed:
+            return
+        writer = self.writers.get(speaker_id)
+        if writer is None:
+            writer = PcmSegmentWriter(self.pcm_root_path / speaker_id, self.executor)
+            self.writers[speaker_id] = writer
+        await writer.write(data, offset_ms)
+
+    def pending_offset_ms(self) -> Optional[int]:
+        """所有说话人中尚未写入磁盘的最早偏移，在此之前的音频都可以混音"""
+        pending = [
+            offset_ms
+            for writer in self.writers.values()
+            if (offset_ms := writer.pending_offset_ms()) is not None
+        ]
+        return min(pending, default=None)
+
+    async def flush_speaker(self, speaker_id: str):
+        """写出一个说话人的缓冲，关麦后不再有新音频把缓冲填满"""
+        writer = self.writers.get(speaker_id)
+        if writer is not None:
+            async with writer.lock:
+                await writer.flush()
+
+    async def flush_before(self, before_ms: int):
+        """写出含有早于 before_ms 音频的缓冲，
+        避免停顿的说话人剩下的少量缓冲一直拖住混音进度"""
+        for writer in list(self.writers.values()):
+            async with writer.lock:
+                pending = writer.pending_offset_ms()
+                if pending is not None and pending < before_ms:
+                    await writer.flush()
+
+    async def close(self):
+        """写出所有缓冲，之后到达的音频不再保存"""
+        self.closed = True
+        for writer in self.writers.values():
+            async with writer.lock:
+                await writer.flush()
+
+
+def read_pcm_runs(pcm_root_path: Path) -> List[PcmRun]:
+    """读取所有连续音频段，兼容旧格式的 {speaker_id}_{offset}.pcm 单文件"""
+    runs: List[PcmRun] = []
+    for path in pcm_root_path.iterdir():
+        if path.is_dir():
+            for index_path in sorted(path.glob("seg_*.idx")):
+                pcm_path = index_path.with_suffix(".pcm")
+                size = pcm_path.stat().st_size
+                entries = np.fromfile(index_path, dtype=INDEX_DTYPE).reshape(-1, 2)
+                ends = list(entries[1:, 1]) + [size]
+                for (offset_ms, byte_pos), end in zip(entries, ends):
+                    runs.append(
+                        PcmRun(
+                            int(offset_ms), pcm_path, int(byte_pos), int(end - byte_pos)
+                        )
+                    )
+        elif path.suffix == ".pcm" and not path.name.endswith("_tmp.pcm"):
+            _, start = path.stem.split("_", 1)
+            runs.append(PcmRun(int(start), path, 0, path.stat().st_size))
+    return runs
@@ -0,0 +1,261 @@
+"""
+把真实会议保存的 pcm 按说话人重新送入 MeetingManager，用于 ASR 链路的压测：
+每段连续音频开麦、按 CHUNK_MS 分块以 speed 倍速发送、结束后闭麦，
+统计音频到达到 sendCurrent 发出的延迟，以及 CPU 和内存占用。
+
+    python -m app.core.asr.replay data/123/pcm --speed 4 --meetings 8 --fake-funasr
+
+NOTE 使用 --fake-funasr 时假服务运行在同一进程中，其 CPU 占用也计入统计
+"""
+
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import argparse
+import asyncio
+import json
+import resource
+import tempfile
+import time
+import tracemalloc
+
+from pydantic import BaseModel
+
+from app.config import settings
+from app.core.asr.fake_funasr import start_server
+from app.core.asr.pcm_store import PcmRun, read_pcm_runs
+from app.core.asr.vad import BYTES_PER_MS
+from app.core.db import engine
+from app.core.meeting_manager import MeetingManager
+from app.core.metrics import IngestQueueMetrics, percentile
+
+
+# 与浏览器端发送的音频块大小相近
+CHUNK_MS = 100
+CHUNK_BYTES = CHUNK_MS * BYTES_PER_MS
+
+
+class ReplayMeetingResult(BaseModel):
+    meeting_id: str
+    audio_ms: int
+    sentences: int
+    send_current_calls: int
+    p50_latency_ms: Optional[float]
+    p95_latency_ms: Optional[float]
+    max_latency_ms: Optional[float]
+    ingest: List[IngestQueueMetrics]
+
+
+class ReplayResult(BaseModel):
+    speed: float
+    meetings: List[ReplayMeetingResult]
+    wall_s: float
+    cpu_s: float
+    cpu_s_per_meeting: float
+    peak_rss_mb: float
+    traced_peak_mb_per_meeting: Optional[float] = None
+    """tracemalloc 统计的 Python 对象内存峰值，按会议平均（会明显增加 CPU 占用）"""
+
+
+def speaker_of(run: PcmRun, pcm_root_path: Path) -> str:
+    """新格式为 pcm/{speaker_id}/seg_{n}.pcm，旧格式为 pcm/{speaker_id}_{offset}.pcm"""
+    if run.path.parent != pcm_root_path:
+        return run.path.parent.name
+    return run.path.stem.split("_", 1)[0]
+
+
+def load_runs(pcm_root_path: Path) -> Dict[str, List[PcmRun]]:
+    runs: Dict[str, List[PcmRun]] = {}
+    for run in sorted(read_pcm_runs(pcm_root_path)):
+        runs.setdefault(speaker_of(run, pcm_root_path), []).append(run)
+    return runs
+
+
+class ReplayMeeting:
+    def __init__(
+        self,
+        meeting_manager: MeetingManager,
+        meeting_id: str,
+        runs: Dict[str, List[PcmRun]],
+        speed: float,
+        root_path: Path,
+    ):
+        self.meeting_manager = meeting_manager
+        self.meeting_id = meeting_id
+        self.runs = runs
+        self.speed = speed
+        self.create_time = datetime.now()
+        self.recorder = meeting_manager.newMeetingRecorder(
+            meeting_id, "Chinese", self.create_time, root_path
+        )
+        self.start_wall = time.perf_counter()
+        # 每个说话人已发送音频的结束位置（相对会议开始）与发送时刻
+        self.ingest_ms: Dict[str, List[int]] = {spk: [] for spk in runs}
+        self.ingest_wall: Dict[str, List[float]] = {spk: [] for spk in runs}
+        self.latencies: List[float] = []
+        self.sentences = 0
+        self.send_current_calls = 0
+
+    async def sleep_until(self, offset_ms: int):
+        delay = self.start_wall + offset_ms / 1000 / self.speed - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def receive_time(self, offset_ms: int) -> datetime:
+        # 模拟的接收时间，使时间戳与原会议一致
+        return self.create_time + timedelta(milliseconds=offset_ms)
+
+    async def replay_speaker(self, speaker_id: str):
+        for run in self.runs[speaker_id]:
+            await self.sleep_until(run.offset_ms)
+            await self.meeting_manager.toggle_mic(
+                self.meeting_id, speaker_id, True, self.receive_time(run.offset_ms)
+            )
+            with open(run.path, "rb") as f:
+                f.seek(run.byte_pos)
+                for pos in range(0, run.nbytes, CHUNK_BYTES):
+                    chunk = f.read(min(CHUNK_BYTES, run.nbytes - pos))
+                    end_ms = run.offset_ms + (pos + len(chunk)) // BYTES_PER_MS
+                    await self.sleep_until(end_ms)
+                    await self.meeting_manager.send_audio_chunk(
+                        self.meeting_id, speaker_id, chunk, self.receive_time(end_ms)
+                    )
+                    self.ingest_ms[speaker_id].append(end_ms)
+                    self.ingest_wall[speaker_id].append(time.perf_counter())
+            end_ms = run.offset_ms + run.nbytes // BYTES_PER_MS
+            await self.meeting_manager.toggle_mic(
+                self.meeting_id, speaker_id, False, self.receive_time(end_ms)
+            )
+
+    def record_sent(self, sentences):
+        """延迟 = sendCurrent 发出的时刻 - 句子结束处的音频发送的时刻"""
+        now = time.perf_counter()
+        self.send_current_calls += 1
+        for sentence in sentences:
+            ends = self.ingest_ms.get(sentence.speaker_id)
+            if not ends:
+                continue
+            i = min(bisect_left(ends, sentence.time_range[1]), len(ends) - 1)
+            self.latencies.append(
+                (now - self.ingest_wall[sentence.speaker_id][i]) * 1000
+            )
+            self.sentences += 1
+
+    async def pump_current(self):
+        """与 cycle_request_data 相同的发送流程，只记录时间，不调用 agent"""
+        recorder = self.recorder
+        while True:
+            await recorder.trigger_event.wait()
+            recorder.trigger_event.clear()
+            result = await recorder.get_current()
+            self.record_sent(result)
+            await recorder.step(result)
+
+    async def run(self) -> ReplayMeetingResult:
+        pump_task = asyncio.create_task(self.pump_current())
+        await asyncio.gather(*(self.replay_speaker(spk) for spk in self.runs))
+        # 等待剩余的结果，未发出的部分在这里记录
+        await self.recorder.close_funasr_clients()
+        pump_task.cancel()
+        self.record_sent(await self.recorder.get_current())
+        await self.recorder.pcm_store.close()
+        audio_ms = max(
+            (ends[-1] for ends in self.ingest_ms.values() if ends), default=0
+        )
+        return ReplayMeetingResult(
+            meeting_id=self.meeting_id,
+            audio_ms=audio_ms,
+            sentences=self.sentences,
+            send_current_calls=self.send_current_calls,
+            p50_latency_ms=percentile(self.latencies, 0.5),
+            p95_latency_ms=percentile(self.latencies, 0.95),
+            max_latency_ms=max(self.latencies, default=None),
+            ingest=self.recorder.ingest_metrics(),
+        )
+
+
+async def replay(
+    pcm_root_path: Path,
+    speed: float,
+    n_meetings: int,
+    fake_funasr: bool,
+    trace_memory: bool = False,
+) -> ReplayResult:
+    runs = load_runs(pcm_root_path)
+    server = None
+    if fake_funasr:
+        uri = urlparse(settings.funasr_uri)
+        server = await start_server(uri.hostname or "127.0.0.1", uri.port or 10095)
+    meeting_manager = MeetingManager(engine)
+
+    if trace_memory:
+        tracemalloc.start()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        meetings = [
+            ReplayMeeting(
+                meeting_manager,
+                f"replay-{i}",
+                runs,
+                speed,
+                Path(tmp_dir) / f"replay-{i}",
+            )
+            for i in range(n_meetings)
+        ]
+        results = await asyncio.gather(*(meeting.run() for meeting in meetings))
+    traced_peak = None
+    if trace_memory:
+        traced_peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024 / n_meetings
+        tracemalloc.stop()
+    cpu_s = time.process_time() - cpu_start
+
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+    return ReplayResult(
+        speed=speed,
+        meetings=results,
+        wall_s=time.perf_counter() - wall_start,
+        cpu_s=cpu_s,
+        cpu_s_per_meeting=cpu_s / n_meetings,
+        # Linux 上 ru_maxrss 的单位为 KB
+        peak_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        traced_peak_mb_per_meeting=traced_peak,
+    )
+
+
+def summarize(result: ReplayResult) -> Tuple[Optional[float], Optional[float]]:
+    latencies = [m.p95_latency_ms for m in result.meetings if m.p95_latency_ms]
+    return percentile(latencies, 0.5), max(latencies, default=None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pcm_dir", type=Path, help="会议的 pcm 目录")
+    parser.add_argument("--speed", type=float, default=1.0, help="回放倍速")
+    parser.add_argument("--meetings", type=int, default=1, help="同时回放的会议数")
+    parser.add_argument(
+        "--fake-funasr", action="store_true", help="在本进程中启动假的 FunASR 服务"
+    )
+    parser.add_argument(
+        "--trace-memory", action="store_true", help="用 tracemalloc 统计内存峰值"
+    )
+    parser.add_argument("--output", type=Path, help="把完整结果写入 json 文件")
+    args = parser.parse_args()
+
+    result = asyncio.run(
+        replay(
+            args.pcm_dir, args.speed, args.meetings, args.fake_funasr, args.trace_memory
+        )
+    )
+    median_p95, worst_p95 = summarize(result)
+    summary = result.model_dump(exclude={"meetings"})
+    summary.update(median_p95_latency_ms=median_p95, worst_p95_latency_ms=worst_p95)
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        args.output.write_text(
+            json.dumps(result.model_dump(mode="json"), indent=2), encoding="utf-8"
+        )
@@ -0,0 +1,66 @@
+from bisect import bisect_right
+from itertools import islice
+from typing import Iterator, List, Optional
+
+from app.core.asr.models import AsrSentence
+
+
+class TranscriptSnapshot:
+    """
+    transcript 在某一时刻的只读视图。
+    与 TranscriptStore 共享底层列表，只记录当时的长度，创建为 O(1)，
+    之后追加的句子对快照不可见。
+    """
+
+    def __init__(self, entries: List[AsrSentence], length: int):
+        self._entries = entries
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[AsrSentence]:
+        return islice(self._entries, self._length)
+
+    def read(self, cursor: int = 0, limit: Optional[int] = None) -> List[AsrSentence]:
+        """读取 [cursor, cursor + limit) 范围内的句子，只复制引用"""
+        cursor = max(0, min(cursor, self._length))
+        end = self._length if limit is None else min(self._length, cursor + limit)
+        return self._entries[cursor:end]
+
+
+class TranscriptStore:
+    """
+    只追加的 transcript：句子按提交顺序追加（与前端实时收到的顺序一致），
+    写入后不再修改，下标即为稳定的游标。
+    读取方通过快照访问，不需要加锁，也不需要深拷贝。
+
+    提交顺序与时间顺序可能不同（如较长的句子晚于其他说话人较短的句子定稿），
+    因此同时按起始时间二分插入维护一份有序的索引，保存和会后读取使用时间顺序
+    """
+
+    def __init__(self) -> None:
+        self._entries: List[AsrSentence] = []
+        self._ordered: List[AsrSentence] = []
+        self._ordered_keys: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def extend(self, sentences: List[AsrSentence]):
+        self._entries.extend(sentences)
+        for sentence in sentences:
+            # 起始时间相同时排在后面，与稳定排序一致；通常插入位置在末尾附近
+            index = bisect_right(self._ordered_keys, sentence.time_range[0])
+            self._ordered_keys.insert(index, sentence.time_range[0])
+            self._ordered.insert(index, sentence)
+
+    def ordered(self) -> List[AsrSentence]:
+        """按起始时间排序的全部句子，只复制引用"""
+        return list(self._ordered)
+
+    def snapshot(self) -> TranscriptSnapshot:
+        return TranscriptSnapshot(self._entries, len(self._entries))
+
+    def read(self, cursor: int = 0, limit: Optional[int] = None) -> List[AsrSentence]:
+        return self.snapshot().read(cursor, limit)
@@ -1,8 +1,14 @@
 from pathlib import Path
-from typing import Any, List, Tuple
+from typing import BinaryIO, List, Optional, Tuple
 import wave
 import numpy as np
 
+from app.core.asr.pcm_store import PcmRun, read_pcm_runs
+
+
+# 流式混音的时间窗口（秒）
+MIX_WINDOW_SECONDS = 30
+
 
 def read_pcm(filename: Path):
     """Read PCM file into numpy array. Assuming 16-bit mono PCM."""
@@ -18,41 +24,125 @@ def write_wav(data, filename, sample_rate):
         wf.writeframes(data.astype(np.int16).tobytes())
 
 
+def place_pcm_runs(
+    runs: List[PcmRun], sample_rate: int
+) -> List[Tuple[int, int, PcmRun]]:
+    """计算每段音频在混音中的采样区间 [start, end)，按起始位置排序"""
+    placed = []
+    for run in runs:
+        if run.nbytes < 2:
+            continue
+        start_sample = int(sample_rate * run.offset_ms / 1000)
+        placed.append((start_sample, start_sample + run.nbytes // 2, run))
+    placed.sort(key=lambda x: x[0])
+    return placed
+
+
+def mix_window(
+    placed: List[Tuple[int, int, PcmRun]], start: int, count: int
+) -> np.ndarray:
+    """混合 [start, start + count) 采样区间内的音频，只读取与之重叠的部分"""
+    mixed = np.zeros(count, dtype=np.float32)
+    end = start + count
+    for run_start, run_end, run in placed:
+        if run_start >= end:
+            break
+        if run_end <= start:
+            continue
+        data = np.memmap(
+            run.path,
+            dtype=np.int16,
+            mode="r",
+            offset=run.byte_pos,
+            shape=(run.nbytes // 2,),
+        )
+        lo, hi = max(start, run_start), min(end, run_end)
+        mixed[lo - start : hi - start] += data[lo - run_start : hi - run_start]
+        del data
+    return mixed
+
+
 def combine_pcm_to_wav(pcm_root_path, output_filename, sample_rate=16000):
-    files_data: List[Tuple[int, Any]] = []
-    max_time_ms = 0
-
-    # Collect all PCM files and their start times
-
-    for file in Path.iterdir(pcm_root_path):
-        if (
-            file.is_file()
-            and file.suffix == ".pcm"
-            and not file.name.endswith("_tmp.pcm")
-        ):
-            _, start = file.stem.split("_", 1)
-            data = read_pcm(file)
-            offset_ms = int(start)
-            duration_ms = len(data) * 1000 / sample_rate
-            end_time_ms = offset_ms + duration_ms
-            files_data.append((offset_ms, data))
-            if end_time_ms > max_time_ms:
-                max_time_ms = end_time_ms
-
-    # Create a large enough buffer to hold the entire session
-    total_samples = int(sample_rate * max_time_ms / 1000)
-    combined_audio = np.zeros(total_samples, dtype=np.float32)
-
-    # Combine all audio files
-    for start, data in files_data:
-        start_sample = int(sample_rate * start / 1000)
-        end_sample = start_sample + len(data)
-        combined_audio[start_sample:end_sample] += data
+    """
+    按固定时间窗口流式混音并写入 WAV，内存占用与窗口大小相关，与会议时长无关。
+    第一遍计算各窗口的峰值用于归一化，第二遍混音并写入
+    """
+    placed = place_pcm_runs(read_pcm_runs(Path(pcm_root_path)), sample_rate)
+    total_samples = max((run_end for _, run_end, _ in placed), default=0)
+    window = sample_rate * MIX_WINDOW_SECONDS
 
     # Normalize audio to prevent clipping
-    max_val = np.max(np.abs(combined_audio))
-    if max_val > 32767:
-        combined_audio *= 32767 / max_val
+    max_val = 0.0
+    for start in range(0, total_samples, window):
+        mixed = mix_window(placed, start, min(window, total_samples - start))
+        max_val = max(max_val, float(np.max(np.abs(mixed))))
+    scale = 32767 / max_val if max_val > 32767 else 1.0
 
     # Save the combined audio to a WAV file
-    write_wav(combined_audio, output_filename, sample_rate)
+    with wave.open(str(output_filename), "wb") as wf:
+        wf.setnchannels(1)  # Mono
+        wf.setsampwidth(2)  # 16 bits per sample
+        wf.setframerate(sample_rate)
+        for start in range(0, total_samples, window):
+            mixed = mix_window(placed, start, min(window, total_samples - start))
+            if scale != 1.0:
+                mixed *= scale
+            wf.writeframes(mixed.astype(np.int16).tobytes())
+
+
+class IncrementalMixer:
+    """
+    会议进行中逐窗口混音，追加写入 WAV，会议结束时只需混音最后不完整的窗口。
+    无法预知全场的峰值，改为单独缩放会削波的窗口
+    """
+
+    def __init__(self, pcm_root_path: Path, output_filename: Path, sample_rate=16000):
+        self.pcm_root_path = pcm_root_path
+        self.output_filename = output_filename
+        self.sample_rate = sample_rate
+        self.window = sample_rate * MIX_WINDOW_SECONDS
+        self.mixed_samples = 0  # 已写入 WAV 的采样数
+        self.file: Optional[BinaryIO] = None
+        self.wav: Optional[wave.Wave_write] = None
+
+    def write(self, mixed: np.ndarray):
+        if self.wav is None:
+            self.file = open(self.output_filename, "wb")
+            self.wav = wave.open(self.file, "wb")
+            self.wav.setnchannels(1)  # Mono
+            self.wav.setsampwidth(2)  # 16 bits per sample
+            self.wav.setframerate(self.sample_rate)
+        max_val = float(np.max(np.abs(mixed))) if len(mixed) else 0.0
+        if max_val > 32767:
+            mixed *= 32767 / max_val
+        # wave 每次写入后都会更新文件头，写入后的文件即是完整的 WAV
+        self.wav.writeframes(mixed.astype(np.int16).tobytes())
+        assert self.file is not None
+        self.file.flush()
+        self.mixed_samples += len(mixed)
+
+    def mix_until(self, end_ms: int):
+        """混音所有在 end_ms 之前结束的完整窗口（end_ms 之前的音频都已写入磁盘）"""
+        end_sample = int(self.sample_rate * end_ms / 1000)
+        if self.mixed_samples + self.window > end_sample:
+            return
+        if not self.pcm_root_path.exists():
+            return
+        placed = place_pcm_runs(read_pcm_runs(self.pcm_root_path), self.sample_rate)
+        while self.mixed_samples + self.window <= end_sample:
+            self.write(mix_window(placed, self.mixed_samples, self.window))
+
+    def finish(self):
+        """混音剩余的全部音频并关闭文件"""
+        if self.pcm_root_path.exists():
+            placed = place_pcm_runs(read_pcm_runs(self.pcm_root_path), self.sample_rate)
+            total_samples = max((run_end for _, run_end, _ in placed), default=0)
+            while self.mixed_samples < total_samples:
+                count = min(self.window, total_samples - self.mixed_samples)
+                self.write(mix_window(placed, self.mixed_samples, count))
+        if self.wav is not None:
+            self.wav.close()
+            self.wav = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
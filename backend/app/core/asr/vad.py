@@ -0,0 +1,169 @@
+from bisect import bisect_right
+from collections import deque
+from typing import Deque, List, NamedTuple
+import numpy as np
+
+
+# 16k 16-bit mono
+BYTES_PER_MS = 32
+FRAME_MS = 20
+FRAME_BYTES = FRAME_MS * BYTES_PER_MS
+# RMS 超过该值的帧视为语音
+ENERGY_THRESHOLD = 400
+# RMS 介于两者之间时，过零率足够高的帧也视为语音（清辅音能量低但过零率高）
+LOW_ENERGY_THRESHOLD = 150
+ZCR_THRESHOLD = 0.25
+# 语音结束后继续保留的静音，FunASR 需要看到足够长的静音才会断句
+HANGOVER_MS = 1000
+# 语音开始前补发的静音，避免切掉起始的弱音
+PREROLL_MS = 200
+
+
+def frame_activity(frames: np.ndarray) -> np.ndarray:
+    """按帧计算 RMS 能量和过零率，返回每一帧是否为语音"""
+    samples = frames.astype(np.float32)
+    rms = np.sqrt(np.mean(samples * samples, axis=1))
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    return (rms >= ENERGY_THRESHOLD) | (
+        (rms >= LOW_ENERGY_THRESHOLD) & (zcr >= ZCR_THRESHOLD)
+    )
+
+
+class VoicedSegment(NamedTuple):
+    """一段通过门限的连续音频，pos_ms 为在接收流中的位置"""
+
+    pos_ms: int
+    data: bytes
+
+
+class OffsetMap:
+    """
+    一次开麦期间，发给 FunASR 的音频流与实际接收时间的对应关系。
+    被丢弃的静音使 FunASR 返回的时间戳偏早，这里记录每段连续音频的起点用于还原；
+    通过门限的音频在入队后也可能因队列溢出被丢弃，同样记录下来
+    """
+
+    def __init__(self, start_ms: int):
+        self.start_ms = start_ms  # 开麦时间相对会议开始的偏移
+        self.sent_ms: List[int] = [0]  # 每段连续音频在发送流中的起点
+        self.received_ms: List[int] = [0]  # 对应的接收流中的位置
+        self.sent_bytes = 0
+        # 队列丢弃的位置（FunASR 实际收到的流中）及截至该位置累计丢弃的字节数
+        self.dropped_at_ms: List[int] = []
+        self.dropped_bytes: List[int] = []
+
+    def add(self, segment: VoicedSegment):
+        sent_ms = self.sent_bytes // BYTES_PER_MS
+        if segment.pos_ms - self.received_ms[-1] != sent_ms - self.sent_ms[-1]:
+            self.sent_ms.append(sent_ms)
+            self.received_ms.append(segment.pos_ms)
+        self.sent_bytes += len(segment.data)
+
+    def drop(self, pos_bytes: int, nbytes: int):
+        """发送流中从 pos_bytes 开始的 nbytes 被队列丢弃，没有发给 FunASR"""
+        if pos_bytes < 0:
+            # 队列中残留的上一次开麦的音频，不属于本次的发送流
+            nbytes += pos_bytes
+            pos_bytes = 0
+        if nbytes <= 0:
+            return
+        dropped = self.dropped_bytes[-1] if self.dropped_bytes else 0
+        at_ms = (pos_bytes - dropped) // BYTES_PER_MS
+        if self.dropped_at_ms and self.dropped_at_ms[-1] == at_ms:
+            # 连续丢弃的多个块
+            self.dropped_bytes[-1] += nbytes
+        else:
+            self.dropped_at_ms.append(at_ms)
+            self.dropped_bytes.append(dropped + nbytes)
+
+    def real_ms(self, stream_ms: int) -> int:
+        """FunASR 时间戳对应的相对会议开始的时间"""
+        # 先补上队列丢弃的音频，还原为发送流中的位置
+        i = bisect_right(self.dropped_at_ms, stream_ms) - 1
+        if i >= 0:
+            stream_ms += self.dropped_bytes[i] // BYTES_PER_MS
+        i = bisect_right(self.sent_ms, stream_ms) - 1
+        return self.start_ms + self.received_ms[i] + stream_ms - self.sent_ms[i]
+
+
+class VoiceActivityGate:
+    """
+    单个说话人的语音门限：按 FRAME_MS 分帧，向量化计算能量和过零率，
+    语音帧及其后 HANGOVER_MS、之前 PREROLL_MS 的音频通过，其余静音丢弃
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.received_bytes = 0  # 已分帧的字节数（接收流中的位置）
+        self.remainder = b""  # 不足一帧的尾部，与下一块拼接
+        self.hangover = 0  # 剩余的 hangover 帧数
+        self.preroll: Deque[bytes] = deque(maxlen=PREROLL_MS // FRAME_MS)
+        self.offset_map = OffsetMap(0)
+
+    def start_session(self, start_ms: int) -> OffsetMap:
+        """开麦时重置接收流的位置，返回本次开麦的时间映射"""
+        self.received_bytes = 0
+        self.remainder = b""
+        self.hangover = 0
+        self.preroll.clear()
+        self.offset_map = OffsetMap(start_ms)
+        return self.offset_map
+
+    def stream_ms(self) -> int:
+        """已收到的音频在接收流中的结束位置（包括不足一帧的尾部）"""
+        return (self.received_bytes + len(self.remainder)) // BYTES_PER_MS
+
+    def process(self, chunk: bytes) -> List[VoicedSegment]:
+        if not self.enabled:
+            segment = VoicedSegment(self.received_bytes // BYTES_PER_MS, chunk)
+            self.received_bytes += len(chunk)
+            self.offset_map.add(segment)
+            return [segment]
+
+        data = self.remainder + chunk if self.remainder else chunk
+        n_frames = len(data) // FRAME_BYTES
+        self.remainder = data[n_frames * FRAME_BYTES :]
+        if n_frames == 0:
+            return []
+        frames = np.frombuffer(data, dtype=np.int16, count=n_frames * FRAME_BYTES // 2)
+        active = frame_activity(frames.reshape(n_frames, -1))
+
+        segments: List[VoicedSegment] = []
+        start = None  # 当前通过的连续帧的起点
+        pre: List[bytes] = []
+        for i, is_speech in enumerate(active.tolist()):
+            if is_speech:
+                self.hangover = HANGOVER_MS // FRAME_MS
+                passing = True
+            elif self.hangover > 0:
+                self.hangover -= 1
+                passing = True
+            else:
+                passing = False
+            if passing:
+                if start is None:
+                    # preroll 中只有紧接在前面的静音帧
+                    start, pre = i, list(self.preroll)
+                    self.preroll.clear()
+            else:
+                if start is not None:
+                    segments.append(self.segment(data, start, i, pre))
+                    start, pre = None, []
+                self.preroll.append(data[i * FRAME_BYTES : (i + 1) * FRAME_BYTES])
+        if start is not None:
+            segments.append(self.segment(data, start, n_frames, pre))
+        self.received_bytes += n_frames * FRAME_BYTES
+        for segment in segments:
+            self.offset_map.add(segment)
+        return segments
+
+    def segment(
+        self, data: bytes, start: int, end: int, pre: List[bytes]
+    ) -> VoicedSegment:
+        pos = self.received_bytes + start * FRAME_BYTES
+        body = data[start * FRAME_BYTES : end * FRAME_BYTES]
+        if pre:
+            pos -= len(pre) * FRAME_BYTES
+            body = b"".join(pre) + body
+        return VoicedSegment(pos // BYTES_PER_MS, body)
@@ -1,15 +1,33 @@
-from typing import Dict
+from typing import Dict, Iterable, List, NamedTuple
 from sqlalchemy import Engine
-from sqlmodel import Session, select, true
+from sqlmodel import Session, col, select, true
 
+from app.core.db import run_in_db
 from app.models import Attendee
 
 
+class SpeakerMap(NamedTuple):
+    """会议的说话人表（user_id -> 昵称），参会者变化时整体替换并递增 version"""
+
+    version: int
+    speaker: Dict[str, str]
+
+
 class AttendeeManager:
     def __init__(self, db_engine: Engine) -> None:
         self.db_engine = db_engine
+        # 进行中会议的说话人表，ASR 循环中读取不需要查询数据库；会议结束时移除
+        self.speaker_maps: Dict[str, SpeakerMap] = {}
 
-    def addAttendee(self, meeting_id, user_id, is_master, nickname):
+    async def addAttendee(self, meeting_id, user_id, is_master, nickname):
+        new_attendee = await self.insertAttendee(
+            meeting_id, user_id, is_master, nickname
+        )
+        self.update_speaker(meeting_id, user_id, nickname)
+        return new_attendee
+
+    @run_in_db
+    def insertAttendee(self, meeting_id, user_id, is_master, nickname) -> Attendee:
         with Session(self.db_engine) as session:
             new_attendee = Attendee(
                 meeting_id=meeting_id,
@@ -22,6 +40,7 @@ class AttendeeManager:
             session.refresh(new_attendee)
         return new_attendee
 
+    @run_in_db
     def leaveMeeting(self, meeting_id, user_id):
         with Session(self.db_engine) as session:
             statement = (
@@ -38,6 +57,7 @@ class AttendeeManager:
                 attendee.is_master = False
                 session.commit()
 
+    @run_in_db
     def get_active_attendees(self, meeting_id):
         with Session(self.db_engine) as session:
             # statement = select(Attendee).where(Attendee.meeting_id == meeting_id).where(Attendee.is_in_meeting == True)
@@ -45,6 +65,7 @@ class AttendeeManager:
             attendees = session.exec(statement).all()
             return attendees  # 返回所有在会议中的参会者，数据类型为list[Attendee]
 
+    @run_in_db
     def change_master(self, meeting_id, user_id):
         with Session(self.db_engine) as session:
             statement = (
@@ -57,17 +78,78 @@ class AttendeeManager:
                 attendee.is_master = True
                 session.commit()
 
-    def get_speaker_map(self, meeting_id):
-        attendees = self.get_active_attendees(meeting_id)
-        # print(f"{attendees=}")
-        speaker: Dict[str, str] = {}
-        for person in attendees:
-            assert person.nickname is not None
-            assert person.user_id is not None
-            speaker[str(person.user_id)] = person.nickname
-        # print(f"{speaker=}")
-        return speaker
+    def start_speaker_map(self, meeting_id):
+        """新建的会议还没有参会者，直接建立空的缓存"""
+        self.speaker_maps[str(meeting_id)] = SpeakerMap(0, {})
+
+    def end_speaker_map(self, meeting_id):
+        """会议结束后不再缓存，之后的读取查询数据库"""
+        self.speaker_maps.pop(str(meeting_id), None)
+
+    async def get_versioned_speaker_map(self, meeting_id) -> SpeakerMap:
+        key = str(meeting_id)
+        speaker_map = self.speaker_maps.get(key)
+        if speaker_map is None:
+            # 未缓存的会议（已结束的会议、服务重启前的会议）读取数据库，不缓存
+            speaker = (await self.get_speaker_maps([meeting_id]))[key]
+            speaker_map = self.speaker_maps.get(key, SpeakerMap(0, speaker))
+        return speaker_map
+
+    async def get_speaker_maps(
+        self, meeting_ids: Iterable
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        批量读取多个会议的说话人表：进行中的会议读取缓存，
+        其余会议用一次 IN 查询加载，结果不缓存
+        """
+        keys = [str(meeting_id) for meeting_id in meeting_ids]
+        missing = [int(key) for key in keys if key not in self.speaker_maps]
+        loaded: Dict[str, Dict[str, str]] = {}
+        if missing:
+            loaded = await self.load_speaker_maps(missing)
+        return {
+            key: self.speaker_maps[key].speaker
+            if key in self.speaker_maps
+            else loaded[key]
+            for key in keys
+        }
+
+    @run_in_db
+    def load_speaker_maps(self, meeting_ids: List[int]) -> Dict[str, Dict[str, str]]:
+        speaker_maps: Dict[str, Dict[str, str]] = {
+            str(meeting_id): {} for meeting_id in meeting_ids
+        }
+        with Session(self.db_engine) as session:
+            statement = (
+                select(Attendee.meeting_id, Attendee.user_id, Attendee.nickname)
+                .where(col(Attendee.meeting_id).in_(meeting_ids))
+                .order_by(col(Attendee.attendee_id))
+            )
+            for meeting_id, user_id, nickname in session.exec(statement):
+                assert nickname is not None
+                speaker_maps[str(meeting_id)][str(user_id)] = nickname
+        return speaker_maps
+
+    async def get_speaker_map(self, meeting_id) -> Dict[str, str]:
+        """返回的 dict 不会再被修改，调用方不应修改它"""
+        return (await self.get_versioned_speaker_map(meeting_id)).speaker
+
+    def update_speaker(self, meeting_id, user_id, nickname):
+        """
+        参会者加入时更新缓存。离开的参会者仍保留在说话人表中（历史发言需要显示昵称），
+        主持人变化也不影响昵称，因此只有加入会改变说话人表
+        """
+        key = str(meeting_id)
+        speaker_map = self.speaker_maps.get(key)
+        # 未缓存时下次读取会从数据库加载
+        if speaker_map is None or nickname is None:
+            return
+        if speaker_map.speaker.get(str(user_id)) == nickname:
+            return
+        speaker = {**speaker_map.speaker, str(user_id): nickname}
+        self.speaker_maps[key] = SpeakerMap(speaker_map.version + 1, speaker)
 
+    @run_in_db
     def getMeetingIn(self, user):
         with Session(self.db_engine) as session:
             # 找到满足条件的最后一个 attendee
@@ -1,11 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
 from pathlib import Path
-from sqlalchemy import make_url
+from time import perf_counter
+from typing import Awaitable, Callable, TypeVar
+import asyncio
+
+from sqlalchemy import Engine, event, make_url
 from sqlmodel import SQLModel, create_engine
+from typing_extensions import ParamSpec
 
 from app.config import settings
+from app.core.metrics import db_metrics_registry
+from app.utils.log import get_logger
+
+
+# 每个 SQLite 连接建立时设置：WAL 使读不阻塞写，synchronous=NORMAL 在 WAL 下仍保证
+# 数据库一致（断电可能丢失最后的事务），busy_timeout 让并发写入等待而不是直接报错
+SQLITE_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("busy_timeout", "5000"),
+    ("cache_size", "-32000"),  # 32MB
+    ("temp_store", "MEMORY"),
+    ("mmap_size", "268435456"),  # 256MB
+)
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def new_engine(db_url: str, tuned: bool = True) -> Engine:
+    db_engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    if tuned and db_engine.dialect.name == "sqlite":
+        event.listen(db_engine, "connect", set_sqlite_pragmas)
+    return db_engine
+
+
+engine = new_engine(settings.db_url)
+
+# 数据库查询在独立的有界线程池中执行，SQLite 的 I/O 和锁等待不会阻塞事件循环
+db_executor = ThreadPoolExecutor(
+    max_workers=settings.db_pool_size, thread_name_prefix="db"
+)
+logger = get_logger()
+
+P = ParamSpec("P")
+T = TypeVar("T")
 
 
-engine = create_engine(settings.db_url, connect_args={"check_same_thread": False})
+async def run_db(func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    """在数据库线程池中执行同步的查询函数，记录等待线程和执行的时间"""
+    query = getattr(func, "__qualname__", repr(func))
+    submit_time = perf_counter()
+
+    def timed() -> T:
+        start = perf_counter()
+        success = False
+        try:
+            result = func(*args, **kwargs)
+            success = True
+            return result
+        finally:
+            wait_ms = (start - submit_time) * 1000
+            exec_ms = (perf_counter() - start) * 1000
+            db_metrics_registry.record_query(query, wait_ms, exec_ms, success)
+            if wait_ms + exec_ms > settings.db_slow_query_ms:
+                logger.warning(
+                    f"slow db query {query}: wait={wait_ms:.1f}ms exec={exec_ms:.1f}ms"
+                )
+
+    db_metrics_registry.in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(db_executor, timed)
+    finally:
+        db_metrics_registry.in_flight -= 1
+
+
+def run_in_db(func: Callable[P, T]) -> Callable[P, Awaitable[T]]:
+    """把同步的数据库方法变为在数据库线程池中执行的协程函数"""
+
+    @wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        return await run_db(func, *args, **kwargs)
+
+    return wrapper
 
 
 def init_db() -> None:
@@ -30,6 +114,18 @@ def init_db() -> None:
 
     # This works because the models are already imported and registered from app.models
     SQLModel.metadata.create_all(engine)
+    create_indexes(engine)
+
+    from app.core.search import create_search_index
+
+    create_search_index(engine)
+
+
+def create_indexes(db_engine: Engine) -> None:
+    """create_all 不会给已存在的表添加新索引，这里补建模型中定义的索引"""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db_engine, checkfirst=True)
 
 
 if __name__ == "__main__":
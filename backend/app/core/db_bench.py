@@ -0,0 +1,276 @@
+"""
+数据库查询的微基准：在临时的 SQLite 数据库中生成大量会议和参会者，
+分别在没有索引、默认 pragma（baseline）和有索引、WAL 等 pragma（tuned）下
+通过各个 manager 执行查询并计时。
+
+    python -m app.core.db_bench --meetings 100000 --attendees 1000000 --repeat 50
+
+NOTE get_all_meetings 的总数有缓存，计时的是预热后（命中缓存）的查询
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+
+from pydantic import BaseModel
+from sqlalchemy import Engine, insert, text
+from sqlmodel import SQLModel
+
+from app.core.attendee_manager import AttendeeManager
+from app.core.db import create_indexes, new_engine
+from app.core.meeting_manager import MeetingManager
+from app.core.metrics import percentile
+from app.core.user_manager import UserManager
+from app.models import Attendee, Meeting, User
+
+
+# 每次批量插入的行数
+INSERT_BATCH = 10000
+# 列表接口每页的会议数
+PAGE_SIZE = 50
+# 比较 offset 和游标分页时翻到的页数
+DEEP_PAGE = 500
+
+
+class QueryTiming(BaseModel):
+    query: str
+    mean_ms: float
+    p50_ms: Optional[float]
+    p95_ms: Optional[float]
+
+
+class BenchResult(BaseModel):
+    meetings: int
+    attendees: int
+    users: int
+    seed_s: float
+    baseline: List[QueryTiming]
+    tuned: List[QueryTiming]
+    speedup: Dict[str, float]
+    """baseline / tuned 的平均耗时之比"""
+
+
+def seed(db_engine: Engine, n_meetings: int, n_attendees: int, n_users: int):
+    rng = random.Random(0)
+    start = datetime.now() - timedelta(days=365)
+    with db_engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [
+                {
+                    "user_id": i,
+                    "username": f"user{i}",
+                    "password": "",
+                    "created_at": start,
+                }
+                for i in range(1, n_users + 1)
+            ],
+        )
+        for begin in range(1, n_meetings + 1, INSERT_BATCH):
+            rows = []
+            for i in range(begin, min(begin + INSERT_BATCH, n_meetings + 1)):
+                create_by = rng.randint(1, n_users)
+                rows.append(
+                    {
+                        "meeting_id": i,
+                        "hash_id": f"{i:08d}",
+                        "create_time": start + timedelta(seconds=i * 300),
+                        "create_by": create_by,
+                        "master_id": create_by,
+                        # 最近的少量会议仍在进行
+                        "status": "processing" if i > n_meetings - 20 else "finished",
+                        "topic": f"topic {i}",
+                        "analysis_status": "Not Started",
+                        "ai_type": "document",
+                        "meeting_language": "Chinese",
+                    }
+                )
+            conn.execute(insert(Meeting), rows)
+        for begin in range(0, n_attendees, INSERT_BATCH):
+            rows = []
+            for i in range(begin, min(begin + INSERT_BATCH, n_attendees)):
+                meeting_id = i % n_meetings + 1
+                user_id = rng.randint(1, n_users)
+                rows.append(
+                    {
+                        "meeting_id": meeting_id,
+                        "user_id": user_id,
+                        "is_master": False,
+                        "nickname": f"user{user_id}",
+                        "is_in_meeting": meeting_id > n_meetings - 20,
+                    }
+                )
+            conn.execute(insert(Attendee), rows)
+
+
+def drop_indexes(db_engine: Engine):
+    """删除模型中定义的非唯一索引，得到优化前的表结构"""
+    with db_engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                if not index.unique:
+                    conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+
+def bench_queries(
+    db_engine: Engine, n_meetings: int, n_users: int
+) -> Dict[str, Callable[[random.Random], Awaitable]]:
+    user_manager = UserManager(db_engine)
+    meeting_manager = MeetingManager(db_engine)
+    attendee_manager = AttendeeManager(db_engine)
+    middle = datetime.now() - timedelta(days=180)
+    deep_offset = min(DEEP_PAGE * PAGE_SIZE, max(0, n_meetings - PAGE_SIZE))
+
+    def meeting_id(rng: random.Random) -> int:
+        return rng.randint(1, n_meetings)
+
+    def page(rng: random.Random) -> List[int]:
+        first = rng.randint(PAGE_SIZE, n_meetings)
+        return list(range(first, first - PAGE_SIZE, -1))
+
+    return {
+        "UserManager.getUser": lambda rng: user_manager.getUser(
+            rng.randint(1, n_users)
+        ),
+        "MeetingManager.getMeetingById": lambda rng: meeting_manager.getMeetingById(
+            str(meeting_id(rng))
+        ),
+        "MeetingManager.getMeetingByHashId": lambda rng: (
+            meeting_manager.getMeetingByHashId(f"{meeting_id(rng):08d}")
+        ),
+        "MeetingManager.get_all_meetings": lambda rng: meeting_manager.get_all_meetings(
+            limit=PAGE_SIZE, offset=0
+        ),
+        "MeetingManager.get_all_meetings(offset, deep page)": lambda rng: (
+            meeting_manager.get_all_meetings(
+                limit=PAGE_SIZE, offset=deep_offset, with_total=False
+            )
+        ),
+        "MeetingManager.get_all_meetings(before_id, deep page)": lambda rng: (
+            meeting_manager.get_all_meetings(
+                limit=PAGE_SIZE,
+                offset=0,
+                before_id=n_meetings + 1 - deep_offset,
+                with_total=False,
+            )
+        ),
+        "MeetingManager.get_all_meetings(start_time)": lambda rng: (
+            meeting_manager.get_all_meetings(
+                limit=PAGE_SIZE, offset=0, start_time=middle
+            )
+        ),
+        "AttendeeManager.get_active_attendees": lambda rng: (
+            attendee_manager.get_active_attendees(meeting_id(rng))
+        ),
+        "AttendeeManager.load_speaker_maps": lambda rng: (
+            attendee_manager.load_speaker_maps(page(rng))
+        ),
+        "AttendeeManager.getMeetingIn": lambda rng: attendee_manager.getMeetingIn(
+            User(user_id=rng.randint(1, n_users), username="", password="")
+        ),
+        "AttendeeManager.leaveMeeting": lambda rng: attendee_manager.leaveMeeting(
+            meeting_id(rng), rng.randint(1, n_users)
+        ),
+        "AttendeeManager.change_master": lambda rng: attendee_manager.change_master(
+            meeting_id(rng), rng.randint(1, n_users)
+        ),
+    }
+
+
+async def time_queries(
+    db_engine: Engine, n_meetings: int, n_users: int, repeat: int
+) -> List[QueryTiming]:
+    timings: List[QueryTiming] = []
+    for name, query in bench_queries(db_engine, n_meetings, n_users).items():
+        # 两种配置使用相同的参数序列
+        rng = random.Random(name)
+        await query(rng)  # 预热连接和页缓存
+        samples: List[float] = []
+        for _ in range(repeat):
+            start = perf_counter()
+            await query(rng)
+            samples.append((perf_counter() - start) * 1000)
+        timings.append(
+            QueryTiming(
+                query=name,
+                mean_ms=sum(samples) / len(samples),
+                p50_ms=percentile(samples, 0.5),
+                p95_ms=percentile(samples, 0.95),
+            )
+        )
+    return timings
+
+
+async def bench(
+    n_meetings: int, n_attendees: int, n_users: int, repeat: int, db_dir: Path
+) -> BenchResult:
+    db_url = f"sqlite:///{db_dir / 'bench.db'}"
+
+    # baseline：没有新增的索引，默认 pragma
+    baseline_engine = new_engine(db_url, tuned=False)
+    SQLModel.metadata.create_all(baseline_engine)
+    drop_indexes(baseline_engine)
+    seed_start = perf_counter()
+    seed(baseline_engine, n_meetings, n_attendees, n_users)
+    seed_s = perf_counter() - seed_start
+    with baseline_engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    baseline = await time_queries(baseline_engine, n_meetings, n_users, repeat)
+    baseline_engine.dispose()
+
+    # tuned：建立索引，连接时设置 WAL 等 pragma
+    tuned_engine = new_engine(db_url)
+    create_indexes(tuned_engine)
+    with tuned_engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    tuned = await time_queries(tuned_engine, n_meetings, n_users, repeat)
+    tuned_engine.dispose()
+
+    tuned_mean = {timing.query: timing.mean_ms for timing in tuned}
+    return BenchResult(
+        meetings=n_meetings,
+        attendees=n_attendees,
+        users=n_users,
+        seed_s=seed_s,
+        baseline=baseline,
+        tuned=tuned,
+        speedup={
+            timing.query: timing.mean_ms / tuned_mean[timing.query]
+            for timing in baseline
+            if tuned_mean.get(timing.query)
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--meetings", type=int, default=100000)
+    parser.add_argument("--attendees", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=50, help="每个查询的执行次数")
+    parser.add_argument("--output", type=Path, help="把完整结果写入 json 文件")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result = asyncio.run(
+            bench(args.meetings, args.attendees, args.users, args.repeat, Path(tmp_dir))
+        )
+    tuned_timings = {timing.query: timing for timing in result.tuned}
+    print(f"{'query':<56}{'baseline ms':>14}{'tuned ms':>12}{'speedup':>10}")
+    for timing in result.baseline:
+        tuned_timing = tuned_timings[timing.query]
+        print(
+            f"{timing.query:<56}{timing.mean_ms:>14.3f}"
+            f"{tuned_timing.mean_ms:>12.3f}"
+            f"{result.speedup.get(timing.query, 0):>10.1f}"
+        )
+    if args.output:
+        args.output.write_text(
+            json.dumps(result.model_dump(mode="json"), indent=2), encoding="utf-8"
+        )
@@ -1,10 +1,11 @@
 import logging
 from pathlib import Path
-from typing import List
-from handyllm import OpenAIClient, CacheManager
+from typing import List, Optional
+from handyllm import OpenAIClient, CacheManager, EndpointManager
 from handyllm.types import PathType
 
 from app.core.agent.agent_realtime import AgentRealtime
+from app.core.agent.router import ModelRouter
 from app.config import settings
 from app.core.asr.models import AsrSentence
 from app.core.sio.sio_server import SioServer
@@ -13,20 +14,37 @@ from app.types import MeetingLanguageType
 
 
 class MeetingAgent:
-    def __init__(self, root_dir: PathType, meeting_language: MeetingLanguageType):
+    def __init__(
+        self,
+        root_dir: PathType,
+        meeting_language: MeetingLanguageType,
+        meeting_id: Optional[str] = None,
+        cache_dir: str = "online",
+    ):
         self.meeting_language: MeetingLanguageType = meeting_language
-        self.client = OpenAIClient(
-            "async", endpoints=[model.model_dump() for model in settings.endpoints]
+        self.meeting_id = meeting_id
+        # endpoint 由 agent 自行轮询，便于记录每次调用实际使用的 endpoint
+        self.endpoint_manager = EndpointManager(
+            endpoints=[
+                {**model.model_dump(), "name": model.name or f"endpoint-{i}"}
+                for i, model in enumerate(settings.endpoints)
+            ]
         )
+        self.client = OpenAIClient("async")
         # 初始化agent，后续用于API调用
         print(f"meeting {root_dir=}")
         # 定义cache文件夹
         self.cm = CacheManager(
-            base_dir=Path(root_dir, "online"),
+            base_dir=Path(root_dir, cache_dir),
             only_dump=True,
         )
         self.agent = AgentRealtime(
-            client=self.client, base_dir=Path(root_dir, "online")
+            client=self.client,
+            base_dir=Path(root_dir, cache_dir),
+            endpoint_manager=self.endpoint_manager,
+            meeting_id=meeting_id,
+            structured_output=settings.llm_structured_output,
+            router=ModelRouter(settings.llm_model, settings.stage_models),
         )
 
         # 初始化数据
@@ -11,7 +11,10 @@ from app.core.agent.parser import (
     issue_map_to_str,
     gamma_parse_new_position,
     gamma_parse_new_issue,
+    gamma_parse_new_position_json,
+    gamma_parse_new_issue_json,
 )
+from app.core.agent.utils import extract_xml_tag
 from app.core.asr.models import AsrSentence
 from app.core.utils_echo import (
     judge_node_type_by_full_id,
@@ -19,6 +22,7 @@ from app.core.utils_echo import (
 )
 from app.core.meeting_agent import MeetingAgent
 from app.core.attendee_manager import AttendeeManager
+from app.core.metrics import metrics_registry
 from app.core.parsed_issues import ParsedIssue
 from app.core.sio.sio_server import SioServer
 from app.core.sio.models import UpdateIssueData
@@ -26,8 +30,13 @@ from app.types import MeetingLanguageType
 
 
 class MeetingAgentGamma(MeetingAgent):
-    def __init__(self, root_dir: PathType, meeting_language: MeetingLanguageType):
-        super().__init__(root_dir, meeting_language)
+    def __init__(
+        self,
+        root_dir: PathType,
+        meeting_language: MeetingLanguageType,
+        meeting_id: Optional[str] = None,
+    ):
+        super().__init__(root_dir, meeting_language, meeting_id)
 
         # 字数阈值
         if self.meeting_language == "Chinese":
@@ -60,6 +69,7 @@ class MeetingAgentGamma(MeetingAgent):
 
         # 文件计数
         self.issue_and_position_cnt = 0
+        # 每次更新 issue map 都会加一，同时作为 issue map 的版本号
         self.issue_map_cnt = 0
         self.ctx_cnt = 0
         self.dialog_cnt = 0
@@ -191,7 +201,7 @@ class MeetingAgentGamma(MeetingAgent):
                 await sio.statusAI(room, True)
 
                 self.last_issue = copy.deepcopy(self.chosen_node)
-                speaker = attendee_manager.get_speaker_map(meeting_id)
+                speaker = await attendee_manager.get_speaker_map(meeting_id)
                 last_index = len(self.sentences)
 
                 if self.start_position_index >= last_index:
@@ -394,6 +404,7 @@ class MeetingAgentGamma(MeetingAgent):
             position_number_limitation=position_number_limitation,
             file_suffix=file_suffix,
             meeting_language=self.meeting_language,
+            retry_count=retry_count if file_suffix else 0,
         )
         # 判断调用 agent 的时候用户是否对于思维导图进行了操作
         is_edited = self.check_manual_edits(
@@ -405,9 +416,11 @@ class MeetingAgentGamma(MeetingAgent):
             last_issue=last_issue_content,
             last_chosen_id=last_issue_id,
         )
+        if is_edited:
+            metrics_registry.mark_discarded(self.agent.last_call)
         p2i_postions = []
         if not is_edited:
-            parsed_new_positions = gamma_parse_new_position(new_positions)
+            parsed_new_positions = self.parse_new_positions(new_positions)
             self.logger.info(f"[parsed_new_positions] {parsed_new_positions=}")
             self.text_to_position_cnt += 1
             if len(parsed_new_positions) > 0:
@@ -466,6 +479,7 @@ class MeetingAgentGamma(MeetingAgent):
             logger=self.logger,
             file_suffix=file_suffix,
             meeting_language=self.meeting_language,
+            retry_count=retry_count if file_suffix else 0,
         )
 
         # 检查用户是否对思维导图进行了操作
@@ -475,19 +489,16 @@ class MeetingAgentGamma(MeetingAgent):
             last_issue=last_issue_content,
             last_chosen_id=last_issue_id,
         )
+        if res:
+            metrics_registry.mark_discarded(self.agent.last_call)
 
         if not res:
-            # 检查是否生成了新的 issue
-            if (
-                new_issues == "无"
-                or new_issues is None
-                or "none" in new_issues.lower()
-                or len(new_issues) < 5
-            ):
-                return 0, res
             # 解析 agent 的输出
             # TODO 修改prompt中的输入, 改成这里的解析的方法: position内容和编号都不能改
-            parsed_new_issues = gamma_parse_new_issue(new_issues)
+            parsed_new_issues = self.parse_new_issues(new_issues)
+            # 检查是否生成了新的 issue
+            if parsed_new_issues is None:
+                return 0, res
             self.logger.info(f"[parsed_new_issues] {parsed_new_issues=}")
             # 用 agent 的输出更新 issue map
             self.parsed_issues_new.add_new_issues(
@@ -496,6 +507,56 @@ class MeetingAgentGamma(MeetingAgent):
             self.text_to_issue_cnt += 1
         return 1, res
 
+    def report_invalid_output(self, stage: str):
+        """记录输出未通过校验，下一次调用该阶段时升级模型"""
+        last_call = self.agent.last_call
+        metrics_registry.mark_invalid_output(last_call)
+        if self.agent.router:
+            self.agent.router.report_invalid_output(
+                stage, last_call.model if last_call else None
+            )
+
+    def parse_new_positions(self, new_positions: str) -> List[Dict]:
+        """
+        解析文转position agent的输出
+        结构化输出校验失败时回退到旧的文本解析，避免整次调用重试
+        """
+        if self.agent.structured_output:
+            try:
+                return gamma_parse_new_position_json(new_positions)
+            except ValueError as e:
+                self.logger.warning(f"[invalid_structured_position] {str(e)}")
+                self.report_invalid_output("text_to_position")
+                new_positions = (
+                    extract_xml_tag(new_positions, "position_and_note").strip()
+                    or new_positions
+                )
+        return gamma_parse_new_position(new_positions)
+
+    def parse_new_issues(self, new_issues: Optional[str]) -> Optional[List[Dict]]:
+        """
+        解析文转issue agent的输出，没有生成新的 issue 时返回 None
+        结构化输出校验失败时回退到旧的文本解析，避免整次调用重试
+        """
+        if self.agent.structured_output and new_issues:
+            try:
+                parsed_new_issues = gamma_parse_new_issue_json(new_issues)
+                return parsed_new_issues if parsed_new_issues else None
+            except ValueError as e:
+                self.logger.warning(f"[invalid_structured_issue] {str(e)}")
+                self.report_invalid_output("text_to_issue")
+                new_issues = (
+                    extract_xml_tag(new_issues, "sub_issue_list").strip() or new_issues
+                )
+        if (
+            new_issues == "无"
+            or new_issues is None
+            or "none" in new_issues.lower()
+            or len(new_issues) < 5
+        ):
+            return None
+        return gamma_parse_new_issue(new_issues)
+
     def update_and_save_issue_map(self):
         """
         更新issue map并保存
@@ -525,6 +586,7 @@ class MeetingAgentGamma(MeetingAgent):
             UpdateIssueData(
                 issue_map=tmp,
                 chosen_id=str(self.chosen_node),
+                issue_map_version=self.issue_map_cnt,
             ),
         )
         print("send issue map: \n", tmp)
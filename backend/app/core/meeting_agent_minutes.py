@@ -0,0 +1,238 @@
+import asyncio
+import itertools
+from pathlib import Path
+from typing import Awaitable, Dict, List, Optional, Tuple, TypeVar
+from handyllm.types import PathType
+from pydantic import TypeAdapter
+from tenacity import retry, stop_after_attempt
+
+from app.config import settings
+from app.core.meeting_agent import MeetingAgent
+from app.core.asr.models import AsrSentence
+from app.core.agent.models import Sentence
+from app.core.agent.parser import parse_summary
+from app.core.agent.utils import estimate_tokens, sentences_to_blocks
+from app.core.utils_echo import parse_sentences_to_dialog
+from app.models import MeetingMinutes, MinutesSection
+from app.types import MeetingLanguageType
+
+
+T = TypeVar("T")
+
+
+async def gather_or_cancel(*aws: Awaitable[T]) -> List[T]:
+    """
+    与 asyncio.gather 相同，但任一任务失败（或自身被取消）时取消其余任务，
+    等它们结束后再抛出，失败后不会有 LLM 调用留在后台运行
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class MeetingAgentMinutes(MeetingAgent):
+    """
+    会后根据 total_asr.json 生成会议纪要：
+    1. map：按说话人切分对话，并发总结每个分块
+    2. reduce：每 REDUCE_FANIN 个分块合并为一个 section，再逐层合并得到全文概要
+    3. 根据全文概要生成会议摘要
+    """
+
+    # 每个 map 分块的对话 token 上限
+    CHUNK_MAX_TOKENS = 1500
+    # reduce 时每次合并的条目数
+    REDUCE_FANIN = 4
+    # section summary 和会议摘要的输出上限
+    SECTION_MAX_TOKENS = 300
+    ABSTRACT_MAX_TOKENS = 500
+
+    def __init__(
+        self,
+        root_dir: PathType,
+        meeting_language: MeetingLanguageType,
+        meeting_id: Optional[str] = None,
+    ):
+        super().__init__(root_dir, meeting_language, meeting_id, cache_dir="minutes")
+        self.root_dir = Path(root_dir)
+        # 限制并发的 LLM 调用数
+        self.semaphore = asyncio.Semaphore(settings.minutes_concurrency)
+        # 文件计数，保证每次调用的缓存文件不重名
+        self.cnt = itertools.count()
+
+        # 进度：已完成的 LLM 调用数 / 总调用数
+        self.done_steps = 0
+        self.total_steps = 0
+
+    @property
+    def progress(self) -> float:
+        if self.total_steps == 0:
+            return 0
+        return self.done_steps / self.total_steps
+
+    def load_sentences(self) -> List[Sentence]:
+        asr_path = self.root_dir / "total_asr.json"
+        total_asr = TypeAdapter(List[AsrSentence]).validate_json(
+            asr_path.read_text(encoding="utf-8")
+        )
+        return [
+            Sentence(spk=item.speaker_id, sentence_id=i, content=item.content)
+            for i, item in enumerate(total_asr)
+        ]
+
+    def split_chunks(self, sentences: List[Sentence]) -> List[List[Sentence]]:
+        """
+        将连续的说话人块打包为不超过 CHUNK_MAX_TOKENS 的分块，
+        只有单个说话人块本身超长时才在块内切分
+        """
+        chunks: List[List[Sentence]] = []
+        cur_chunk: List[Sentence] = []
+        cur_tokens = 0
+        for speaker_block in sentences_to_blocks(sentences):
+            block_tokens = sum(estimate_tokens(s.content) for s in speaker_block.block)
+            if cur_chunk and cur_tokens + block_tokens > self.CHUNK_MAX_TOKENS:
+                chunks.append(cur_chunk)
+                cur_chunk, cur_tokens = [], 0
+            for sentence in speaker_block.block:
+                tokens = estimate_tokens(sentence.content)
+                if cur_chunk and cur_tokens + tokens > self.CHUNK_MAX_TOKENS:
+                    chunks.append(cur_chunk)
+                    cur_chunk, cur_tokens = [], 0
+                cur_chunk.append(sentence)
+                cur_tokens += tokens
+        if cur_chunk:
+            chunks.append(cur_chunk)
+        return chunks
+
+    def count_steps(self, n_chunks: int) -> int:
+        """map + 各层 reduce + 摘要的 LLM 调用总数"""
+        steps = n_chunks
+        n = n_chunks
+        while True:
+            n = -(-n // self.REDUCE_FANIN)
+            steps += n
+            if n <= 1:
+                break
+        return steps + 1
+
+    @retry(stop=stop_after_attempt(3))
+    async def map_chunk(self, chunk: List[Sentence], speaker: Dict[str, str]):
+        cnt = next(self.cnt)
+        async with self.semaphore:
+            summary_points = await self.cm.cache(
+                self.agent.summary_points, f"map/map_{cnt}.txt"
+            )(
+                dialog=parse_sentences_to_dialog(chunk, speaker),
+                cnt=cnt,
+                logger=self.logger,
+                file_suffix="",
+                meeting_language=self.meeting_language,
+                stage="minutes_map",
+            )
+        self.done_steps += 1
+        return parse_summary(summary_points)
+
+    @retry(stop=stop_after_attempt(3))
+    async def reduce_group(self, summary_points: str) -> Tuple[str, List[str]]:
+        cnt = next(self.cnt)
+        async with self.semaphore:
+            title, section_summary = await self.cm.cache(
+                self.agent.summary_section,
+                [f"reduce/red_{cnt}_title.txt", f"reduce/red_{cnt}.txt"],
+            )(
+                summary_points=summary_points,
+                cnt=cnt,
+                logger=self.logger,
+                file_suffix="",
+                meeting_language=self.meeting_language,
+                max_tokens=self.SECTION_MAX_TOKENS,
+                stage="minutes_reduce",
+            )
+        self.done_steps += 1
+        return title, parse_summary(section_summary)
+
+    @retry(stop=stop_after_attempt(3))
+    async def generate_abstract(self, overview: str) -> str:
+        cnt = next(self.cnt)
+        async with self.semaphore:
+            abstract = await self.cm.cache(
+                self.agent.summary_abstract, f"abstract/abs_{cnt}.txt"
+            )(
+                abstract="",
+                section=overview,
+                cnt=cnt,
+                logger=self.logger,
+                file_suffix="",
+                meeting_language=self.meeting_language,
+                max_tokens=self.ABSTRACT_MAX_TOKENS,
+                stage="minutes_abstract",
+            )
+        self.done_steps += 1
+        return abstract
+
+    async def generate_minutes(self, speaker: Dict[str, str]) -> MeetingMinutes:
+        sentences = self.load_sentences()
+        # 已离开的参会者可能不在 speaker map 中，用 speaker id 兜底
+        speaker = {s.spk: speaker.get(s.spk, s.spk) for s in sentences}
+        chunks = self.split_chunks(sentences)
+        self.logger.info(f"[minutes] {len(sentences)=} {len(chunks)=}")
+        if not chunks:
+            return MeetingMinutes(title="", abstract="", sections=[])
+        self.total_steps = self.count_steps(len(chunks))
+
+        # map：并发总结每个分块
+        chunk_points = await gather_or_cancel(
+            *(self.map_chunk(chunk, speaker) for chunk in chunks)
+        )
+
+        # reduce 第一层：合并为 section
+        groups = [
+            range(i, min(i + self.REDUCE_FANIN, len(chunks)))
+            for i in range(0, len(chunks), self.REDUCE_FANIN)
+        ]
+        reduced = await gather_or_cancel(
+            *(
+                self.reduce_group(
+                    "\n".join(f"- {p}" for i in group for p in chunk_points[i])
+                )
+                for group in groups
+            )
+        )
+        sections = [
+            MinutesSection(
+                title=title,
+                summary=summary,
+                first_sentence=chunks[group[0]][0].sentence_id,
+                last_sentence=chunks[group[-1]][-1].sentence_id,
+            )
+            for group, (title, summary) in zip(groups, reduced)
+        ]
+
+        # 逐层合并 section，直到只剩一个全文概要
+        items = list(reduced)
+        while len(items) > 1:
+            items = await gather_or_cancel(
+                *(
+                    self.reduce_group(
+                        "\n".join(
+                            f"## {title}\n" + "\n".join(f"- {p}" for p in summary)
+                            for title, summary in items[i : i + self.REDUCE_FANIN]
+                        )
+                    )
+                    for i in range(0, len(items), self.REDUCE_FANIN)
+                )
+            )
+        title, overview = items[0]
+
+        abstract = await self.generate_abstract(
+            title + "\n" + "\n".join(f"- {p}" for p in overview)
+        )
+        minutes = MeetingMinutes(title=title, abstract=abstract, sections=sections)
+        (self.root_dir / "minutes.json").write_text(
+            minutes.model_dump_json(indent=2), encoding="utf-8"
+        )
+        return minutes
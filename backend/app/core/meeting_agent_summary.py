@@ -2,14 +2,16 @@ import asyncio
 import os
 import json
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from handyllm.types import PathType
 from tenacity import RetryCallState, retry, stop_after_attempt
 
+from app.config import settings
 from app.core.sio.sio_server import SioServer
 from app.core.meeting_agent import MeetingAgent
 from app.core.asr.models import AsrSentence
-from app.core.agent.models import Sentence
+from app.core.agent.models import Sentence, SummaryHierarchy, SummarySection
+from app.core.agent.utils import estimate_tokens
 from app.core.attendee_manager import AttendeeManager
 from app.core.utils_echo import parse_sentences_to_dialog
 from app.core.agent.parser import parse_summary
@@ -17,9 +19,40 @@ from app.core.sio.models import AllSummaries, SummaryData
 from app.types import MeetingLanguageType
 
 
+# 分层摘要保存在会议的 online 目录下，会后由 requestRecord 读取
+SUMMARY_HIERARCHY_FILE = "summary_hierarchy.json"
+
+
+def read_summary_hierarchy(root_dir: PathType) -> Optional[SummaryHierarchy]:
+    path = Path(root_dir, "online", SUMMARY_HIERARCHY_FILE)
+    if not path.exists():
+        return None
+    return SummaryHierarchy.model_validate_json(path.read_text(encoding="utf-8"))
+
+
 class MeetingAgentSummary(MeetingAgent):
-    def __init__(self, root_dir: PathType, meeting_language: MeetingLanguageType):
-        super().__init__(root_dir, meeting_language)
+    # 达到字数阈值后等待说话停顿的时长（秒），每来一句新的话重新计时
+    SUMMARY_DEBOUNCE = 3
+    # 达到字数阈值后最多等待的时长（秒）
+    SUMMARY_MAX_DELAY = 15
+
+    # 分层模式下各层的 token 上限，保证 prompt 不随会议时长增长
+    # 单次 summary 输入的对话上限，超出部分留给下一次
+    CHUNK_MAX_TOKENS = 1500
+    # 每个 section 最多合并的 summary 次数，以及输入的 token 上限
+    SECTION_CHUNKS = 4
+    SECTION_INPUT_TOKENS = 1200
+    # section summary 和会议摘要的输出上限
+    SECTION_MAX_TOKENS = 300
+    ABSTRACT_MAX_TOKENS = 500
+
+    def __init__(
+        self,
+        root_dir: PathType,
+        meeting_language: MeetingLanguageType,
+        meeting_id: Optional[str] = None,
+    ):
+        super().__init__(root_dir, meeting_language, meeting_id)
 
         # 字数阈值
         if self.meeting_language == "Chinese":
@@ -43,6 +76,17 @@ class MeetingAgentSummary(MeetingAgent):
 
         # 是否自动生成summary
         self.auto_generate = False
+        # 有新的句子或手动触发时置位，唤醒 summary 循环
+        self.summary_event = asyncio.Event()
+
+        # 是否分层汇总：summary -> section summary -> 会议摘要
+        self.hierarchical = settings.summary_hierarchical
+        # 尚未合并进 section 的 summary：(summary_cnt, summary points)
+        self.pending_chunks: List[Tuple[int, List[str]]] = []
+        self.sections: List[SummarySection] = []
+        self.abstract = ""
+        # 后台合并 section 的任务，不阻塞下一次 summary
+        self.rollup_task: Optional[asyncio.Task] = None
 
     async def proc_asr_results(
         self, asr_results: List[AsrSentence], sio: SioServer, room: str, manual=False
@@ -58,6 +102,56 @@ class MeetingAgentSummary(MeetingAgent):
 
             # 非阻塞放入队列，保证这些数据一次性放入
             self.sentence_queue.put_nowait(sentence)
+        if asr_results:
+            self.summary_event.set()
+
+    def request_summary(self):
+        """用户主动触发生成 summary"""
+        self.auto_generate = True
+        self.summary_event.set()
+
+    def count_chars(self, sentence: Sentence) -> int:
+        if self.meeting_language == "Chinese":
+            return len(sentence.content)
+        return len(sentence.content.split())
+
+    def drain_sentence_queue(self):
+        # 取出队列中所有未处理的数据
+        while not self.sentence_queue.empty():
+            sentence = self.sentence_queue.get_nowait()
+            self.acc_char_num += self.count_chars(sentence)
+            self.new_sentence.append(sentence)
+
+    async def wait_for_pause(self):
+        """
+        去抖：等到说话停顿 SUMMARY_DEBOUNCE 秒再生成，最多等待 SUMMARY_MAX_DELAY 秒，
+        期间用户手动触发则立即生成
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.SUMMARY_MAX_DELAY
+        while not self.auto_generate:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            self.summary_event.clear()
+            try:
+                await asyncio.wait_for(
+                    self.summary_event.wait(), min(self.SUMMARY_DEBOUNCE, remaining)
+                )
+            except asyncio.TimeoutError:
+                break
+        self.drain_sentence_queue()
+
+    def take_chunk(self) -> List[Sentence]:
+        """分层模式下按 token 上限截取本次 summary 的对话（至少一句）"""
+        if not self.hierarchical:
+            return self.new_sentence
+        tokens = 0
+        for i, sentence in enumerate(self.new_sentence):
+            tokens += estimate_tokens(sentence.content)
+            if tokens > self.CHUNK_MAX_TOKENS and i > 0:
+                return self.new_sentence[:i]
+        return self.new_sentence
 
     async def loop_generate_summary(
         self,
@@ -68,45 +162,63 @@ class MeetingAgentSummary(MeetingAgent):
         meeting_manager,
     ):
         print("in loop_generate_summary")
-        while meeting_manager.isRunning(str(meeting_id)):
-            # 取出队列中所有未处理的数据
-            while not self.sentence_queue.empty():
-                sentence = self.sentence_queue.get_nowait()
-                if self.meeting_language == "Chinese":
-                    self.acc_char_num += len(sentence.content)
-                else:
-                    self.acc_char_num += len(sentence.content.split())
-                self.new_sentence.append(sentence)
+        live_meeting = meeting_manager.getLiveMeeting(str(meeting_id))
+        # 等待新的句子或手动触发，会议结束时退出
+        while live_meeting and await live_meeting.wait(self.summary_event):
+            self.summary_event.clear()
+            self.drain_sentence_queue()
 
             # 如果字数超过阈值
-            if self.acc_char_num > self.SUMMARY_THRESHOLD or self.auto_generate:
-                if self.summary_cnt == 0:
-                    await asyncio.sleep(15)
-                else:
-                    if not self.auto_generate:
-                        await asyncio.sleep(2)
-                        continue
-                self.acc_char_num = 0
-                self.auto_generate = False
-                self.agent.is_running = True
-                await sio.statusAI(room, True)
-                speaker = attendee_manager.get_speaker_map(meeting_id)
-                new_dialog = parse_sentences_to_dialog(self.new_sentence, speaker)
-                try:
-                    # 生成summary
-                    new_summary_points = await self.generate_summary(new_dialog)
-                    # 保存并发送summary
-                    await self.save_and_send_summary(new_summary_points, sio, room)
-                except Exception as e:
-                    self.logger.warning(
-                        f"[text_to_summary_error]: {str(e)}", exc_info=True
-                    )
-                    self.agent.is_running = False
-                    await sio.statusAI(room, False)
-                    await asyncio.sleep(1)
+            if not (self.acc_char_num > self.SUMMARY_THRESHOLD or self.auto_generate):
+                continue
+            if not self.auto_generate:
+                # 非分层模式下只自动生成第一次 summary，之后由用户手动触发
+                if not self.hierarchical and self.summary_cnt > 0:
                     continue
-            else:
+                await self.wait_for_pause()
+            self.auto_generate = False
+            chunk = self.take_chunk()
+            if not chunk:
+                continue
+            # 超出 token 上限的对话留给下一次
+            self.acc_char_num = sum(
+                self.count_chars(sentence)
+                for sentence in self.new_sentence[len(chunk) :]
+            )
+            self.agent.is_running = True
+            await sio.statusAI(room, True)
+            speaker = await attendee_manager.get_speaker_map(meeting_id)
+            new_dialog = parse_sentences_to_dialog(chunk, speaker)
+            try:
+                # 生成summary
+                new_summary_points = await self.generate_summary(new_dialog)
+                # 保存并发送summary
+                await self.save_and_send_summary(
+                    new_summary_points, sio, room, consumed=len(chunk)
+                )
+            except Exception as e:
+                self.logger.warning(f"[text_to_summary_error]: {str(e)}", exc_info=True)
+                self.agent.is_running = False
+                await sio.statusAI(room, False)
                 await asyncio.sleep(1)
+                continue
+            if self.hierarchical:
+                self.schedule_rollup(sio, room)
+                if self.acc_char_num > self.SUMMARY_THRESHOLD:
+                    self.summary_event.set()
+
+    def retry_file_suffix(self, filename: str) -> Tuple[str, int]:
+        """
+        cache 文件已存在时（即重试），构造带有重试次数的后缀，返回 (后缀, 重试次数)
+        """
+        base_filename = Path(self.cm.base_dir, filename).resolve()
+        if not os.path.exists(base_filename):
+            return "", 0
+        retry_count = 1
+        # 如果带有后缀的文件已经存在，递增后缀数字
+        while os.path.exists(f"{base_filename}_retry_{retry_count}"):
+            retry_count += 1
+        return f"_retry_{retry_count}", retry_count
 
     @retry(stop=stop_after_attempt(3))
     async def generate_summary(
@@ -116,24 +228,9 @@ class MeetingAgentSummary(MeetingAgent):
     ):
         print("in generate_summary")
 
-        base_filename = Path(
-            self.cm.base_dir, f"summary/sum_{self.summary_cnt}.txt"
-        ).resolve()
-        # 获取当前的重试次数
-        # retry_count = retry_state.attempt_number if retry_state else 1
-        retry_count = 1
-        # 构造带有重试次数后缀的文件名
-        full_filename = base_filename
-        file_suffix = ""
-        if os.path.exists(base_filename):
-            full_filename = f"{base_filename}_retry_{retry_count}"
-            file_suffix = f"_retry_{retry_count}"
-            while os.path.exists(
-                full_filename
-            ):  # 如果带有后缀的文件已经存在，递增后缀数字
-                retry_count += 1
-                full_filename = f"{base_filename}_retry_{retry_count}"
-                file_suffix = f"_retry_{retry_count}"
+        file_suffix, retry_count = self.retry_file_suffix(
+            f"summary/sum_{self.summary_cnt}.txt"
+        )
 
         # 调用文转 summary API
         new_summary_points = await self.cm.cache(
@@ -145,12 +242,138 @@ class MeetingAgentSummary(MeetingAgent):
             logger=self.logger,
             file_suffix=file_suffix,
             meeting_language=self.meeting_language,
+            retry_count=retry_count,
         )
         self.logger.info(f"[summary_points] {new_summary_points=}")
         return new_summary_points
 
+    @retry(stop=stop_after_attempt(3))
+    async def generate_section(self, summary_points: str):
+        cnt = len(self.sections)
+        file_suffix, retry_count = self.retry_file_suffix(
+            f"summary_section/sec_{cnt}.txt"
+        )
+        title, section_summary = await self.cm.cache(
+            self.agent.summary_section,
+            [
+                f"summary_section/sec_{cnt}_title{file_suffix}.txt",
+                f"summary_section/sec_{cnt}{file_suffix}.txt",
+            ],
+        )(
+            summary_points=summary_points,
+            cnt=cnt,
+            logger=self.logger,
+            file_suffix=file_suffix,
+            meeting_language=self.meeting_language,
+            max_tokens=self.SECTION_MAX_TOKENS,
+            retry_count=retry_count,
+        )
+        self.logger.info(f"[summary_section] {title=} {section_summary=}")
+        return title, section_summary
+
+    @retry(stop=stop_after_attempt(3))
+    async def generate_abstract(self, section: str):
+        cnt = len(self.sections)
+        file_suffix, retry_count = self.retry_file_suffix(
+            f"summary_abstract/abs_{cnt}.txt"
+        )
+        abstract = await self.cm.cache(
+            self.agent.summary_abstract,
+            f"summary_abstract/abs_{cnt}{file_suffix}.txt",
+        )(
+            abstract=self.abstract,
+            section=section,
+            cnt=cnt,
+            logger=self.logger,
+            file_suffix=file_suffix,
+            meeting_language=self.meeting_language,
+            max_tokens=self.ABSTRACT_MAX_TOKENS,
+            retry_count=retry_count,
+        )
+        self.logger.info(f"[summary_abstract] {abstract=}")
+        return abstract
+
+    def summary_hierarchy(self) -> Optional[SummaryHierarchy]:
+        """非分层模式下为 None"""
+        if not self.hierarchical:
+            return None
+        return SummaryHierarchy(sections=self.sections, abstract=self.abstract)
+
+    def save_hierarchy(self):
+        hierarchy = self.summary_hierarchy()
+        if hierarchy is None:
+            return
+        Path(self.cm.base_dir, SUMMARY_HIERARCHY_FILE).write_text(
+            hierarchy.model_dump_json(indent=2), encoding="utf-8"
+        )
+
+    def schedule_rollup(self, sio: SioServer, room: str):
+        """summary 累积到 SECTION_CHUNKS 次后，在后台合并为 section"""
+        if len(self.pending_chunks) < self.SECTION_CHUNKS:
+            return
+        if self.rollup_task is None or self.rollup_task.done():
+            self.rollup_task = asyncio.create_task(self.rollup_sections(sio, room))
+
+    async def rollup_sections(self, sio: SioServer, room: str, final: bool = False):
+        """final 为 True 时（会议结束）剩余不足 SECTION_CHUNKS 次的 summary 也合并"""
+        while len(self.pending_chunks) >= self.SECTION_CHUNKS or (
+            final and self.pending_chunks
+        ):
+            # 按次数和 token 上限取出本 section 的 summary，至少一次
+            chunks: List[Tuple[int, List[str]]] = []
+            tokens = 0
+            for chunk in self.pending_chunks[: self.SECTION_CHUNKS]:
+                chunk_tokens = sum(estimate_tokens(point) for point in chunk[1])
+                if chunks and tokens + chunk_tokens > self.SECTION_INPUT_TOKENS:
+                    break
+                chunks.append(chunk)
+                tokens += chunk_tokens
+            summary_points = "\n".join(
+                f"- {point}" for _, points in chunks for point in points
+            )
+            try:
+                title, section_summary = await self.generate_section(summary_points)
+                section = SummarySection(
+                    id=len(self.sections),
+                    title=title,
+                    summary=parse_summary(section_summary),
+                    first_chunk=chunks[0][0],
+                    last_chunk=chunks[-1][0],
+                )
+                # section 和会议摘要都成功后才提交，失败时下次重新合并
+                abstract = await self.generate_abstract(f"{title}\n{section_summary}")
+            except Exception as e:
+                self.logger.warning(f"[summary_rollup_error]: {str(e)}", exc_info=True)
+                return
+            self.sections.append(section)
+            self.abstract = abstract
+            del self.pending_chunks[: len(chunks)]
+            self.save_hierarchy()
+            await sio.sendSummaryHierarchy(
+                room, SummaryHierarchy(sections=self.sections, abstract=self.abstract)
+            )
+
+    async def finish(self, sio: SioServer, room: str):
+        """会议结束时等待后台的合并完成，再把剩余的 summary 合并为最后的 section"""
+        if not self.hierarchical:
+            return
+        if self.rollup_task is not None:
+            await self.rollup_task
+            self.rollup_task = None
+        await self.rollup_sections(sio, room, final=True)
+        self.save_hierarchy()
+
+    def close(self):
+        if self.rollup_task is not None and not self.rollup_task.done():
+            self.rollup_task.cancel()
+        super().close()
+
     async def save_and_send_summary(
-        self, new_summary_points: str, sio: SioServer, room: str
+        self,
+        new_summary_points: str,
+        sio: SioServer,
+        room: str,
+        consumed: Optional[int] = None,
     ):
         parsed_summary_list = parse_summary(new_summary_points)
         self.logger.info(f"[parsed_summary_list] {parsed_summary_list=}")
@@ -161,16 +384,18 @@ class MeetingAgentSummary(MeetingAgent):
             )
             self.summary_new.append(summary_data)
         await sio.sendSummaryNew(room, AllSummaries(summaries=self.summary_new))
+        if self.hierarchical and parsed_summary_list:
+            self.pending_chunks.append((self.summary_cnt, parsed_summary_list))
 
         # 重置变量
         self.summary_total.extend(self.summary_new)
         self.summary_new = []
-        self.new_sentence = []
+        # 只移除本次已汇总的句子
+        self.new_sentence = self.new_sentence[consumed:] if consumed is not None else []
         # self.start_summary_index = len(self.sentences)
         self.agent.is_running = False
         self.summary_cnt += 1
         await sio.statusAI(room, False)
-        await asyncio.sleep(1)
 
     async def save_history(self, history_list: List):
         # 保存历史记录
@@ -178,6 +403,9 @@ class MeetingAgentSummary(MeetingAgent):
             "id": self.edit_history_cnt,
             "history": history_list,
         }
+        hierarchy = self.summary_hierarchy()
+        if hierarchy is not None:
+            history.update(hierarchy.model_dump())
         history_filename = Path(
             self.cm.base_dir, f"history/history_{self.edit_history_cnt}.json"
         ).resolve()
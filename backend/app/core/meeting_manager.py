@@ -3,27 +3,41 @@ from datetime import datetime
 import logging
 import random
 import string
-from typing import Dict, List, Optional, Union
+import time
+from typing import Dict, List, Optional, Tuple, Union
 from pydantic import TypeAdapter
-from sqlalchemy import Engine
-from sqlmodel import Session, func, select
+from sqlalchemy import Engine, Integer, column
+from sqlmodel import Session, col, func, select
 from pathlib import Path
 
 from app.core.sio.sio_server import SioServer
-from app.models import Code, Meeting
+from app.models import Code, Meeting, MeetingMinutes
 from app.core.meeting_recorder import MeetingRecorder
 from app.core.meeting_agent import MeetingAgent
 from app.core.meeting_agent_gamma import MeetingAgentGamma
 from app.core.meeting_agent_summary import MeetingAgentSummary
-from app.core.asr.models import AsrSentence, SendAsrData
+from app.core.meeting_agent_minutes import MeetingAgentMinutes
+from app.core.asr.models import AsrSentence, SendAsrData, SendPartialData
+from app.core.asr.transcript import TranscriptSnapshot
 from app.core.attendee_manager import AttendeeManager
+from app.core.db import run_in_db
+from app.core.search import SearchIndex
 from app.core.asr.utils import (
     combine_pcm_to_wav,
 )
 from app.core.parsed_issues import ParsedIssue
 from app.core.util import get_max_numbered_parsed_issues
 from app.config import settings
-from app.types import AiType, MeetingLanguageType
+from app.types import AiType, AnalysisStatusType, MeetingLanguageType
+
+
+# 中间识别结果的最小发送间隔（秒）
+PARTIAL_INTERVAL = 0.2
+# 会议列表总数的缓存时间（秒），总数只用于显示页数，允许短暂的误差
+MEETING_COUNT_TTL = 30
+# 会议中 transcript 分批写入检索索引：积累到一定句数或距上次写入超过一定时间（秒）
+INDEX_BATCH_SENTENCES = 20
+INDEX_INTERVAL = 10
 
 
 def get_meeting_hash():
@@ -42,11 +56,43 @@ def generate_unique_hash(session: Session) -> str:
             return hash_id
 
 
+class LiveMeeting:
+    """
+    进行中的会议，会议循环和 ongoingMeetings 以此为准，不再轮询数据库。
+    meeting 是数据库记录的快照，修改会议时同时写入数据库和快照
+    """
+
+    def __init__(self, meeting: Meeting):
+        self.meeting = meeting
+        self.ended = asyncio.Event()
+
+    async def wait(self, event: asyncio.Event) -> bool:
+        """等待 event 或会议结束，会议已结束时返回 False"""
+        if not event.is_set() and not self.ended.is_set():
+            waiters = {
+                asyncio.ensure_future(event.wait()),
+                asyncio.ensure_future(self.ended.wait()),
+            }
+            try:
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+        return not self.ended.is_set()
+
+
 class MeetingManager:
     def __init__(self, db_engine: Engine) -> None:
         self.db_engine = db_engine
+        self.live_meetings: Dict[str, LiveMeeting] = {}
         self.meeting_recorders: Dict[str, MeetingRecorder] = {}
         self.meeting_agents: Dict[str, MeetingAgent] = {}
+        # 正在生成会议纪要的 agent 和任务
+        self.minutes_agents: Dict[str, MeetingAgentMinutes] = {}
+        self.minutes_tasks: Dict[str, asyncio.Task] = {}
+        # 按过滤条件缓存的会议总数：(过期时间, 总数)
+        self.meeting_counts: Dict[Tuple, Tuple[float, int]] = {}
+        self.search_index = SearchIndex(db_engine)
 
     def newMeetingRecorder(
         self,
@@ -60,6 +106,8 @@ class MeetingManager:
             meeting_id, meeting_language, create_time, meeting_root_path
         )
         self.meeting_recorders[meeting_id] = obj
+        if settings.save_pcm:
+            obj.start_mix()
         return obj
 
     def newMeetingAgent(
@@ -71,24 +119,23 @@ class MeetingManager:
         meeting_id = str(meeting_id)
         if ai_type == "graph":
             obj = MeetingAgentGamma(
-                self.getMeetingRootPath(meeting_id), meeting_language
+                self.getMeetingRootPath(meeting_id), meeting_language, meeting_id
             )
         elif ai_type == "document":
             obj = MeetingAgentSummary(
-                self.getMeetingRootPath(meeting_id), meeting_language
+                self.getMeetingRootPath(meeting_id), meeting_language, meeting_id
             )
         else:
             raise ValueError("Unsupported agent type")
         self.meeting_agents[meeting_id] = obj
         return obj
 
-    def createMeeting(
+    @run_in_db
+    def addMeeting(
         self,
         create_by: int,
-        topic: str,
+        topic: Optional[str],
         ai_type: AiType,
-        sio: SioServer,
-        attendee_manager: AttendeeManager,
         hot_words: Optional[List[str]],
         meeting_language: MeetingLanguageType,
     ) -> Meeting:
@@ -106,7 +153,26 @@ class MeetingManager:
             session.add(meeting)
             session.commit()
             session.refresh(meeting)
+        self.meeting_counts.clear()
+        return meeting
+
+    async def createMeeting(
+        self,
+        create_by: int,
+        topic: str,
+        ai_type: AiType,
+        sio: SioServer,
+        attendee_manager: AttendeeManager,
+        hot_words: Optional[List[str]],
+        meeting_language: MeetingLanguageType,
+    ) -> Meeting:
+        meeting = await self.addMeeting(
+            create_by, topic, ai_type, hot_words, meeting_language
+        )
         assert meeting.meeting_id
+        self.live_meetings[str(meeting.meeting_id)] = LiveMeeting(meeting)
+        attendee_manager.start_speaker_map(meeting.meeting_id)
+        await self.search_index.set_topic(meeting.meeting_id, meeting.topic)
         # 创建会议根目录路径
         root_path = self.getMeetingRootPath(str(meeting.meeting_id))
         root_path.mkdir(parents=True, exist_ok=True)
@@ -146,7 +212,7 @@ class MeetingManager:
         )
         return meeting
 
-    def createMeetingResume(
+    async def createMeetingResume(
         self,
         meeting_resume_hash_id: str,
         create_by: int,
@@ -157,7 +223,7 @@ class MeetingManager:
         meeting_language: MeetingLanguageType,
     ) -> Meeting:
         # get meeting from db by hash id
-        meeting = self.getMeetingByHashId(meeting_resume_hash_id)
+        meeting = await self.getMeetingByHashId(meeting_resume_hash_id)
         assert meeting
         assert meeting.meeting_id
 
@@ -170,21 +236,13 @@ class MeetingManager:
         )
 
         # create new agent
-        with Session(self.db_engine) as session:
-            hash_id = generate_unique_hash(session)
-            meeting = Meeting(
-                create_by=create_by,
-                master_id=create_by,
-                topic=old_topic,
-                hot_words=hot_words,
-                hash_id=hash_id,
-                ai_type=ai_type,
-                meeting_language=meeting_language,
-            )
-            session.add(meeting)
-            session.commit()
-            session.refresh(meeting)
+        meeting = await self.addMeeting(
+            create_by, old_topic, ai_type, hot_words, meeting_language
+        )
         assert meeting.meeting_id
+        self.live_meetings[str(meeting.meeting_id)] = LiveMeeting(meeting)
+        attendee_manager.start_speaker_map(meeting.meeting_id)
+        await self.search_index.set_topic(meeting.meeting_id, meeting.topic)
         # 创建会议根目录路径
         root_path = self.getMeetingRootPath(str(meeting.meeting_id))
         root_path.mkdir(parents=True, exist_ok=True)
@@ -223,13 +281,21 @@ class MeetingManager:
     def getMeetingRootPath(self, meeting_id: str):
         return settings.meeting_data_root / meeting_id
 
+    @run_in_db
     def getMeetingByHashId(self, hash_id: str):
         with Session(self.db_engine) as session:
             statement = select(Meeting).where(Meeting.hash_id == hash_id)
             meeting = session.exec(statement).one_or_none()
             return meeting
 
-    def updateHotWords(self, meeting_id: str, hot_words: List[str]) -> None:
+    async def updateHotWords(self, meeting_id: str, hot_words: List[str]) -> None:
+        await self.saveHotWords(meeting_id, hot_words)
+        live_meeting = self.live_meetings.get(meeting_id)
+        if live_meeting:
+            live_meeting.meeting.hot_words = hot_words
+
+    @run_in_db
+    def saveHotWords(self, meeting_id: str, hot_words: List[str]) -> None:
         with Session(self.db_engine) as session:
             statement = select(Meeting).where(Meeting.meeting_id == meeting_id)
             meeting = session.exec(statement).one_or_none()
@@ -237,13 +303,21 @@ class MeetingManager:
                 meeting.hot_words = hot_words
                 session.commit()
 
+    @run_in_db
     def getMeetingById(self, meeting_id: str):
         with Session(self.db_engine) as session:
             statement = select(Meeting).where(Meeting.meeting_id == meeting_id)
             meeting = session.exec(statement).one_or_none()
             return meeting
 
-    def updateMasterId(self, meeting_id: str, master_id: int) -> None:
+    async def updateMasterId(self, meeting_id: str, master_id: int) -> None:
+        await self.saveMasterId(meeting_id, master_id)
+        live_meeting = self.live_meetings.get(meeting_id)
+        if live_meeting:
+            live_meeting.meeting.master_id = master_id
+
+    @run_in_db
+    def saveMasterId(self, meeting_id: str, master_id: int) -> None:
         with Session(self.db_engine) as session:
             statement = select(Meeting).where(Meeting.meeting_id == meeting_id)
             meeting = session.exec(statement).one_or_none()
@@ -251,7 +325,15 @@ class MeetingManager:
                 meeting.master_id = master_id
                 session.commit()
 
-    def updateTopic(self, meeting_id: str, topic: str) -> None:
+    async def updateTopic(self, meeting_id: str, topic: str) -> None:
+        await self.saveTopic(meeting_id, topic)
+        await self.search_index.set_topic(meeting_id, topic)
+        live_meeting = self.live_meetings.get(meeting_id)
+        if live_meeting:
+            live_meeting.meeting.topic = topic
+
+    @run_in_db
+    def saveTopic(self, meeting_id: str, topic: str) -> None:
         with Session(self.db_engine) as session:
             statement = select(Meeting).where(Meeting.meeting_id == meeting_id)
             meeting = session.exec(statement).one_or_none()
@@ -263,38 +345,53 @@ class MeetingManager:
         self, meeting_id: str, sio: SioServer, attendee_manager: AttendeeManager
     ):
         if settings.save_pcm:
+            meeting_recorder = self.meeting_recorders.get(meeting_id)
             pcm_dir = Path(settings.meeting_data_root) / meeting_id / "pcm"
             wav_path = (
                 Path(settings.meeting_data_root) / meeting_id / f"{meeting_id}.wav"
             ).resolve()
-            if pcm_dir.exists():
+            if meeting_recorder:
+                # 写出缓冲中的音频，会议中已混音的部分不需要重新处理
+                await meeting_recorder.pcm_store.close()
+                await meeting_recorder.finish_mix()
+                print(f"音频合并成功: {wav_path}")
+            elif pcm_dir.exists():
                 await asyncio.to_thread(combine_pcm_to_wav, pcm_dir, wav_path)
                 print(f"音频合并成功: {wav_path}")
             else:
                 print("音频合并失败: pcm文件夹不存在")
 
-        with Session(self.db_engine) as session:
-            statement = select(Meeting).where(Meeting.meeting_id == meeting_id)
-            meeting = session.exec(statement).one_or_none()
-            if meeting:
-                meeting.status = "finished"
-                room = meeting.hash_id
-                session.commit()
-            else:
-                return Code.FAILED
-        attendees = attendee_manager.get_active_attendees(
+        # 先通知会议循环退出，再写入数据库
+        live_meeting = self.live_meetings.pop(meeting_id, None)
+        if live_meeting:
+            live_meeting.ended.set()
+        room = await self.finishMeeting(meeting_id)
+        if room is None:
+            return Code.FAILED
+        attendees = await attendee_manager.get_active_attendees(
             meeting_id
         )  # 获取所有在会议中的参会者
         # 所有参会者离开会议
         for attendee in attendees:
-            attendee_manager.leaveMeeting(meeting_id, attendee.user_id)
+            await attendee_manager.leaveMeeting(meeting_id, attendee.user_id)
 
+        meeting_agent = self.meeting_agents.get(meeting_id)
+        if isinstance(meeting_agent, MeetingAgentSummary):
+            # 合并剩余的 summary，会议中的客户端收到最终的分层摘要
+            await meeting_agent.finish(sio, room)
         # 通知所有还在会议中的参会者
         await sio.sendMeetingEnd(room)
         # 关闭会议房间
         await sio.close_room(room)
+        attendee_manager.end_speaker_map(meeting_id)
         # 释放 meeting_agent
         meeting_agent = self.meeting_agents.pop(meeting_id, None)
+        if isinstance(meeting_agent, MeetingAgentGamma):
+            # 最终的 issue map 写入检索索引
+            await self.search_index.set_nodes(
+                meeting_id,
+                meeting_agent.parsed_issues_new.issue_map_list_without_delete,
+            )
         if meeting_agent:
             meeting_agent.close()
             del meeting_agent
@@ -305,14 +402,101 @@ class MeetingManager:
 
         return Code.SUCCESS
 
-    async def getTotalAsrResult(self, meeting_id: str):
+    @run_in_db
+    def finishMeeting(self, meeting_id: str) -> Optional[str]:
+        """把会议标记为结束，返回会议房间，会议不存在时返回 None"""
+        with Session(self.db_engine) as session:
+            statement = select(Meeting).where(Meeting.meeting_id == meeting_id)
+            meeting = session.exec(statement).one_or_none()
+            if meeting:
+                meeting.status = "finished"
+                room = meeting.hash_id
+                session.commit()
+                return room
+            return None
+
+    @run_in_db
+    def updateAnalysisStatus(
+        self, meeting_id: str, analysis_status: AnalysisStatusType
+    ) -> None:
+        with Session(self.db_engine) as session:
+            statement = select(Meeting).where(Meeting.meeting_id == meeting_id)
+            meeting = session.exec(statement).one_or_none()
+            if meeting:
+                meeting.analysis_status = analysis_status
+                session.commit()
+
+    def generateMinutes(self, meeting: Meeting, speaker: Dict[str, str]) -> Code:
+        """在后台生成会议纪要，进度记录在 Meeting.analysis_status"""
+        meeting_id = str(meeting.meeting_id)
+        if meeting_id in self.minutes_tasks:
+            return Code.ANALYSIS_GENERATING
+        # total_asr.json 在会议循环结束后才写入
+        root_path = self.getMeetingRootPath(meeting_id)
+        if not (root_path / "total_asr.json").exists():
+            return Code.FAILED
+        meeting_agent = MeetingAgentMinutes(
+            root_path, meeting.meeting_language, meeting_id
+        )
+        self.minutes_agents[meeting_id] = meeting_agent
+        self.minutes_tasks[meeting_id] = asyncio.create_task(
+            self.runMinutes(meeting_id, meeting_agent, speaker)
+        )
+        return Code.SUCCESS
+
+    async def runMinutes(
+        self,
+        meeting_id: str,
+        meeting_agent: MeetingAgentMinutes,
+        speaker: Dict[str, str],
+    ):
+        analysis_status: AnalysisStatusType = "Failed"
+        try:
+            # 在任务中写入，保证与结束时的写入顺序一致
+            await self.updateAnalysisStatus(meeting_id, "In Progress")
+            await meeting_agent.generate_minutes(speaker)
+            analysis_status = "Completed"
+        except Exception as e:
+            meeting_agent.logger.warning(
+                f"[generate_minutes_error]: {str(e)}", exc_info=True
+            )
+        finally:
+            await self.updateAnalysisStatus(meeting_id, analysis_status)
+            self.minutes_agents.pop(meeting_id, None)
+            self.minutes_tasks.pop(meeting_id, None)
+            meeting_agent.close()
+
+    def getMinutesProgress(self, meeting_id: str) -> Optional[float]:
+        meeting_agent = self.minutes_agents.get(meeting_id)
+        return meeting_agent.progress if meeting_agent else None
+
+    def getMinutes(self, meeting_id: str) -> Optional[MeetingMinutes]:
+        minutes_path = self.getMeetingRootPath(meeting_id) / "minutes.json"
+        if not minutes_path.exists():
+            return None
+        return MeetingMinutes.model_validate_json(
+            minutes_path.read_text(encoding="utf-8")
+        )
+
+    def getTranscript(self, meeting_id: str) -> Optional[TranscriptSnapshot]:
+        """进行中的会议读取内存中的 transcript，已结束的会议读取 total_asr.json"""
         meeting_recorder = self.meeting_recorders.get(meeting_id)
         if meeting_recorder:
-            return await meeting_recorder.get_total_asr()
+            return meeting_recorder.get_transcript()
+        total_asr_path = self.getMeetingRootPath(meeting_id) / "total_asr.json"
+        if not total_asr_path.exists():
+            return None
+        total_asr = TypeAdapter(List[AsrSentence]).validate_json(
+            total_asr_path.read_bytes()
+        )
+        return TranscriptSnapshot(total_asr, len(total_asr))
+
+    def getLiveMeeting(self, meeting_id: str) -> Optional[LiveMeeting]:
+        return self.live_meetings.get(meeting_id)
 
-    def isRunning(self, meeting_id: str):
-        meeting = self.getMeetingById(meeting_id)
-        return meeting and meeting.status == "processing"
+    def isRunning(self, meeting_id: str) -> bool:
+        live_meeting = self.live_meetings.get(meeting_id)
+        return live_meeting is not None and not live_meeting.ended.is_set()
 
     def init_logger(self, meeting_id):
         logger = logging.getLogger(f"mid-{meeting_id}-asr")
@@ -330,6 +514,31 @@ class MeetingManager:
             handler.close()
             logger.removeHandler(handler)
 
+    async def cycle_send_partial(
+        self,
+        meeting_id: str,
+        sio: SioServer,
+        room: str,
+        attendee_manager: AttendeeManager,
+    ):
+        """节流发送中间识别结果，间隔内的多次更新合并为一次"""
+        meeting_recorder = self.meeting_recorders[meeting_id]
+        speaker_version = None
+        while True:
+            await meeting_recorder.partial_event.wait()
+            meeting_recorder.partial_event.clear()
+            speaker_map = await attendee_manager.get_versioned_speaker_map(meeting_id)
+            data = SendPartialData(
+                speaker=speaker_map.speaker
+                if speaker_map.version != speaker_version
+                else {},
+                partials=meeting_recorder.get_partials(),
+                speaker_version=speaker_map.version,
+            )
+            speaker_version = speaker_map.version
+            await sio.sendPartial(room, data)
+            await asyncio.sleep(PARTIAL_INTERVAL)
+
     async def cycle_request_data(
         self,
         meeting_id: str,
@@ -341,20 +550,18 @@ class MeetingManager:
         # 获取会议录音器和会议agent
         meeting_recorder = self.meeting_recorders[meeting_id]
         meeting_agent = self.meeting_agents[meeting_id]
-        meeting = self.getMeetingById(meeting_id)
-        assert meeting is not None
+        live_meeting = self.live_meetings[meeting_id]
         logger_mid.info("[loop.enter] cycle_request_data")
+        partial_task = asyncio.create_task(
+            self.cycle_send_partial(meeting_id, sio, room, attendee_manager)
+        )
+        speaker_version = None  # 上次发送的说话人表版本
+        indexed = 0  # 已写入检索索引的句数
+        indexed_at = time.monotonic()  # 上次写入检索索引的时间
+        nodes_version = None  # 已写入检索索引的 issue map 版本
         # DONE 检查所有的循环都会在会议结束的时候停止
-        while self.isRunning(meeting_id):
-            try:
-                # 等待通知
-                await asyncio.wait_for(
-                    meeting_recorder.trigger_event.wait(), timeout=1.0
-                )
-            except asyncio.TimeoutError:
-                # 没有新数据，继续轮询
-                continue
-
+        # 等待新数据或会议结束
+        while await live_meeting.wait(meeting_recorder.trigger_event):
             # 清除事件，进行后续处理
             meeting_recorder.trigger_event.clear()
 
@@ -362,28 +569,65 @@ class MeetingManager:
             result = await meeting_recorder.get_current()
             # 输出内容与对应的开始时间
             # logger_mid.info(f"[asr] {result=}")
-            speaker = attendee_manager.get_speaker_map(meeting_id)
-            data = SendAsrData(speaker=speaker, sentences=result)
+            # 说话人表没有变化时不重复发送
+            speaker_map = await attendee_manager.get_versioned_speaker_map(meeting_id)
+            data = SendAsrData(
+                speaker=speaker_map.speaker
+                if speaker_map.version != speaker_version
+                else {},
+                sentences=result,
+                speaker_version=speaker_map.version,
+            )
+            speaker_version = speaker_map.version
             await sio.sendCurrent(room, data)  # 向所有room内客户端广播
-            await meeting_recorder.step()  # 将current_asr加入total_asr
+            await meeting_recorder.step(result)  # 将已发送的current_asr加入transcript
             await meeting_agent.proc_asr_results(data.sentences, sio, room)
+            if (
+                len(meeting_recorder.transcript) - indexed >= INDEX_BATCH_SENTENCES
+                or time.monotonic() - indexed_at >= INDEX_INTERVAL
+            ):
+                indexed = await self.index_transcript(
+                    meeting_id, meeting_recorder, indexed
+                )
+                indexed_at = time.monotonic()
+            if (
+                isinstance(meeting_agent, MeetingAgentGamma)
+                and meeting_agent.issue_map_cnt != nodes_version
+            ):
+                nodes_version = meeting_agent.issue_map_cnt
+                await self.search_index.set_nodes(
+                    meeting_id,
+                    meeting_agent.parsed_issues_new.issue_map_list_without_delete,
+                )
         logger_mid.info("[loop.exit] cycle_request_data")
+        partial_task.cancel()
         # 关闭 funasr clients（会等待剩余asr结果）
         await meeting_recorder.close_funasr_clients()
-        await meeting_recorder.step()  # 将current_asr加入total_asr
+        await meeting_recorder.step()  # 将剩余的current_asr加入transcript
 
-        # 记录所有的asr结果到文件
+        # 记录所有的asr结果到文件，按时间顺序保存
+        total_asr = meeting_recorder.transcript.ordered()
         total_asr_path = self.getMeetingRootPath(meeting_id) / "total_asr.json"
         total_asr_path.write_bytes(
-            TypeAdapter(List[AsrSentence]).dump_json(
-                meeting_recorder.total_asr, indent=2
-            )
+            TypeAdapter(List[AsrSentence]).dump_json(total_asr, indent=2)
         )
+        # 会议中按提交顺序分批索引，结束后全部改为 total_asr.json 中的下标
+        await self.search_index.add_sentences(meeting_id, 0, total_asr)
         logger_mid.info(f"[asr_path] {total_asr_path=}")
 
         self.close_logger(logger_mid)
 
-    async def get_all_meetings(
+    async def index_transcript(
+        self, meeting_id: str, meeting_recorder: MeetingRecorder, indexed: int
+    ) -> int:
+        """把 transcript 中第 indexed 句之后的句子写入检索索引，返回已写入的句数"""
+        sentences = meeting_recorder.transcript.read(indexed)
+        if sentences:
+            await self.search_index.add_sentences(meeting_id, indexed, sentences)
+        return indexed + len(sentences)
+
+    @run_in_db
+    def get_all_meetings(
         self,
         limit: int,
         offset: int,
@@ -391,6 +635,8 @@ class MeetingManager:
         title: Optional[str] = None,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
+        before_id: Optional[int] = None,
+        with_total: bool = True,
     ):
         with Session(self.db_engine) as session:  # 使用同步上下文管理
             stmt = select(Meeting)
@@ -398,47 +644,84 @@ class MeetingManager:
             if hash_id:
                 stmt = stmt.where(Meeting.hash_id == hash_id)
             if title:
-                stmt = stmt.where(Meeting.topic.contains(title))  # type: ignore
+                # 主题的全文索引可用时按索引匹配，否则为 LIKE 全表扫描
+                topic_filter = self.search_index.topic_filter(title)
+                if topic_filter is not None:
+                    stmt = stmt.where(
+                        col(Meeting.meeting_id).in_(
+                            topic_filter.columns(column("meeting_id", Integer))
+                        )
+                    )
+                else:
+                    stmt = stmt.where(Meeting.topic.contains(title))  # type: ignore
             if start_time:
                 stmt = stmt.where(Meeting.create_time >= start_time)
             if end_time:
                 stmt = stmt.where(Meeting.create_time <= end_time)
 
-            # 获取总数（过滤后）
-            total = session.exec(
-                select(func.count()).select_from(stmt.subquery())
-            ).one()
-
-            # 按照 meeting_id 降序排列；添加排序、分页
+            # 获取总数（过滤后），短时间内使用缓存
+            total = None
+            if with_total:
+                now = time.monotonic()
+                # 先清掉过期的总数，缓存只保留 TTL 内查询过的过滤条件
+                self.meeting_counts = {
+                    key: cached
+                    for key, cached in self.meeting_counts.items()
+                    if cached[0] > now
+                }
+                key = (hash_id, title, start_time, end_time)
+                cached = self.meeting_counts.get(key)
+                if cached:
+                    total = cached[1]
+                else:
+                    total = session.exec(
+                        select(func.count()).select_from(stmt.subquery())
+                    ).one()
+                    self.meeting_counts[key] = (now + MEETING_COUNT_TTL, total)
+
+            # 游标分页：从上一页最后一个会议之后开始，沿主键定位，不随页数变慢
+            if before_id is not None:
+                stmt = stmt.where(Meeting.meeting_id < before_id)  # type: ignore
+            # 按照 meeting_id 降序排列；添加排序、分页。多取一条判断是否还有下一页
             result_meetings = session.exec(
                 stmt.order_by(Meeting.meeting_id.desc())  # type: ignore
                 .offset(offset)
-                .limit(limit)
+                .limit(limit + 1)
             ).all()
-            return result_meetings, total
+            next_before_id = None
+            if len(result_meetings) > limit:
+                result_meetings = result_meetings[:limit]
+                next_before_id = result_meetings[-1].meeting_id
+            return result_meetings, total, next_before_id
 
     async def get_ongoing_meetings(
         self,
         limit: int,
     ):
-        with Session(self.db_engine) as session:  # 使用同步上下文管理
-            stmt = select(Meeting).where(Meeting.status == "processing")
-
-            # 获取总数（过滤后）
-            total = session.exec(
-                select(func.count()).select_from(stmt.subquery())
-            ).one()
-
-            # 按照 meeting_id 降序排列；添加排序、分页
-            result_meetings = session.exec(
-                stmt.order_by(Meeting.meeting_id.desc()).limit(limit)  # type: ignore
-            ).all()
-            return result_meetings, total
+        # 按照 meeting_id 降序排列
+        live_meetings = sorted(
+            self.live_meetings.values(),
+            key=lambda live_meeting: live_meeting.meeting.meeting_id or 0,
+            reverse=True,
+        )
+        result_meetings = [live_meeting.meeting for live_meeting in live_meetings]
+        return result_meetings[:limit], len(result_meetings)
 
-    async def send_audio_chunk(self, meeting_id: str, speaker_id: str, chunk: bytes):
+    async def send_audio_chunk(
+        self, meeting_id: str, speaker_id: str, chunk: bytes, receive_time: datetime
+    ):
         meeting_recorder = self.meeting_recorders.get(meeting_id)
         if meeting_recorder:
-            await meeting_recorder.send_audio_chunk(speaker_id, chunk)
+            await meeting_recorder.ingest_audio(speaker_id, chunk, receive_time)
+
+    def getIngestMetrics(self, meeting_id: Optional[str] = None):
+        """进行中会议的音频队列状态，不指定会议时返回所有会议"""
+        return [
+            metrics
+            for mid, meeting_recorder in self.meeting_recorders.items()
+            if meeting_id is None or mid == meeting_id
+            for metrics in meeting_recorder.ingest_metrics()
+        ]
 
     async def toggle_mic(
         self, meeting_id: str, speaker_id: str, enable: bool, receive_time: datetime
@@ -454,12 +737,3 @@ class MeetingManager:
         meeting_recorder = self.meeting_recorders.get(meeting_id)
         if meeting_recorder:
             await meeting_recorder.add_text_message(speaker_id, content, timestamp)
-
-    async def write_pcm(
-        self, meeting_id: str, data: bytes, user_id: str, receive_time: datetime
-    ):
-        meeting_recorder = self.meeting_recorders.get(meeting_id)
-        if meeting_recorder:
-            await asyncio.to_thread(
-                meeting_recorder.write_pcm, data, user_id, receive_time
-            )
@@ -1,19 +1,32 @@
-from collections import deque
+from bisect import bisect_right
 from datetime import datetime
 from pathlib import Path
-from typing import Deque, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 import asyncio
-import copy
+import itertools
 
-from funasr_client import AsyncFunASRClient, FunASRMessageDecoded, async_funasr_client
+from funasr_client import AsyncFunASRClient, FunASRMessageDecoded
 
-from app.core.asr.models import AsrSentence
+from app.core.asr.funasr_pool import get_funasr_pool
+from app.core.asr.ingest import AudioBatcher, AudioIngestQueue
+from app.core.asr.models import AsrSentence, PartialSentence
+from app.core.asr.pcm_store import PcmStore
+from app.core.asr.transcript import TranscriptSnapshot, TranscriptStore
+from app.core.asr.vad import BYTES_PER_MS, OffsetMap, VoiceActivityGate
+from app.core.asr.utils import IncrementalMixer
+from app.core.metrics import IngestQueueMetrics
 from app.config import settings
 from app.types import MeetingLanguageType
 
 
+# 后台混音的间隔
+MIX_INTERVAL_SECONDS = 10
+# 只混音早于当前时间该值的音频，留出网络延迟，避免迟到的音频被跳过
+MIX_LAG_MS = 5000
+
+
 # NOTE participant不包括host
-# NOTE total_asr 不包括 current_asr
+# NOTE transcript 不包括 current_asr
 # NOTE total_pcm 不包括 current_pcm
 class MeetingRecorder:
     def __init__(
@@ -28,28 +41,72 @@ class MeetingRecorder:
         self.create_time = create_time
         self.trigger_event = asyncio.Event()
         self.pcm_root_path = meeting_root_path / "pcm"
+        self.pcm_store = PcmStore(self.pcm_root_path)
+        # 会议进行中逐窗口混音到 {meeting_id}.wav，结束时只需混音剩余部分
+        self.mixer = IncrementalMixer(
+            self.pcm_root_path, meeting_root_path / f"{meeting_id}.wav"
+        )
+        self.mix_lock = asyncio.Lock()
+        self.mix_task: Optional[asyncio.Task] = None
 
-        self.current_asr: List[AsrSentence] = []  # 待发送给前端的asr
-        self.current_asr_lock = asyncio.Lock()
+        # NOTE 以下对 current_asr 和 transcript 的操作中间都没有 await，不需要加锁
+        self.current_asr: List[AsrSentence] = []  # 待发送给前端的asr，按起始时间排序
+        # current_asr 中每个句子的起始时间，用于二分插入
+        self.current_asr_keys: List[int] = []
 
-        self.total_asr: List[AsrSentence] = []
-        self.total_asr_lock = asyncio.Lock()
+        # 每个说话人尚未定稿的中间结果，更新后节流发送给前端
+        self.partials: Dict[str, PartialSentence] = {}
+        # 中间结果所属的 funasr 会话，旧会话迟到的结果不影响新会话的中间结果
+        self.partial_sessions: Dict[str, int] = {}
+        self.partial_event = asyncio.Event()
 
+        # 已发送给前端的asr，只追加
+        self.transcript = TranscriptStore()
+
+        # 开麦期间从池中租用的 funasr 会话
+        self.funasr_pool = get_funasr_pool(settings.funasr_uri, settings.funasr_mode)
+        self.funasr_pool.start()
         self.funasr_client_dict: Dict[str, AsyncFunASRClient] = {}
+        # 开麦后还没有成功发送过音频的会话的 (callback, start_offset)，
+        # 池中的会话可能在空闲时已被对端断开，第一次发送失败时用它换一个新连接
+        self.funasr_connect_args: Dict[
+            str, Tuple[Callable[[FunASRMessageDecoded], Any], int]
+        ] = {}
+        # 每个说话人最近一次开麦的会话编号
+        self.funasr_sessions: Dict[str, int] = {}
+        self.session_cnt = itertools.count()
+        # 闭麦后在后台等待最终结果的会话
+        self.release_tasks: Set[asyncio.Task] = set()
 
-        # 如果 funasr_client 还没建立好连接，但数据已经来了，就先buffer住
-        self.buffer_dict: Dict[str, Deque[bytes]] = {}
+        # 每个说话人的有界音频队列，由发送任务发给 funasr_client
+        # 如果 funasr_client 还没建立好连接，但数据已经来了，就先留在队列中
+        self.ingest_queues: Dict[str, AudioIngestQueue] = {}
+        # 发送前把小的音频帧合并为较大的批次
+        self.batchers: Dict[str, AudioBatcher] = {}
+        self.sender_tasks: Dict[str, asyncio.Task] = {}
+        # 每个说话人的 VAD 门限，静音不发送给 funasr 也不保存
+        self.vad_gates: Dict[str, VoiceActivityGate] = {}
+        # 每个说话人最近一次开麦时队列已入队的字节数，即本次发送流在队列中的起点
+        self.queue_bases: Dict[str, int] = {}
+        # 说话人当前是否有可用的 funasr_client
+        self.client_ready: Dict[str, asyncio.Event] = {}
         self.lock_dict: Dict[str, asyncio.Lock] = {}
 
+    def get_transcript(self) -> TranscriptSnapshot:
+        return self.transcript.snapshot()
+
     async def get_total_asr(self) -> List[AsrSentence]:
-        async with self.total_asr_lock:
-            total_asr = copy.deepcopy(self.total_asr)
-        return total_asr
+        # AsrSentence 不可修改，只需复制引用
+        return self.transcript.ordered()
 
     async def get_current(self) -> List[AsrSentence]:
-        async with self.current_asr_lock:
-            current_asr = copy.deepcopy(self.current_asr)
-        return current_asr
+        return list(self.current_asr)
+
+    def insert_current(self, sentence: AsrSentence):
+        """按起始时间二分插入 current_asr，起始时间相同时排在后面，与稳定排序一致"""
+        index = bisect_right(self.current_asr_keys, sentence.time_range[0])
+        self.current_asr_keys.insert(index, sentence.time_range[0])
+        self.current_asr.insert(index, sentence)
 
     async def add_text_message(self, speaker_id: str, content: str, timestamp: int):
         """直接添加文本消息，不经过ASR处理"""
@@ -64,109 +121,328 @@ class MeetingRecorder:
             speaker_id=speaker_id,
         )
         
-        async with self.current_asr_lock:
-            self.current_asr.append(asr_sentence)
-            self.current_asr.sort(key=lambda x: x.time_range[0])
+        self.insert_current(asr_sentence)
         
         # 触发事件通知更新
         self.trigger_event.set()
 
-    async def step(self):
-        # 将current_asr加入total_asr
-        async with self.total_asr_lock:
-            async with self.current_asr_lock:
-                self.total_asr.extend(self.current_asr)
-                self.current_asr.clear()
-                # 按照起始时间排序
-                self.total_asr.sort(key=lambda x: x.time_range[0])
-
-    async def send_buffer(self, speaker_id: str):
-        """发送buffered的数据"""
-        client = self.funasr_client_dict[speaker_id]
-        buffer_queue = self.buffer_dict[speaker_id]
-        try:
-            while buffer_queue:
-                buffered_chunk = buffer_queue[0]
-                await client.send(buffered_chunk)
-                buffer_queue.popleft()
-            return True
-        except Exception:
-            # 只要有异常就不发了
-            print(
-                f"send_buffer failed for speaker {speaker_id}, buffer size: {len(buffer_queue)}"
+    async def step(self, sent: Optional[List[AsrSentence]] = None):
+        """
+        将已发送给前端的 current_asr 追加到 transcript，sent 为 None 时提交全部。
+        只提交 sent 中的句子，发送期间新到的句子留到下一次
+        """
+        if sent is None:
+            sent = self.current_asr
+            self.current_asr = []
+            self.current_asr_keys = []
+        else:
+            sent_ids = {id(sentence) for sentence in sent}
+            self.current_asr = [
+                sentence
+                for sentence in self.current_asr
+                if id(sentence) not in sent_ids
+            ]
+            self.current_asr_keys = [
+                sentence.time_range[0] for sentence in self.current_asr
+            ]
+        self.transcript.extend(sent)
+
+    def get_ingest_queue(self, speaker_id: str) -> AudioIngestQueue:
+        """获取说话人的音频队列，不存在时创建队列和发送任务"""
+        queue = self.ingest_queues.get(speaker_id)
+        if queue is None:
+            queue = AudioIngestQueue(
+                settings.ingest_queue_policy,
+                settings.ingest_queue_size,
+                settings.ingest_queue_max_bytes,
+                on_drop=self.make_drop_callback(speaker_id),
+            )
+            self.ingest_queues[speaker_id] = queue
+            self.batchers[speaker_id] = AudioBatcher()
+            self.lock_dict.setdefault(speaker_id, asyncio.Lock())
+            self.client_ready[speaker_id] = asyncio.Event()
+            self.sender_tasks[speaker_id] = asyncio.create_task(
+                self.loop_send(speaker_id)
             )
+        return queue
+
+    async def reconnect_funasr_client(self, speaker_id: str) -> bool:
+        """租用的会话第一次发送就失败时，丢弃它并建立一个新连接，只尝试一次"""
+        args = self.funasr_connect_args.pop(speaker_id, None)
+        if args is None:
+            return False
+        self.funasr_pool.discard(self.funasr_client_dict[speaker_id])
+        try:
+            client = await self.funasr_pool.connect(*args)
+        except Exception as e:
+            print(f"reconnect funasr failed for speaker {speaker_id}: {e}")
             return False
+        self.funasr_client_dict[speaker_id] = client
+        return True
+
+    async def send_batch(self, speaker_id: str):
+        queue = self.ingest_queues[speaker_id]
+        batcher = self.batchers[speaker_id]
+        while True:
+            try:
+                client = self.funasr_client_dict[speaker_id]
+                await client.send(batcher.batch())  # type: ignore
+                break
+            except Exception:
+                if await self.reconnect_funasr_client(speaker_id):
+                    continue
+                # 只要有异常就不发了，批次留给下一个会话
+                print(
+                    f"send_buffer failed for speaker {speaker_id}, "
+                    f"queue size: {len(queue)}, batch size: {len(batcher)}"
+                )
+                return False
+        self.funasr_connect_args.pop(speaker_id, None)
+        queue.record_sent(len(batcher))
+        batcher.reset()
+        return True
+
+    async def send_buffer(self, speaker_id: str, flush: bool = False):
+        """
+        把队列中的数据合并为批次发送，调用方需持有说话人的锁。
+        不满的批次留到下次，除非 flush 或已经等待超过 BATCH_MAX_DELAY_MS
+        """
+        if speaker_id not in self.funasr_client_dict:
+            return False
+        queue = self.ingest_queues[speaker_id]
+        batcher = self.batchers[speaker_id]
+        while queue or batcher.is_full():
+            if batcher.is_full():
+                if not await self.send_batch(speaker_id):
+                    return False
+                continue
+            chunk = queue.pop()
+            n = batcher.fill(chunk)
+            if n < len(chunk):
+                queue.unget(memoryview(chunk)[n:])
+        if len(batcher) and (flush or batcher.is_due()):
+            return await self.send_batch(speaker_id)
+        return True
+
+    async def loop_send(self, speaker_id: str):
+        queue = self.ingest_queues[speaker_id]
+        batcher = self.batchers[speaker_id]
+        ready = self.client_ready[speaker_id]
+        while True:
+            try:
+                # 有不满的批次时，最多等到它必须发送的时间
+                await asyncio.wait_for(queue.wait(), batcher.remaining())
+            except asyncio.TimeoutError:
+                pass
+            await ready.wait()
+            async with self.lock_dict[speaker_id]:  # 防止与开关麦克风冲突
+                if not await self.send_buffer(speaker_id):
+                    # 会话已断开，等待重新开麦，期间由队列的溢出策略处理
+                    ready.clear()
+
+    def make_drop_callback(self, speaker_id: str):
+        def on_drop(nbytes: int):
+            # 丢弃的总是队首，它之后入队的音频都还在队列中
+            queue = self.ingest_queues[speaker_id]
+            pos = queue.enqueued_bytes - queue.nbytes - nbytes
+            self.get_vad_gate(speaker_id).offset_map.drop(
+                pos - self.queue_bases.get(speaker_id, 0), nbytes
+            )
+
+        return on_drop
 
     async def send_audio_chunk(self, speaker_id: str, chunk: bytes):
-        async with self.lock_dict[speaker_id]:  # 防止多协程冲突
-            self.buffer_dict[speaker_id].append(chunk)
-            # 把buffered发出去
-            await self.send_buffer(speaker_id)
+        """只负责入队，除 block 策略队列已满外立即返回"""
+        await self.get_ingest_queue(speaker_id).put(chunk)
+
+    def get_vad_gate(self, speaker_id: str) -> VoiceActivityGate:
+        gate = self.vad_gates.get(speaker_id)
+        if gate is None:
+            gate = VoiceActivityGate(settings.vad_gate)
+            self.vad_gates[speaker_id] = gate
+        return gate
+
+    async def ingest_audio(self, speaker_id: str, chunk: bytes, receive_time: datetime):
+        """经过 VAD 门限后送入 ASR 队列，并保存 pcm"""
+        gate = self.get_vad_gate(speaker_id)
+        segments = gate.process(chunk)
+        # 计算服务端接收时间相对于会议开始时间的偏移量
+        receive_offset = int((receive_time - self.create_time).total_seconds() * 1000)
+        # 本块起点在接收流中的位置，用于计算每段音频的偏移量
+        chunk_pos_ms = gate.stream_ms() - len(chunk) // BYTES_PER_MS
+        for segment in segments:
+            await self.send_audio_chunk(speaker_id, segment.data)
+            if settings.save_pcm:
+                await self.pcm_store.write(
+                    speaker_id,
+                    segment.data,
+                    receive_offset + segment.pos_ms - chunk_pos_ms,
+                )
+
+    def ingest_metrics(self) -> List[IngestQueueMetrics]:
+        return [
+            queue.to_model(self.meeting_id, speaker_id)
+            for speaker_id, queue in self.ingest_queues.items()
+        ]
+
+    def release_funasr_client(self, speaker_id: str):
+        self.client_ready[speaker_id].clear()
+        client = self.funasr_client_dict.pop(speaker_id)
+        self.funasr_connect_args.pop(speaker_id, None)
+        session = self.funasr_sessions[speaker_id]
+        task = self.funasr_pool.release(client)
+        self.release_tasks.add(task)
+        task.add_done_callback(self.release_tasks.discard)
+        # 最终结果已到达（或会话没有给出最终结果就结束），清除该会话剩下的中间结果
+        task.add_done_callback(lambda _: self.clear_partial(speaker_id, session))
 
     async def close_funasr_clients(self):
-        for client in self.funasr_client_dict.values():
-            await client.close()
-        self.funasr_client_dict.clear()
+        for speaker_id, task in self.sender_tasks.items():
+            async with self.lock_dict[speaker_id]:
+                # 持有锁时发送任务不在发送中，可以安全地取消
+                task.cancel()
+                # 发出队列中剩余的音频
+                await self.send_buffer(speaker_id, flush=True)
+                if speaker_id in self.funasr_client_dict:
+                    self.release_funasr_client(speaker_id)
+        self.sender_tasks.clear()
+        # 等待所有会话的最终结果
+        await asyncio.gather(*self.release_tasks)
+
+    def normalize_text(self, text: str) -> str:
+        if self.meeting_language == "Chinese":
+            return text
+        return text.replace("，", ",").replace("。", ".")
+
+    def get_partials(self) -> List[PartialSentence]:
+        return list(self.partials.values())
+
+    def update_partial(self, speaker_id: str, session: int, text: str):
+        """2pass-online 的结果是增量的，拼接到当前的中间结果后面"""
+        if session != self.funasr_sessions.get(speaker_id):
+            # 已被新会话取代的会话迟到的中间结果
+            return
+        partial = self.partials.get(speaker_id)
+        if partial is None or self.partial_sessions.get(speaker_id) != session:
+            start_time = int((datetime.now() - self.create_time).total_seconds() * 1000)
+            partial = PartialSentence(
+                speaker_id=speaker_id, content="", start_time=start_time
+            )
+            self.partials[speaker_id] = partial
+            self.partial_sessions[speaker_id] = session
+        partial.content += text
+        self.partial_event.set()
+
+    def clear_partial(self, speaker_id: str, session: int):
+        """清除属于 session 的中间结果，其他会话的中间结果不受影响"""
+        if self.partial_sessions.get(speaker_id) != session:
+            return
+        self.partial_sessions.pop(speaker_id)
+        if self.partials.pop(speaker_id, None) is not None:
+            self.partial_event.set()
+
+    def make_asr_callback(self, speaker_id: str, session: int, offset_map: OffsetMap):
+        async def on_asr_result(msg: FunASRMessageDecoded):
+            # print(f"{speaker_id=} FunASRMessageDecoded: {msg}")
+            # NOTE: funasr runtime服务bug：text为空字符串时mode键不存在
+            if not msg["text"]:
+                return
+            if msg["mode"] == "2pass-online":
+                self.update_partial(
+                    speaker_id, session, self.normalize_text(msg["text"])
+                )
+                return
+            if msg["mode"] != "2pass-offline":
+                return
+            assert "timestamp" in msg
+            # timestamp 相对发送给 funasr 的音频流，其中不包括被 VAD 丢弃的静音
+            timestamp = msg["timestamp"]
+            content = self.normalize_text(msg["text"])
+            # 定稿的句子取代本会话的中间结果，只有定稿的句子会进入 transcript
+            self.clear_partial(speaker_id, session)
+            self.insert_current(
+                AsrSentence(
+                    content=content,
+                    time_range=[
+                        offset_map.real_ms(timestamp[0][0]),
+                        # 结束时间属于前一段连续音频
+                        offset_map.real_ms(timestamp[-1][1] - 1) + 1,
+                    ],
+                    speaker_id=speaker_id,
+                )
+            )
+            self.trigger_event.set()  # 通知更新前端
+
+        return on_asr_result
 
     async def toggle_mic(self, speaker_id: str, enable: bool, receive_time: datetime):
-        self.lock_dict.setdefault(speaker_id, asyncio.Lock())  # 创建lock如果不存在
+        self.get_ingest_queue(speaker_id)  # 创建队列和lock如果不存在
 
         async with self.lock_dict[speaker_id]:
-            self.buffer_dict.setdefault(speaker_id, deque())  # 创建buffer如果不存在
-
-            # 创建 funasr client 如果不存在
-            if speaker_id not in self.funasr_client_dict:
-
-                async def on_asr_result(msg: FunASRMessageDecoded):
-                    # print(f"{speaker_id=} FunASRMessageDecoded: {msg}")
-                    # NOTE: funasr runtime服务bug：text为空字符串时mode键不存在
-                    if not msg["text"] or msg["mode"] != "2pass-offline":
-                        return
-                    assert "real_timestamp" in msg
-                    if self.meeting_language == "Chinese":
-                        content = msg["text"]
-                    else:
-                        content = msg["text"].replace("，", ",").replace("。", ".")
-                    self.current_asr.append(
-                        AsrSentence(
-                            content=content,
-                            time_range=[
-                                msg["real_timestamp"][0][0],
-                                msg["real_timestamp"][-1][1],
-                            ],
-                            speaker_id=speaker_id,
-                        )
-                    )
-                    self.current_asr.sort(key=lambda x: x.time_range[0])
-                    self.trigger_event.set()  # 通知更新前端
-
-                new_client = async_funasr_client(
-                    uri=settings.funasr_uri,
-                    mode="offline",
-                    callback=on_asr_result,
-                )
-                self.funasr_client_dict[speaker_id] = new_client
 
-            # 无论开启关闭，都需要把旧的client关掉、移除
+            # 无论开启关闭，都先把旧的会话结束掉
+            # 旧会话在后台等待最终结果，不阻塞下次开麦
             if speaker_id in self.funasr_client_dict:
-                await self.send_buffer(speaker_id)
-                old_client = self.funasr_client_dict[speaker_id]
-                await old_client.close()
+                await self.send_buffer(speaker_id, flush=True)
+                self.release_funasr_client(speaker_id)
+
+            if not enable:
+                # 关麦后缓冲不会再被填满，立即写出，不拖住混音进度
+                await self.pcm_store.flush_speaker(speaker_id)
 
-            # 开启麦克风
+            # 开启麦克风：从池中租用已连接的会话，不需要等待握手
             if enable:
                 # 计算服务端接收时间相对于会议开始时间的偏移量
                 start_offset = int(
                     (receive_time - self.create_time).total_seconds() * 1000
                 )
-                cur_client = self.funasr_client_dict[speaker_id]
-                # reset variables
-                cur_client.start_time = start_offset
-                await cur_client.connect()
+                offset_map = self.get_vad_gate(speaker_id).start_session(start_offset)
+                queue = self.ingest_queues[speaker_id]
+                self.queue_bases[speaker_id] = queue.enqueued_bytes
+                session = next(self.session_cnt)
+                self.funasr_sessions[speaker_id] = session
+                callback = self.make_asr_callback(speaker_id, session, offset_map)
+                self.funasr_client_dict[speaker_id] = await self.funasr_pool.acquire(
+                    callback, start_offset
+                )
+                self.funasr_connect_args[speaker_id] = (callback, start_offset)
+                self.client_ready[speaker_id].set()
 
-    def write_pcm(self, data: bytes, user_id: str, receive_time: datetime):
-        # 计算服务端接收时间相对于会议开始时间的偏移量
-        start_offset = int((receive_time - self.create_time).total_seconds() * 1000)
-        pcm_path = self.pcm_root_path / f"{user_id}_{start_offset}.pcm"
-        pcm_path.parent.mkdir(parents=True, exist_ok=True)
-        pcm_path.write_bytes(data)
+    def lag_offset_ms(self) -> int:
+        """当前时间相对会议开始的偏移减去 MIX_LAG_MS，在此之前的音频不会再到达"""
+        now_ms = int((datetime.now() - self.create_time).total_seconds() * 1000)
+        return now_ms - MIX_LAG_MS
+
+    def mix_watermark_ms(self) -> int:
+        """在此之前的音频都已写入磁盘，可以混音"""
+        watermark = self.lag_offset_ms()
+        pending = self.pcm_store.pending_offset_ms()
+        if pending is not None:
+            watermark = min(watermark, pending)
+        return watermark
+
+    async def mix_finalized(self):
+        async with self.mix_lock:
+            if self.pcm_store.closed:
+                # 剩余部分由 finish_mix 处理
+                return
+            await asyncio.to_thread(self.mixer.mix_until, self.mix_watermark_ms())
+
+    async def loop_mix(self):
+        while not self.pcm_store.closed:
+            await asyncio.sleep(MIX_INTERVAL_SECONDS)
+            try:
+                # 缓冲只在攒够 FLUSH_BYTES 时写出，先写出停顿的说话人剩下的缓冲
+                await self.pcm_store.flush_before(self.lag_offset_ms())
+                await self.mix_finalized()
+            except Exception as e:
+                print(f"mix pcm failed: {self.meeting_id} {e}")
+
+    def start_mix(self):
+        self.mix_task = asyncio.create_task(self.loop_mix())
+
+    async def finish_mix(self):
+        """pcm_store 关闭后调用，混音剩余的音频。
+        不取消 mix_task，避免中断正在进行的混音线程，它会在下次检查时退出"""
+        async with self.mix_lock:
+            await asyncio.to_thread(self.mixer.finish)
@@ -0,0 +1,406 @@
+from collections import OrderedDict, deque
+from datetime import datetime
+from threading import Lock
+from time import monotonic
+from typing import Deque, Dict, List, Optional, Tuple
+import uuid
+
+from pydantic import BaseModel, Field
+
+
+# 每个阶段保留的延迟样本数，用于计算分位数
+LATENCY_SAMPLES = 500
+# 保留最近的调用记录数
+RECENT_CALLS = 200
+# 计算分位数所需的最少样本数
+MIN_LATENCY_SAMPLES = 5
+# 按会议聚合时保留的会议数，超过后丢弃最久没有调用的会议
+MAX_METRIC_MEETINGS = 100
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """最近邻法计算分位数，samples 为空时返回 None"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class LLMCallRecord(BaseModel):
+    """一次 LLM 调用的遥测数据"""
+
+    call_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    stage: str
+    meeting_id: Optional[str] = None
+    cnt: int = 0
+    endpoint: Optional[str] = None
+    model: Optional[str] = None
+    route_reason: Optional[str] = None
+    """模型路由的原因：default / escalation / slo_fallback"""
+    start_time: datetime = Field(default_factory=datetime.now)
+    queue_wait_ms: float = 0
+    """从阶段被触发到请求真正发出的等待时间"""
+    ttft_ms: Optional[float] = None
+    """首个 token 到达的时间（相对请求发出）"""
+    latency_ms: float = 0
+    """请求发出到结果完整返回的时间"""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    usage_estimated: bool = True
+    """token 数是否为估算值（流式模式下接口不返回 usage）"""
+    retry_count: int = 0
+    discarded: bool = False
+    """结果是否因为用户手动编辑而被 check_manual_edits 丢弃"""
+    invalid_output: bool = False
+    """结构化输出是否未通过校验（回退到了旧的文本解析）"""
+    success: bool = True
+    error: Optional[str] = None
+
+
+class StageMetrics(BaseModel):
+    stage: str
+    meeting_id: Optional[str] = None
+    model: Optional[str] = None
+    calls: int
+    errors: int
+    retries: int
+    discarded: int
+    invalid_outputs: int
+    prompt_tokens: int
+    completion_tokens: int
+    avg_latency_ms: Optional[float]
+    p50_latency_ms: Optional[float]
+    p95_latency_ms: Optional[float]
+    avg_ttft_ms: Optional[float]
+    avg_queue_wait_ms: Optional[float]
+
+
+class MetricsSnapshot(BaseModel):
+    generated_at: datetime
+    stages: List[StageMetrics]
+    stage_models: List[StageMetrics]
+    """按阶段+模型聚合，用于调整模型路由策略；指定会议时只统计该会议的调用"""
+    recent_calls: List[LLMCallRecord]
+
+
+class IngestQueueMetrics(BaseModel):
+    """单个说话人音频队列的状态"""
+
+    meeting_id: str
+    speaker_id: str
+    policy: str
+    depth_chunks: int
+    depth_bytes: int
+    max_depth_chunks: int
+    enqueued_chunks: int
+    sent_messages: int
+    """合并后发给 FunASR 的消息数"""
+    sent_bytes: int
+    dropped_chunks: int
+    dropped_bytes: int
+    coalesced_chunks: int
+    """因队列已满而合并到队尾的块数"""
+    blocked_count: int
+    blocked_ms: float
+    """block 策略下入队等待的总时间"""
+
+
+class IngestMetricsSnapshot(BaseModel):
+    generated_at: datetime
+    queues: List[IngestQueueMetrics]
+
+
+class DBQueryMetrics(BaseModel):
+    """按查询（manager 方法）聚合的数据库耗时"""
+
+    query: str
+    calls: int
+    errors: int
+    avg_wait_ms: Optional[float]
+    """等待空闲数据库线程的平均时间"""
+    max_wait_ms: float
+    avg_exec_ms: Optional[float]
+    p50_exec_ms: Optional[float]
+    p95_exec_ms: Optional[float]
+    max_exec_ms: float
+
+
+class DBMetricsSnapshot(BaseModel):
+    generated_at: datetime
+    pool_size: int
+    in_flight: int
+    """已提交但还没有完成的查询数"""
+    queries: List[DBQueryMetrics]
+
+
+class _DBQueryAggregate:
+    def __init__(self, query: str) -> None:
+        self.query = query
+        self.calls = 0
+        self.errors = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.total_exec_ms = 0.0
+        self.max_exec_ms = 0.0
+        self.exec_samples: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def add(self, wait_ms: float, exec_ms: float, success: bool):
+        self.calls += 1
+        if not success:
+            self.errors += 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        self.total_exec_ms += exec_ms
+        self.max_exec_ms = max(self.max_exec_ms, exec_ms)
+        self.exec_samples.append(exec_ms)
+
+    def to_model(self) -> DBQueryMetrics:
+        samples = list(self.exec_samples)
+        return DBQueryMetrics(
+            query=self.query,
+            calls=self.calls,
+            errors=self.errors,
+            avg_wait_ms=self.total_wait_ms / self.calls if self.calls else None,
+            max_wait_ms=self.max_wait_ms,
+            avg_exec_ms=self.total_exec_ms / self.calls if self.calls else None,
+            p50_exec_ms=percentile(samples, 0.5),
+            p95_exec_ms=percentile(samples, 0.95),
+            max_exec_ms=self.max_exec_ms,
+        )
+
+
+class DBMetricsRegistry:
+    """数据库查询的耗时统计，查询在数据库线程中记录，需要加锁"""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._queries: Dict[str, _DBQueryAggregate] = {}
+        self.in_flight = 0
+
+    def record_query(self, query: str, wait_ms: float, exec_ms: float, success: bool):
+        with self._lock:
+            self._queries.setdefault(query, _DBQueryAggregate(query)).add(
+                wait_ms, exec_ms, success
+            )
+
+    def snapshot(self, pool_size: int) -> DBMetricsSnapshot:
+        with self._lock:
+            queries = [agg.to_model() for agg in self._queries.values()]
+        return DBMetricsSnapshot(
+            generated_at=datetime.now(),
+            pool_size=pool_size,
+            in_flight=self.in_flight,
+            queries=queries,
+        )
+
+
+class _StageAggregate:
+    def __init__(
+        self, stage: str, meeting_id: Optional[str], model: Optional[str] = None
+    ) -> None:
+        self.stage = stage
+        self.meeting_id = meeting_id
+        self.model = model
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.discarded = 0
+        self.invalid_outputs = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_latency_ms = 0.0
+        self.total_queue_wait_ms = 0.0
+        self.total_ttft_ms = 0.0
+        self.ttft_calls = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        # 与 latencies 一一对应的记录时间（monotonic）
+        self.latency_times: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def add(self, record: LLMCallRecord):
+        self.calls += 1
+        self.retries += record.retry_count
+        if not record.success:
+            self.errors += 1
+        if record.discarded:
+            self.discarded += 1
+        if record.invalid_output:
+            self.invalid_outputs += 1
+        self.prompt_tokens += record.prompt_tokens
+        self.completion_tokens += record.completion_tokens
+        self.total_latency_ms += record.latency_ms
+        self.total_queue_wait_ms += record.queue_wait_ms
+        if record.ttft_ms is not None:
+            self.total_ttft_ms += record.ttft_ms
+            self.ttft_calls += 1
+        self.latencies.append(record.latency_ms)
+        self.latency_times.append(monotonic())
+
+    def recent_latencies(
+        self, window: Optional[int] = None, max_age_s: Optional[float] = None
+    ) -> List[float]:
+        """最近 window 次、max_age_s 秒内的延迟样本"""
+        samples = list(self.latencies)
+        if max_age_s is not None:
+            since = monotonic() - max_age_s
+            times = list(self.latency_times)
+            samples = [ms for ms, t in zip(samples, times) if t >= since]
+        if window is not None:
+            samples = samples[-window:]
+        return samples
+
+    def to_model(self) -> StageMetrics:
+        samples = list(self.latencies)
+        return StageMetrics(
+            stage=self.stage,
+            meeting_id=self.meeting_id,
+            model=self.model,
+            calls=self.calls,
+            errors=self.errors,
+            retries=self.retries,
+            discarded=self.discarded,
+            invalid_outputs=self.invalid_outputs,
+            prompt_tokens=self.prompt_tokens,
+            completion_tokens=self.completion_tokens,
+            avg_latency_ms=self.total_latency_ms / self.calls if self.calls else None,
+            p50_latency_ms=percentile(samples, 0.5),
+            p95_latency_ms=percentile(samples, 0.95),
+            avg_ttft_ms=self.total_ttft_ms / self.ttft_calls
+            if self.ttft_calls
+            else None,
+            avg_queue_wait_ms=self.total_queue_wait_ms / self.calls
+            if self.calls
+            else None,
+        )
+
+
+class _MeetingAggregates:
+    """一个会议按阶段、阶段+模型的聚合"""
+
+    def __init__(self, meeting_id: str) -> None:
+        self.meeting_id = meeting_id
+        self.stages: Dict[str, _StageAggregate] = {}
+        self.stage_models: Dict[Tuple[str, Optional[str]], _StageAggregate] = {}
+
+
+class MetricsRegistry:
+    """
+    进程内的指标注册表，按阶段、阶段+模型（全局和会议）聚合。
+    按会议的聚合只保留最近有调用的 MAX_METRIC_MEETINGS 个会议
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._stages: Dict[str, _StageAggregate] = {}
+        self._model_stages: Dict[Tuple[str, Optional[str]], _StageAggregate] = {}
+        self._meetings: "OrderedDict[str, _MeetingAggregates]" = OrderedDict()
+        self._recent: Deque[LLMCallRecord] = deque(maxlen=RECENT_CALLS)
+
+    def _meeting(self, meeting_id: str, create: bool) -> Optional[_MeetingAggregates]:
+        meeting = self._meetings.get(meeting_id)
+        if create:
+            if meeting is None:
+                meeting = self._meetings[meeting_id] = _MeetingAggregates(meeting_id)
+                while len(self._meetings) > MAX_METRIC_MEETINGS:
+                    self._meetings.popitem(last=False)
+            self._meetings.move_to_end(meeting_id)
+        return meeting
+
+    def _aggregates(self, record: LLMCallRecord, create: bool) -> List[_StageAggregate]:
+        """记录计入的所有聚合，create 为 False 时跳过不存在（会议已被淘汰）的聚合"""
+        stage_key = record.stage
+        model_key = (record.stage, record.model)
+        targets: List[Tuple[dict, object, Optional[str], Optional[str]]] = [
+            (self._stages, stage_key, None, None),
+            (self._model_stages, model_key, None, record.model),
+        ]
+        if record.meeting_id is not None:
+            meeting = self._meeting(record.meeting_id, create)
+            if meeting is not None:
+                targets.append((meeting.stages, stage_key, record.meeting_id, None))
+                targets.append(
+                    (meeting.stage_models, model_key, record.meeting_id, record.model)
+                )
+        aggregates = []
+        for target, key, meeting_id, model in targets:
+            if key not in target:
+                if not create:
+                    continue
+                target[key] = _StageAggregate(record.stage, meeting_id, model)
+            aggregates.append(target[key])
+        return aggregates
+
+    def record_llm_call(self, record: LLMCallRecord):
+        with self._lock:
+            for agg in self._aggregates(record, create=True):
+                agg.add(record)
+            self._recent.append(record)
+
+    def mark_discarded(self, record: Optional[LLMCallRecord]):
+        """调用结束后才知道结果是否被丢弃，这里补记"""
+        if record is None or record.discarded:
+            return
+        with self._lock:
+            record.discarded = True
+            for agg in self._aggregates(record, create=False):
+                agg.discarded += 1
+
+    def mark_invalid_output(self, record: Optional[LLMCallRecord]):
+        """结构化输出校验失败时补记"""
+        if record is None or record.invalid_output:
+            return
+        with self._lock:
+            record.invalid_output = True
+            for agg in self._aggregates(record, create=False):
+                agg.invalid_outputs += 1
+
+    def latency_percentile(
+        self,
+        stage: str,
+        model: Optional[str],
+        q: float,
+        window: Optional[int] = None,
+        max_age_s: Optional[float] = None,
+    ) -> Optional[float]:
+        """
+        某阶段某模型最近调用延迟的分位数，只统计最近 window 次、max_age_s 秒内的调用，
+        样本不足时返回 None
+        """
+        with self._lock:
+            agg = self._model_stages.get((stage, model))
+            if agg is None:
+                return None
+            samples = agg.recent_latencies(window, max_age_s)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return percentile(samples, q)
+
+    def snapshot(self, meeting_id: Optional[str] = None) -> MetricsSnapshot:
+        with self._lock:
+            if meeting_id is None:
+                stages = [agg.to_model() for agg in self._stages.values()]
+                stage_models = [agg.to_model() for agg in self._model_stages.values()]
+                recent = list(self._recent)
+            else:
+                meeting = self._meetings.get(meeting_id)
+                stages = (
+                    [agg.to_model() for agg in meeting.stages.values()]
+                    if meeting
+                    else []
+                )
+                stage_models = (
+                    [agg.to_model() for agg in meeting.stage_models.values()]
+                    if meeting
+                    else []
+                )
+                recent = [r for r in self._recent if r.meeting_id == meeting_id]
+        return MetricsSnapshot(
+            generated_at=datetime.now(),
+            stages=stages,
+            stage_models=stage_models,
+            recent_calls=recent,
+        )
+
+
+metrics_registry = MetricsRegistry()
+db_metrics_registry = DBMetricsRegistry()
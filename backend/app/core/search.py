@@ -0,0 +1,329 @@
+"""
+基于 SQLite FTS5 的全文检索，索引会议主题、transcript 句子和最终 issue map 的节点。
+使用 trigram 分词，中文不需要分词即可按任意子串匹配，结果按 bm25 排序。
+句子在会议进行中随 transcript 分批写入，节点在 issue map 更新后整体替换。
+只有 Gamma 模式的会议有 issue map，其他模式的会议没有节点。
+
+每个会议在索引中占用一段 rowid：meeting_id << 32 为主题，之后依次为句子（按下标），
+NODE_ROWID 之后为节点，按会议更新或删除只需 rowid 的范围查询。
+历史会议（或索引建立之前的会议）通过下面的命令从数据库和会议目录重建：
+
+    python -m app.core.search --rebuild
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import argparse
+import asyncio
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Engine, TextClause, inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, col, select
+
+from app.config import settings
+from app.core.agent.models import Issue
+from app.core.asr.models import AsrSentence
+from app.core.db import run_in_db
+from app.core.util import get_max_numbered_parsed_issues
+from app.models import Meeting
+from app.types import SearchKindType
+from app.utils.log import get_logger
+
+
+SEARCH_TABLE = "search_index"
+# trigram 分词只能用索引匹配不少于 3 个字的关键词，更短的关键词用 LIKE 匹配
+MIN_MATCH_CHARS = 3
+
+ROWID_BITS = 32
+SENTENCE_ROWID = 1
+NODE_ROWID = 1 << 31
+
+CREATE_SEARCH_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+    content,
+    kind UNINDEXED,
+    ref UNINDEXED,
+    speaker_id UNINDEXED,
+    start_ms UNINDEXED,
+    end_ms UNINDEXED,
+    tokenize = 'trigram'
+)
+"""
+
+INSERT_ROW = text(
+    f"INSERT INTO {SEARCH_TABLE} "
+    "(rowid, content, kind, ref, speaker_id, start_ms, end_ms) "
+    "VALUES (:rowid, :content, :kind, :ref, :speaker_id, :start_ms, :end_ms)"
+)
+DELETE_ROWS = text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid BETWEEN :first AND :last")
+
+HIT_COLUMNS = (
+    f"rowid >> {ROWID_BITS} AS meeting_id, kind, ref, content, speaker_id, "
+    "start_ms, end_ms"
+)
+
+logger = get_logger()
+
+
+class SearchRow(BaseModel):
+    meeting_id: int
+    kind: SearchKindType
+    ref: Optional[str]
+    content: str
+    speaker_id: Optional[str]
+    start_ms: Optional[int]
+    end_ms: Optional[int]
+    score: Optional[float] = None
+    """bm25 相关度，越大越相关；只有短关键词（按 LIKE 匹配）时为 None"""
+
+
+def meeting_rowid(meeting_id: Union[int, str]) -> int:
+    return int(meeting_id) << ROWID_BITS
+
+
+def phrase(term: str) -> str:
+    """FTS5 的短语（子串）查询，双引号转义为两个双引号"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def split_query(query: str) -> Tuple[Optional[str], List[str]]:
+    """
+    按空白拆分关键词，各关键词均须出现。返回长关键词的 FTS5 查询
+    （没有长关键词时为 None）和需要用 LIKE 匹配的短关键词
+    """
+    terms = query.split()
+    long_terms = [term for term in terms if len(term) >= MIN_MATCH_CHARS]
+    short_terms = [term for term in terms if len(term) < MIN_MATCH_CHARS]
+    fts_query = " ".join(phrase(term) for term in long_terms) if long_terms else None
+    return fts_query, short_terms
+
+
+def like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def iter_nodes(issues: Iterable[Issue]) -> Iterable[Tuple[str, str]]:
+    """issue map 中所有节点的 (full_id, content)，包括立场和论据"""
+    for issue in issues:
+        yield issue.full_id, issue.content
+        for position in issue.positions:
+            yield position.full_id, position.content
+            for argument in position.pros + position.cons:
+                yield argument.full_id, argument.content
+
+
+def create_search_index(db_engine: Engine) -> bool:
+    """
+    创建 FTS5 表，SQLite 没有编译 FTS5 或 trigram 分词时返回 False。
+    新建时从数据库补充已有会议的主题，使标题过滤不遗漏旧会议
+    """
+    if db_engine.dialect.name != "sqlite":
+        return False
+    try:
+        with db_engine.begin() as conn:
+            exists = inspect(conn).has_table(SEARCH_TABLE)
+            conn.exec_driver_sql(CREATE_SEARCH_TABLE)
+            if not exists:
+                conn.exec_driver_sql(
+                    f"INSERT INTO {SEARCH_TABLE} (rowid, content, kind) "
+                    f"SELECT meeting_id << {ROWID_BITS}, topic, 'topic' "
+                    f"FROM {Meeting.__tablename__}"
+                )
+    except SQLAlchemyError as e:
+        logger.warning(f"full-text search disabled: {e}")
+        return False
+    return True
+
+
+class SearchIndex:
+    def __init__(self, db_engine: Engine) -> None:
+        self.db_engine = db_engine
+        self.available: Optional[bool] = None  # 第一次使用时检查索引表是否存在
+
+    def is_available(self) -> bool:
+        if self.available is None:
+            if self.db_engine.dialect.name != "sqlite":
+                self.available = False
+            else:
+                self.available = inspect(self.db_engine).has_table(SEARCH_TABLE)
+        return self.available
+
+    def replace_rows(self, first: int, last: int, rows: List[Dict[str, Any]]):
+        """删除 rowid 在 [first, last] 之间的行后写入 rows，重复写入不会产生重复结果"""
+        if not self.is_available():
+            return
+        try:
+            with self.db_engine.begin() as conn:
+                conn.execute(DELETE_ROWS, {"first": first, "last": last})
+                if rows:
+                    conn.execute(INSERT_ROW, rows)
+        except SQLAlchemyError as e:
+            # 索引失败不影响会议本身
+            logger.warning(f"search index write failed: {e}")
+
+    @run_in_db
+    def set_topic(self, meeting_id: Union[int, str], topic: str) -> None:
+        rowid = meeting_rowid(meeting_id)
+        self.replace_rows(
+            rowid,
+            rowid,
+            [
+                {
+                    "rowid": rowid,
+                    "content": topic,
+                    "kind": "topic",
+                    "ref": None,
+                    "speaker_id": None,
+                    "start_ms": None,
+                    "end_ms": None,
+                }
+            ],
+        )
+
+    @run_in_db
+    def add_sentences(
+        self,
+        meeting_id: Union[int, str],
+        first_index: int,
+        sentences: List[AsrSentence],
+    ) -> None:
+        """写入 transcript 中从 first_index 开始的句子，ref 为句子下标"""
+        first = meeting_rowid(meeting_id) + SENTENCE_ROWID + first_index
+        self.replace_rows(
+            first,
+            first + len(sentences) - 1,
+            [
+                {
+                    "rowid": first + i,
+                    "content": sentence.content,
+                    "kind": "sentence",
+                    "ref": str(first_index + i),
+                    "speaker_id": sentence.speaker_id,
+                    "start_ms": sentence.time_range[0],
+                    "end_ms": sentence.time_range[-1],
+                }
+                for i, sentence in enumerate(sentences)
+                if sentence.content
+            ],
+        )
+
+    @run_in_db
+    def set_nodes(self, meeting_id: Union[int, str], issues: List[Issue]) -> None:
+        """用当前的 issue map 替换会议的节点，ref 为节点的 full_id"""
+        first = meeting_rowid(meeting_id) + NODE_ROWID
+        self.replace_rows(
+            first,
+            meeting_rowid(meeting_id) + (1 << ROWID_BITS) - 1,
+            [
+                {
+                    "rowid": first + i,
+                    "content": content,
+                    "kind": "node",
+                    "ref": full_id,
+                    "speaker_id": None,
+                    "start_ms": None,
+                    "end_ms": None,
+                }
+                for i, (full_id, content) in enumerate(iter_nodes(issues))
+            ],
+        )
+
+    def topic_filter(self, title: str) -> Optional[TextClause]:
+        """主题包含 title 的会议 id 子查询，title 过短或索引不可用时返回 None"""
+        if len(title) < MIN_MATCH_CHARS or not self.is_available():
+            return None
+        return text(
+            f"SELECT rowid >> {ROWID_BITS} FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH :title_query AND kind = 'topic'"
+        ).bindparams(title_query=phrase(title))
+
+    @run_in_db
+    def search(
+        self, query: str, limit: int
+    ) -> Optional[Tuple[List[SearchRow], Dict[int, Meeting]]]:
+        """
+        返回按相关度排序的命中和命中所在的会议，索引不可用时返回 None。
+        不足 MIN_MATCH_CHARS 个字的关键词在长关键词的命中中按 LIKE 过滤；
+        只有短关键词时按 LIKE 扫描全表，最新的结果在前
+        """
+        if not self.is_available():
+            return None
+        fts_query, short_terms = split_query(query)
+        conditions = [
+            f"content LIKE :term{i} ESCAPE '\\'" for i in range(len(short_terms))
+        ]
+        params: Dict[str, Any] = {
+            f"term{i}": like_pattern(term) for i, term in enumerate(short_terms)
+        }
+        params["limit"] = limit
+        if fts_query is not None:
+            conditions.insert(0, f"{SEARCH_TABLE} MATCH :query")
+            params["query"] = fts_query
+            columns = f"{HIT_COLUMNS}, -bm25({SEARCH_TABLE}) AS score"
+            order = f"bm25({SEARCH_TABLE})"
+        else:
+            columns = HIT_COLUMNS
+            order = "rowid DESC"
+        with Session(self.db_engine) as session:
+            result = session.execute(
+                text(
+                    f"SELECT {columns} FROM {SEARCH_TABLE} "
+                    f"WHERE {' AND '.join(conditions)} ORDER BY {order} LIMIT :limit"
+                ),
+                params,
+            )
+            rows = [SearchRow.model_validate(row._asdict()) for row in result]
+            meeting_ids = {row.meeting_id for row in rows}
+            meetings = session.exec(
+                select(Meeting).where(col(Meeting.meeting_id).in_(meeting_ids))
+            ).all()
+            return rows, {meeting.meeting_id: meeting for meeting in meetings}  # type: ignore
+
+    async def rebuild(self, meeting_data_root: Path) -> int:
+        """清空索引，按数据库中的会议和会议目录下保存的结果重新写入，返回会议数"""
+        if not create_search_index(self.db_engine):
+            return 0
+        self.available = True
+        with self.db_engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+        with Session(self.db_engine) as session:
+            meetings = session.exec(select(Meeting)).all()
+        for meeting in meetings:
+            meeting_id: int = meeting.meeting_id  # type: ignore
+            root_path = meeting_data_root / str(meeting_id)
+            await self.set_topic(meeting_id, meeting.topic)
+            total_asr_path = root_path / "total_asr.json"
+            if total_asr_path.exists():
+                sentences = TypeAdapter(List[AsrSentence]).validate_json(
+                    total_asr_path.read_bytes()
+                )
+                await self.add_sentences(meeting_id, 0, sentences)
+            issue_map_path = root_path / "online" / "issue_map"
+            # 没有保存过 issue map 时 get_max_numbered_parsed_issues 返回占位的节点
+            if any(issue_map_path.glob("*.json")):
+                issues, _ = get_max_numbered_parsed_issues(issue_map_path)
+                await self.set_nodes(meeting_id, issues)
+        # 合并 FTS5 的索引段，加快之后的查询
+        with self.db_engine.begin() as conn:
+            conn.execute(
+                text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+            )
+        return len(meetings)
+
+
+if __name__ == "__main__":
+    from app.core.db import engine, init_db
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--rebuild", action="store_true", help="根据数据库和会议目录重建检索索引"
+    )
+    args = parser.parse_args()
+    if args.rebuild:
+        init_db()
+        n = asyncio.run(SearchIndex(engine).rebuild(Path(settings.meeting_data_root)))
+        print(f"indexed {n} meetings")
+    else:
+        parser.print_help()
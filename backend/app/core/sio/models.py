@@ -3,7 +3,10 @@ from typing import List, Optional
 from pydantic import BaseModel
 
 from app.core.agent.models import Issue
+from app.core.agent.models import SummaryHierarchy as SummaryHierarchy
+from app.core.agent.models import SummarySection as SummarySection
 from app.core.asr.models import SendAsrData as SendAsrData
+from app.core.asr.models import SendPartialData as SendPartialData
 from app.types import RoleType
 
 
@@ -44,6 +47,7 @@ class ProcessStatus(BaseModel):
 class UpdateIssueData(BaseModel):
     issue_map: List[Issue]
     chosen_id: str
+    issue_map_version: int
 
 
 class SummaryData(BaseModel):
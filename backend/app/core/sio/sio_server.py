@@ -7,6 +7,8 @@ from app.core.sio.models import (
     RequestData,
     UpdateIssueData,
     SendAsrData,
+    SendPartialData,
+    SummaryHierarchy,
 )
 from app.types import RoleType
 
@@ -26,6 +28,9 @@ class SioServer(FastAPISocketIO):
     async def sendCurrent(self, sid: str, data: SendAsrData):
         await self.emit("sendCurrent", data, to=sid)
 
+    async def sendPartial(self, sid: str, data: SendPartialData):
+        await self.emit("sendPartial", data, to=sid)
+
     async def updateIssue(self, sid: str, data: UpdateIssueData):
         await self.emit("updateIssue", data, to=sid)
 
@@ -34,3 +39,6 @@ class SioServer(FastAPISocketIO):
 
     async def sendSummaryNew(self, sid: str, data: AllSummaries):
         await self.emit("sendSummaryNew", data, to=sid)
+
+    async def sendSummaryHierarchy(self, sid: str, data: SummaryHierarchy):
+        await self.emit("sendSummaryHierarchy", data, to=sid)
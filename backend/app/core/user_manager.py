@@ -1,9 +1,10 @@
-from typing import Awaitable, Callable, Dict, List, Optional, Union
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Union
 from sqlalchemy import Engine
 from sqlmodel import Session, select
 
 from app.models import Code, User
 from app.core.auth import get_userid_from_token
+from app.core.db import run_in_db
 from app.core.sio.sio_server import SioServer
 from app.types import RoleType
 
@@ -13,6 +14,10 @@ class UserManager:
         self.db_engine = db_engine
         # TODO: 加锁以防止并发修改
         self.sid2userId: Dict[str, str] = {}
+        # 连接时解析好的用户，audioChunk 等高频事件直接读取，不查询数据库
+        self.sid2user: Dict[str, User] = {}
+        # 反向索引：userId -> 该用户的所有 sid
+        self.userId2sids: Dict[str, Set[str]] = {}
 
     def checkPassword(self, password):
         # 密码要求：字母、数字的组合，6 位以上 20 位以下
@@ -24,22 +29,38 @@ class UserManager:
 
     # ----- 以下为 wyk 需要新增的接口 -----
 
-    def get_user_from_token(self, token: str):
+    async def get_user_from_token(self, token: str):
         userId = get_userid_from_token(token)
         if userId:
-            return self.getUser(userId)
+            return await self.getUser(userId)
 
-    def setSid(self, mytoken: str, sid: str):
-        user = self.get_user_from_token(mytoken)
+    async def setSid(self, mytoken: str, sid: str):
+        user = await self.get_user_from_token(mytoken)
         if user:
-            user_id = str(user.user_id)
-            self.sid2userId[sid] = user_id
+            self.bindSid(sid, user)
             return user
 
+    def bindSid(self, sid: str, user: User):
+        # 建立 sid 与用户的映射关系
+        self.removeSid(sid)
+        user_id = str(user.user_id)
+        self.sid2userId[sid] = user_id
+        self.sid2user[sid] = user
+        self.userId2sids.setdefault(user_id, set()).add(sid)
+
     def removeSid(self, sid):
         # 删除 sid 对应的映射关系
-        return self.sid2userId.pop(sid, None)
-
+        self.sid2user.pop(sid, None)
+        user_id = self.sid2userId.pop(sid, None)
+        if user_id is not None:
+            sids = self.userId2sids.get(user_id)
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del self.userId2sids[user_id]
+        return user_id
+
+    @run_in_db
     def addUser(self, username, password):
         # 注册新用户时调用
         with Session(self.db_engine) as session:
@@ -59,6 +80,7 @@ class UserManager:
                 session.commit()
                 return Code.SUCCESS
 
+    @run_in_db
     def authenticateUser(self, username, password):
         # 用户登录时调用
         with Session(self.db_engine) as session:
@@ -72,25 +94,15 @@ class UserManager:
             else:
                 return None, Code.USER_NOT_FOUND
 
-    def findUser(self, sid):
-        # 找到 sid 对应的用户 user
-        if sid in self.sid2userId:
-            with Session(self.db_engine) as session:
-                statement = select(User).where(User.user_id == self.sid2userId[sid])
-                existed_user = session.exec(statement).one_or_none()
-                return existed_user
-        # 如果不存在该sid连接，返回 None
+    def findUser(self, sid) -> Optional[User]:
+        # 找到 sid 对应的用户 user，如果不存在该sid连接，返回 None
+        return self.sid2user.get(sid)
 
     def getSid(self, userId: Union[str, int]) -> List[str]:
-        ret = []
-        userId = str(userId)
-        # 找到 userId 对应的 sid
-        for sid, uid in self.sid2userId.items():
-            if uid == userId:
-                ret.append(sid)
-        # 如果不存在用户，返回 空列表
-        return ret
+        # 找到 userId 对应的 sid，如果不存在用户，返回 空列表
+        return list(self.userId2sids.get(str(userId), ()))
 
+    @run_in_db
     def getUserByUsername(self, username) -> Optional[User]:
         # 找到 username == username 的用户 user
         with Session(self.db_engine) as session:
@@ -99,6 +111,7 @@ class UserManager:
             # 如果找到了，返回 user
             return user
 
+    @run_in_db
     def getUser(self, userId) -> Optional[User]:
         # 找到 user_id == userId 的用户 user
         with Session(self.db_engine) as session:
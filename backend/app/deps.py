@@ -5,7 +5,7 @@ from fastapi.security import OAuth2PasswordBearer
 from typing import Optional
 from sqlmodel import Session
 
-from app.core.db import engine
+from app.core.db import engine, run_db
 from app.core.user_manager import UserManager
 from app.core.meeting_manager import MeetingManager
 from app.core.attendee_manager import AttendeeManager
@@ -56,9 +56,9 @@ async def get_meeting_post(
     meeting_hash_id: Annotated[Optional[str], Body(embed=True)] = None,
 ):
     if meeting_id:
-        meeting = meeting_manager.getMeetingById(meeting_id)
+        meeting = await meeting_manager.getMeetingById(meeting_id)
     elif meeting_hash_id:
-        meeting = meeting_manager.getMeetingByHashId(meeting_hash_id)
+        meeting = await meeting_manager.getMeetingByHashId(meeting_hash_id)
     else:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -94,26 +94,31 @@ MeetingAgentDep = Annotated[object, Depends(get_meeting_agent)]
 _anonymous_user: Optional[User] = None
 
 
+def create_anonymous_user() -> User:
+    with Session(engine) as session:
+        anonymous_user = User(username="anonymous", password="")
+        session.add(anonymous_user)
+        session.commit()
+        session.refresh(anonymous_user)
+        return anonymous_user
+
+
 async def get_anonymous_user(user_manager: UserManagerDep) -> User:
     """Get or create an anonymous user for unauthenticated access"""
     global _anonymous_user
     if _anonymous_user is None:
         try:
             # Try to get or create a default anonymous user
-            anonymous_user = user_manager.getUserByUsername("anonymous")
+            anonymous_user = await user_manager.getUserByUsername("anonymous")
             if anonymous_user is None:
                 # Create anonymous user if it doesn't exist
                 try:
-                    with Session(engine) as session:
-                        anonymous_user = User(username="anonymous", password="")
-                        session.add(anonymous_user)
-                        session.commit()
-                        session.refresh(anonymous_user)
-                        logger = get_logger()
-                        logger.info(f"Created anonymous user with id: {anonymous_user.user_id}")
+                    anonymous_user = await run_db(create_anonymous_user)
+                    logger = get_logger()
+                    logger.info(f"Created anonymous user with id: {anonymous_user.user_id}")
                 except Exception as e:
                     # If creation fails, try to get again (might have been created by another request)
-                    anonymous_user = user_manager.getUserByUsername("anonymous")
+                    anonymous_user = await user_manager.getUserByUsername("anonymous")
                     if anonymous_user is None:
                         logger = get_logger()
                         logger.error(f"Failed to create anonymous user: {e}")
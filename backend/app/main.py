@@ -39,7 +39,7 @@ async def startup_event():
     from sqlmodel import Session, select
     
     user_manager = UserManager(engine)
-    anonymous_user = user_manager.getUserByUsername("anonymous")
+    anonymous_user = await user_manager.getUserByUsername("anonymous")
     if anonymous_user is None:
         try:
             with Session(engine) as session:
@@ -2,9 +2,15 @@ from datetime import datetime
 from enum import IntEnum
 from typing import Generic, List, Literal, Optional, TypeVar
 from pydantic import ConfigDict
-from sqlmodel import JSON, Column, Field, SQLModel, String
+from sqlmodel import JSON, Column, Field, Index, SQLModel, String
 
-from app.types import AiType, MeetingLanguageType, StatusType
+from app.types import (
+    AiType,
+    AnalysisStatusType,
+    MeetingLanguageType,
+    SearchKindType,
+    StatusType,
+)
 
 
 # enable generation of description based on attribute docstring (for OpenAPI)
@@ -142,7 +148,57 @@ class MeetingItem(AnnotatedModel):
 
 class MeetingListResponse(BaseResponse):
     meetings: List[MeetingItem]
-    total: int
+    total: Optional[int]  # 不请求总数（with_total=false）时为 None
+    next_before_id: Optional[int] = None  # 下一页的游标，没有下一页时为 None
+
+
+class SearchHit(AnnotatedModel):
+    meeting_id: str
+    hash_id: str
+    topic: str
+    create_time: str
+    kind: SearchKindType
+    content: str
+    ref: Optional[str]
+    """Sentence index in `total_asr.json` for sentences (in the live transcript while
+    the meeting is running), `full_id` for nodes."""
+    speaker_id: Optional[str]
+    speaker: Optional[str]
+    start_ms: Optional[int]
+    """Offset from the start of the meeting, for sentences."""
+    end_ms: Optional[int]
+    score: Optional[float]
+    """bm25 relevance, higher is better; None for keywords too short to match."""
+
+
+class SearchResponse(SuccessResponse):
+    hits: List[SearchHit]
+
+
+class MinutesSection(AnnotatedModel):
+    title: str
+    summary: List[str]
+    first_sentence: int
+    """Index of the first sentence of this section in `total_asr.json`."""
+    last_sentence: int
+    """Index of the last sentence of this section in `total_asr.json`."""
+
+
+class MeetingMinutes(AnnotatedModel):
+    title: str
+    abstract: str
+    sections: List[MinutesSection]
+
+
+class MinutesStartResponse(BaseResponse):
+    code: Literal[Code.SUCCESS, Code.FAILED, Code.ANALYSIS_GENERATING]
+
+
+class MinutesResponse(SuccessResponse):
+    analysis_status: AnalysisStatusType
+    progress: Optional[float] = None
+    """Fraction of finished LLM calls while the minutes job is in progress."""
+    minutes: Optional[MeetingMinutes] = None
 
 
 # Blow are database models
@@ -163,13 +219,15 @@ class Meeting(SQLModel, table=True):
     # hash_id 传入前做唯一性检查判断
     hash_id: str = Field(index=True, unique=True)  # 会议哈希ID
     # hash_id: str = Field(default_factory=get_meeting_hash)
-    create_time: datetime = Field(default_factory=datetime.now)  # 会议创建时间
+    create_time: datetime = Field(
+        default_factory=datetime.now, index=True
+    )  # 会议创建时间
     create_by: Optional[int] = Field(
         default=None, foreign_key="user.user_id"
     )  # 会议创建者ID
 
     # ref: https://github.com/fastapi/sqlmodel/issues/57#issuecomment-2416155216
-    status: StatusType = Field(sa_type=String, default="processing")
+    status: StatusType = Field(sa_type=String, default="processing", index=True)
 
     master_id: Optional[int] = Field(
         default=None, foreign_key="user.user_id"
@@ -179,15 +237,19 @@ class Meeting(SQLModel, table=True):
     # ref: https://github.com/fastapi/sqlmodel/issues/178#issuecomment-989908481
     hot_words: Optional[List[str]] = Field(sa_column=Column(JSON), default=None)  # 热词
 
-    analysis_status: Literal["Not Started", "In Progress", "Completed", "Failed"] = (
-        Field(sa_type=String, default="Not Started")
-    )
+    analysis_status: AnalysisStatusType = Field(sa_type=String, default="Not Started")
 
     ai_type: AiType = Field(sa_type=String)
     meeting_language: MeetingLanguageType = Field(sa_type=String)
 
 
 class Attendee(SQLModel, table=True):
+    # 按会议查参会者（说话人表、离开会议、更换主持人），按用户查所在的会议
+    __table_args__ = (
+        Index("ix_attendee_meeting_id_user_id", "meeting_id", "user_id"),
+        Index("ix_attendee_user_id_is_in_meeting", "user_id", "is_in_meeting"),
+    )
+
     attendee_id: Optional[int] = Field(
         default=None, primary_key=True
     )  # 参会者ID，自增主键
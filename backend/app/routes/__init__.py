@@ -2,8 +2,10 @@ from fastapi import APIRouter
 
 from . import users
 from . import meetings
+from . import metrics
 
 
 api_router = APIRouter()
 api_router.include_router(users.api_router, tags=["users"])
 api_router.include_router(meetings.api_router, tags=["meetings"])
+api_router.include_router(metrics.api_router, tags=["metrics"])
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Literal, Optional, Union
+from typing import Dict, List, Literal, Optional, Union
 from pydantic import TypeAdapter
 from typing_extensions import Annotated
 from fastapi.responses import FileResponse, StreamingResponse
@@ -23,13 +23,14 @@ from app.deps import (
     MeetingManagerDep,
     AttendeeManagerDep,
 )
-from app.core.asr.models import AsrSentence, TotalData
+from app.core.asr.models import AsrSentence, TotalData, TranscriptPage
 from app.core.meeting_agent_gamma import MeetingAgentGamma
-from app.core.meeting_agent_summary import MeetingAgentSummary
+from app.core.meeting_agent_summary import MeetingAgentSummary, read_summary_hierarchy
 from app.models import (
     AddNodeResponse,
     Code,
     InvalidNodeResponse,
+    Meeting,
     MeetingItem,
     MeetingJoinResponse,
     MeetingLeaveResponse,
@@ -37,7 +38,11 @@ from app.models import (
     MeetingStart,
     MeetingStartResponse,
     MeetingStopResponse,
+    MinutesResponse,
+    MinutesStartResponse,
     NotMeetingHostResponse,
+    SearchHit,
+    SearchResponse,
     SuccessResponse,
     WrongAgentResponse,
 )
@@ -51,6 +56,10 @@ logger = get_logger()
 
 Embed_Body_Str = Annotated[str, Body(embed=True)]
 Embed_Body_Bool = Annotated[bool, Body(embed=True)]
+Embed_Body_Cursor = Annotated[Optional[int], Body(embed=True, ge=0)]
+
+# 单次返回的 transcript 最大句数
+TRANSCRIPT_PAGE_LIMIT = 500
 
 
 # 开始会议：base & echo
@@ -80,7 +89,7 @@ meeting_language: {meeting_language}""")
     assert user.user_id
     # 创建一个新的会议
     if meeting_resume_hash_id and meeting_resume_hash_id != "":
-        meeting = meeting_manager.createMeetingResume(
+        meeting = await meeting_manager.createMeetingResume(
             meeting_resume_hash_id,
             user.user_id,
             ai_type,
@@ -90,7 +99,7 @@ meeting_language: {meeting_language}""")
             meeting_language,
         )
     else:
-        meeting = meeting_manager.createMeeting(
+        meeting = await meeting_manager.createMeeting(
             user.user_id,
             topic,
             ai_type,
@@ -101,7 +110,7 @@ meeting_language: {meeting_language}""")
         )
     assert meeting.meeting_id
     # 创建一个新的参会者
-    attendee = attendee_manager.addAttendee(
+    attendee = await attendee_manager.addAttendee(
         meeting.meeting_id, user.user_id, is_master=True, nickname=nickname
     )
     # 加入 socket 会议室
@@ -135,7 +144,7 @@ async def join_meeting(
     assert user.user_id
 
     # 创建一个新的参会者
-    attendee = attendee_manager.addAttendee(
+    attendee = await attendee_manager.addAttendee(
         meeting.meeting_id, user.user_id, is_master=False, nickname=nickname
     )
     # 加入 socket 会议室
@@ -187,10 +196,10 @@ async def leave_meeting(
     assert user.user_id
 
     # 离开会议
-    attendee_manager.leaveMeeting(meeting.meeting_id, user.user_id)
+    await attendee_manager.leaveMeeting(meeting.meeting_id, user.user_id)
     await user_manager.leaveRoom(sio, user.user_id, meeting.hash_id)
 
-    attendees = attendee_manager.get_active_attendees(
+    attendees = await attendee_manager.get_active_attendees(
         meeting.meeting_id
     )  # 获取所有在会议中的参会者
     # 如果没有参会者了，结束会议
@@ -205,7 +214,9 @@ async def leave_meeting(
     if meeting.master_id == user.user_id:
         new_master = attendees[0]
         assert new_master.user_id is not None
-        meeting_manager.updateMasterId(str(meeting.meeting_id), new_master.user_id)
+        await meeting_manager.updateMasterId(
+            str(meeting.meeting_id), new_master.user_id
+        )
         # 通知新主持人
         await user_manager.sendIdentification(sio, new_master.user_id, "host")
     return MeetingLeaveResponse(
@@ -214,6 +225,7 @@ async def leave_meeting(
 
 
 # 在进入会议的时候请求所有的数据：base & echo
+# 重连时传入 sentence_cursor 和 issue_map_version，只返回客户端缺少的部分
 @api_router.post("/api/requestTotal")
 async def request_total(
     meeting: MeetingDepPost,
@@ -223,21 +235,26 @@ async def request_total(
     meeting_manager: MeetingManagerDep,
     attendee_manager: AttendeeManagerDep,
     user_manager: UserManagerDep,
+    sentence_cursor: Embed_Body_Cursor = None,
+    issue_map_version: Embed_Body_Cursor = None,
 ) -> TotalData:
     assert user.user_id
     meeting_id = str(meeting.meeting_id)
 
-    # 向前端返回截至目前的全部asr转写结果
-    result = await meeting_manager.getTotalAsrResult(meeting_id)
-    if result is None:  # 注意这里允许空列表，但不允许None
+    # 向前端返回截至目前（或游标之后）的asr转写结果
+    transcript = meeting_manager.getTranscript(meeting_id)
+    if transcript is None:
         raise Exception(f"Unknown error: no total asr result {meeting_id=}")
+    sentence_offset = min(sentence_cursor or 0, len(transcript))
+    result = transcript.read(sentence_offset)
 
     role = "host" if meeting.master_id == user.user_id else "participant"
 
     if meeting.ai_type == "document":
-        speaker = attendee_manager.get_speaker_map(meeting_id)
+        speaker_map = await attendee_manager.get_versioned_speaker_map(meeting_id)
         return TotalData(
-            speaker=speaker,
+            speaker=speaker_map.speaker,
+            speaker_version=speaker_map.version,
             sentences=result,
             issue_map=[],
             meeting_id=meeting_id,
@@ -245,27 +262,61 @@ async def request_total(
             topic=str(meeting.topic),
             role=role,
             ai_type=meeting.ai_type,
+            sentence_offset=sentence_offset,
+            sentence_cursor=len(transcript),
+            summary_hierarchy=meeting_agent.summary_hierarchy()
+            if isinstance(meeting_agent, MeetingAgentSummary)
+            else None,
         )
     else:
         assert isinstance(meeting_agent, MeetingAgentGamma)
-        issue_map = meeting_agent.parsed_issues_new.issue_map_list_without_delete
-        speaker = attendee_manager.get_speaker_map(meeting_id)
+        if issue_map_version == meeting_agent.issue_map_cnt:
+            issue_map = None
+        else:
+            issue_map = meeting_agent.parsed_issues_new.issue_map_list_without_delete
+        speaker_map = await attendee_manager.get_versioned_speaker_map(meeting_id)
 
         # 通知身份（可能有同一账号多端登录的问题，但按理来说不应该在这里通知）
         await user_manager.sendIdentification(sio, user.user_id, role)
 
         return TotalData(
-            speaker=speaker,
+            speaker=speaker_map.speaker,
+            speaker_version=speaker_map.version,
             sentences=result,
             issue_map=issue_map,
+            issue_map_version=meeting_agent.issue_map_cnt,
             meeting_id=meeting_id,
             meeting_hash_id=meeting.hash_id,
             topic=str(meeting.topic),
             role=role,
             ai_type=meeting.ai_type,
+            sentence_offset=sentence_offset,
+            sentence_cursor=len(transcript),
         )
 
 
+# 分页读取会议 transcript，用于向前翻看历史记录
+@api_router.post("/api/requestTranscript")
+async def request_transcript(
+    meeting: MeetingDepPost,
+    meeting_manager: MeetingManagerDep,
+    user: UserDep,
+    start: Annotated[int, Body(embed=True, ge=0)] = 0,
+    limit: Annotated[int, Body(embed=True, ge=1, le=TRANSCRIPT_PAGE_LIMIT)] = 100,
+) -> TranscriptPage:
+    transcript = meeting_manager.getTranscript(str(meeting.meeting_id))
+    if transcript is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Transcript not found"
+        )
+    start = min(start, len(transcript))
+    return TranscriptPage(
+        sentences=transcript.read(start, limit),
+        start=start,
+        total=len(transcript),
+    )
+
+
 # 用户更改会议标题：base & echo
 @api_router.post("/api/changeTitle")
 async def change_title(
@@ -277,7 +328,7 @@ async def change_title(
     assert user.user_id
     if meeting.master_id != user.user_id:
         return NotMeetingHostResponse()
-    meeting_manager.updateTopic(str(meeting.meeting_id), topic=title)
+    await meeting_manager.updateTopic(str(meeting.meeting_id), topic=title)
     return SuccessResponse()
 
 
@@ -292,7 +343,7 @@ async def update_hot_words(
     assert user.user_id
     if meeting.master_id != user.user_id:
         return NotMeetingHostResponse()
-    meeting_manager.updateHotWords(str(meeting.meeting_id), hot_words)
+    await meeting_manager.updateHotWords(str(meeting.meeting_id), hot_words)
     return SuccessResponse()
 
 
@@ -311,7 +362,7 @@ async def manual_update(
         meeting_agent.auto_generate = True
         meeting_agent.logger.info("[manual_generate]")
     elif isinstance(meeting_agent, MeetingAgentSummary):
-        meeting_agent.auto_generate = True
+        meeting_agent.request_summary()
         # meeting_agent.stop_summary = False
         meeting_agent.logger.info("[manual_generate]")
     else:
@@ -479,6 +530,20 @@ async def send_user_summary(
         return WrongAgentResponse()
 
 
+def to_meeting_item(meeting: Meeting, speaker: Dict[str, str]) -> MeetingItem:
+    return MeetingItem(
+        id=str(meeting.meeting_id),
+        hash_id=meeting.hash_id,
+        topic=meeting.topic,
+        create_by=speaker.get(str(meeting.create_by), ""),
+        create_time=meeting.create_time.isoformat(),
+        status=meeting.status,
+        master=speaker.get(str(meeting.master_id), ""),
+        hotwords=meeting.hot_words,
+        meeting_language=meeting.meeting_language,
+    )
+
+
 # 获取所有的会议
 @api_router.get("/api/getAllMeetings")
 async def get_all_meetings(
@@ -489,6 +554,8 @@ async def get_all_meetings(
     hash_id: Optional[str] = None,
     title: Optional[str] = None,
     start_time: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    with_total: bool = True,
 ) -> MeetingListResponse:
     """
     输入
@@ -496,6 +563,8 @@ async def get_all_meetings(
       hash_id: hash_id,
       title: title,
       start_time: startTime,
+      before_id: 上一页返回的 next_before_id，按游标翻页（可与 offset 同时使用）,
+      with_total: 是否返回总数,
     }
     输出
     type MeetingItem = {
@@ -514,36 +583,30 @@ async def get_all_meetings(
     # hash_id = data.hash_id
     # title = data.title
     # start_time = data.start_time
-    meetings, total = await meeting_manager.get_all_meetings(
-        hash_id=hash_id, title=title, start_time=start_time, offset=offset, limit=limit
+    meetings, total, next_before_id = await meeting_manager.get_all_meetings(
+        hash_id=hash_id,
+        title=title,
+        start_time=start_time,
+        offset=offset,
+        limit=limit,
+        before_id=before_id,
+        with_total=with_total,
     )
-    res: List[MeetingItem] = []
-    for meeting in meetings:
-        speaker = attendee_manager.get_speaker_map(meeting.meeting_id)
-        # print(f"{speaker=}")
-        res.append(
-            MeetingItem(
-                id=str(meeting.meeting_id),
-                hash_id=meeting.hash_id,
-                topic=meeting.topic,
-                create_by=speaker[str(meeting.create_by)]
-                if str(meeting.create_by) in speaker
-                else "",
-                create_time=meeting.create_time.isoformat(),
-                status=meeting.status,
-                master=speaker[str(meeting.master_id)]
-                if str(meeting.master_id) in speaker
-                else "",
-                hotwords=meeting.hot_words,
-                meeting_language=meeting.meeting_language,
-            )
-        )
+    # 一次查询读取整页会议的参会者昵称
+    speaker_maps = await attendee_manager.get_speaker_maps(
+        meeting.meeting_id for meeting in meetings
+    )
+    res: List[MeetingItem] = [
+        to_meeting_item(meeting, speaker_maps[str(meeting.meeting_id)])
+        for meeting in meetings
+    ]
 
     # return {"code": 0, "meetings": res}
     return MeetingListResponse(
         code=Code.SUCCESS,
         meetings=res,
         total=total,
+        next_before_id=next_before_id,
     )
 
 
@@ -555,26 +618,13 @@ async def get_ongoing_meetings(
 ) -> MeetingListResponse:
     """获取所有正在进行中的会议"""
     ongoing_meetings, total = await meeting_manager.get_ongoing_meetings(limit=limit)
-    res: List[MeetingItem] = []
-    for meeting in ongoing_meetings:
-        speaker = attendee_manager.get_speaker_map(meeting.meeting_id)
-        res.append(
-            MeetingItem(
-                id=str(meeting.meeting_id),
-                hash_id=meeting.hash_id,
-                topic=meeting.topic,
-                create_by=speaker[str(meeting.create_by)]
-                if str(meeting.create_by) in speaker
-                else "",
-                create_time=meeting.create_time.isoformat(),
-                status=meeting.status,
-                master=speaker[str(meeting.master_id)]
-                if str(meeting.master_id) in speaker
-                else "",
-                hotwords=meeting.hot_words,
-                meeting_language=meeting.meeting_language,
-            )
-        )
+    speaker_maps = await attendee_manager.get_speaker_maps(
+        meeting.meeting_id for meeting in ongoing_meetings
+    )
+    res: List[MeetingItem] = [
+        to_meeting_item(meeting, speaker_maps[str(meeting.meeting_id)])
+        for meeting in ongoing_meetings
+    ]
     return MeetingListResponse(
         code=Code.SUCCESS,
         meetings=res,
@@ -582,6 +632,54 @@ async def get_ongoing_meetings(
     )
 
 
+@api_router.get("/api/search", dependencies=[DependsUser])
+async def search(
+    meeting_manager: MeetingManagerDep,
+    attendee_manager: AttendeeManagerDep,
+    q: Annotated[str, Query(min_length=1)],
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+) -> SearchResponse:
+    """
+    在会议主题、transcript 句子和 issue map 节点中全文检索，按相关度排序。
+    q 按空白拆分为多个关键词，结果须包含所有关键词，不足 3 个字的关键词在其他关键词的命中中过滤；
+    句子命中的 start_ms / end_ms 为相对会议开始的时间，ref 为句子在 total_asr.json 中的下标
+    （进行中的会议为实时 transcript 中的下标）
+    """
+    found = await meeting_manager.search_index.search(q, limit)
+    if found is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Full-text search is not available",
+        )
+    rows, meetings = found
+    speaker_maps = await attendee_manager.get_speaker_maps(
+        {row.meeting_id for row in rows if row.speaker_id is not None}
+    )
+    hits: List[SearchHit] = []
+    for row in rows:
+        meeting = meetings.get(row.meeting_id)
+        if meeting is None:  # 会议已被删除
+            continue
+        speaker = speaker_maps.get(str(row.meeting_id), {})
+        hits.append(
+            SearchHit(
+                meeting_id=str(row.meeting_id),
+                hash_id=meeting.hash_id,
+                topic=meeting.topic,
+                create_time=meeting.create_time.isoformat(),
+                kind=row.kind,
+                content=row.content,
+                ref=row.ref,
+                speaker_id=row.speaker_id,
+                speaker=speaker.get(row.speaker_id) if row.speaker_id else None,
+                start_ms=row.start_ms,
+                end_ms=row.end_ms,
+                score=row.score,
+            )
+        )
+    return SearchResponse(hits=hits)
+
+
 @api_router.post("/api/requestRecord")
 async def request_record(
     meeting: MeetingDepPost,
@@ -589,7 +687,7 @@ async def request_record(
     meeting_manager: MeetingManagerDep,
     user: UserDep,
 ) -> TotalData:
-    speaker = attendee_manager.get_speaker_map(meeting.meeting_id)
+    speaker = await attendee_manager.get_speaker_map(meeting.meeting_id)
 
     root_path = meeting_manager.getMeetingRootPath(str(meeting.meeting_id))
     latest_issue_map_path = root_path / "online" / "issue_map"
@@ -603,12 +701,45 @@ async def request_record(
     return TotalData(
         speaker=speaker,
         sentences=sentences,
+        sentence_cursor=len(sentences),
         issue_map=old_parsed_issue,
         meeting_id=str(meeting.meeting_id),
         meeting_hash_id=meeting.hash_id,
         topic=str(meeting.topic),
         role="host" if meeting.master_id == user.user_id else "participant",
         ai_type=meeting.ai_type,
+        summary_hierarchy=read_summary_hierarchy(root_path),
+    )
+
+
+# 会后生成会议纪要
+@api_router.post("/api/generateMinutes")
+async def generate_minutes(
+    meeting: MeetingDepPost,
+    user: UserDep,
+    meeting_manager: MeetingManagerDep,
+    attendee_manager: AttendeeManagerDep,
+) -> Union[MinutesStartResponse, NotMeetingHostResponse]:
+    if meeting.master_id != user.user_id:
+        return NotMeetingHostResponse()
+    speaker = await attendee_manager.get_speaker_map(meeting.meeting_id)
+    code = meeting_manager.generateMinutes(meeting, speaker)
+    return MinutesStartResponse(code=code)
+
+
+# 获取会议纪要及生成进度
+@api_router.post("/api/requestMinutes", dependencies=[DependsUser])
+async def request_minutes(
+    meeting: MeetingDepPost,
+    meeting_manager: MeetingManagerDep,
+) -> MinutesResponse:
+    meeting_id = str(meeting.meeting_id)
+    return MinutesResponse(
+        analysis_status=meeting.analysis_status,
+        progress=meeting_manager.getMinutesProgress(meeting_id),
+        minutes=meeting_manager.getMinutes(meeting_id)
+        if meeting.analysis_status == "Completed"
+        else None,
     )
 
 
@@ -617,7 +748,7 @@ async def download_audio(
     meeting_id: Annotated[str, Path()],
     meeting_manager: MeetingManagerDep,
 ) -> FileResponse:
-    meeting = meeting_manager.getMeetingById(meeting_id)
+    meeting = await meeting_manager.getMeetingById(meeting_id)
     if not meeting:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found"
@@ -656,7 +787,7 @@ async def get_audio(
     meeting_manager: MeetingManagerDep,
     range: Optional[str] = Header(None),
 ) -> StreamingResponse:
-    meeting = meeting_manager.getMeetingById(meeting_id)
+    meeting = await meeting_manager.getMeetingById(meeting_id)
     if not meeting:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found"
@@ -667,6 +798,11 @@ async def get_audio(
         meeting_manager.getMeetingRootPath(str(meeting.meeting_id))
         / f"{meeting.meeting_id}.wav"
     )
+    # 进行中的会议只有已混音的部分，还没有混音时文件不存在
+    if not wav_path.exists() or wav_path.stat().st_size == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Audio not found"
+        )
     audio_type = "wav"
     filesize = wav_path.stat().st_size
     # `start` and `end` parameters are inclusive due to specification
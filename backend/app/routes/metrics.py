@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter
+
+from app.config import settings
+from app.core.metrics import (
+    DBMetricsSnapshot,
+    IngestMetricsSnapshot,
+    MetricsSnapshot,
+    db_metrics_registry,
+    metrics_registry,
+)
+from app.deps import DependsUser, MeetingManagerDep
+
+
+api_router = APIRouter()
+
+
+# 获取进程内的运行指标（LLM 调用延迟、token、重试等）
+@api_router.get("/api/metrics", dependencies=[DependsUser])
+async def get_metrics(meeting_id: Optional[str] = None) -> MetricsSnapshot:
+    return metrics_registry.snapshot(meeting_id=meeting_id)
+
+
+# 获取进行中会议的音频队列状态（队列深度、丢弃和合并的块数等）
+@api_router.get("/api/metrics/ingest", dependencies=[DependsUser])
+async def get_ingest_metrics(
+    meeting_manager: MeetingManagerDep, meeting_id: Optional[str] = None
+) -> IngestMetricsSnapshot:
+    return IngestMetricsSnapshot(
+        generated_at=datetime.now(),
+        queues=meeting_manager.getIngestMetrics(meeting_id),
+    )
+
+
+# 获取数据库查询的耗时统计（等待数据库线程和执行的时间）
+@api_router.get("/api/metrics/db", dependencies=[DependsUser])
+async def get_db_metrics() -> DBMetricsSnapshot:
+    return db_metrics_registry.snapshot(pool_size=settings.db_pool_size)
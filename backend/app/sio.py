@@ -4,7 +4,6 @@ from app.deps import get_user_manager, get_meeting_manager, get_attendee_manager
 from app.core.sio.models import AudioChunkMeta, ToggleMicrophone, TextMessage
 from app.core.sio.sio_server import SioServer
 from app.utils import get_logger
-from app.config import settings
 
 
 logger = get_logger()
@@ -28,18 +27,17 @@ async def connect(sid: str, environ, auth):
     print(f"cookie={cookie}")
     try:
         token = cookie.split("mytoken=")[1].split(";")[0] if cookie else None
-        user = get_user_manager().setSid(token, sid) if token else None
+        user = await get_user_manager().setSid(token, sid) if token else None
     except Exception:
         pass
     
     # If no user from token, use anonymous user
     if not user:
         user_manager = get_user_manager()
-        anonymous_user = user_manager.getUserByUsername("anonymous")
+        anonymous_user = await user_manager.getUserByUsername("anonymous")
         if anonymous_user:
             # Map sid to anonymous user
-            user_id = str(anonymous_user.user_id)
-            user_manager.sid2userId[sid] = user_id
+            user_manager.bindSid(sid, anonymous_user)
             user = anonymous_user
             logger.info(f"Using anonymous user for sid={sid}")
     
@@ -54,9 +52,9 @@ async def connect(sid: str, environ, auth):
     await sio.enter_room(sid, f"user-{user.username}")
 
     # TODO: 如果断开重连，要重新加入到room中
-    meeting_id = get_attendee_manager().getMeetingIn(user)
+    meeting_id = await get_attendee_manager().getMeetingIn(user)
     if meeting_id:
-        meeting = get_meeting_manager().getMeetingById(str(meeting_id))
+        meeting = await get_meeting_manager().getMeetingById(str(meeting_id))
         if meeting and meeting.hash_id:
             print(f"sid={sid} userId={user.user_id} rejoin room {meeting.hash_id}")
             await sio.enter_room(sid, meeting.hash_id)
@@ -77,16 +75,13 @@ async def audio_chunk(sid, data: bytes, meta: AudioChunkMeta):
     if not user:
         return
     # print(f"audioChunk {len(data)=} {meta.begin=} {meta.end=} {meta.encodingType=}")
+    # 经过 VAD 后送入 ASR，并按需保存pcm文件
     await get_meeting_manager().send_audio_chunk(
         meeting_id=meta.meeting_id,
         speaker_id=str(user.user_id),
         chunk=data,
+        receive_time=receive_time,
     )
-    if settings.save_pcm:
-        # 保存pcm文件
-        await get_meeting_manager().write_pcm(
-            meta.meeting_id, data, str(user.user_id), receive_time
-        )
 
 
 @sio.on("toggleMic")
@@ -5,3 +5,6 @@ MeetingLanguageType = Literal["Chinese", "English"]
 AiType = Literal["graph", "document"]
 RoleType = Literal["host", "participant"]
 StatusType = Literal["processing", "finished"]
+AnalysisStatusType = Literal["Not Started", "In Progress", "Completed", "Failed"]
+IngestPolicyType = Literal["block", "drop_oldest", "coalesce"]
+SearchKindType = Literal["topic", "sentence", "node"]
@@ -0,0 +1,16 @@
+import os
+import tempfile
+from pathlib import Path
+
+# app.config 在导入时从当前目录读取 config.yaml，
+# 测试在临时目录中写入最小配置，不依赖本地的 config.yaml
+_root = Path(tempfile.mkdtemp(prefix="echomind-test-"))
+(_root / "config.yaml").write_text(
+    "endpoints:\n"
+    "  - api_key: sk-test\n"
+    "llm_model: gpt-4o\n"
+    f"db_url: sqlite:///{_root / 'db.sqlite'}\n"
+    f"meeting_data_root: {_root / 'data'}\n"
+    "funasr_uri: ws://127.0.0.1:10095\n"
+)
+os.chdir(_root)
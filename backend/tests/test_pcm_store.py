@@ -0,0 +1,47 @@
+import asyncio
+
+from app.core.asr.pcm_store import BYTES_PER_SECOND, PcmStore, read_pcm_runs
+
+
+def write_seconds(store: PcmStore, speaker_id: str, start_s: int, seconds: int):
+    async def run():
+        for i in range(seconds):
+            await store.write(speaker_id, bytes(BYTES_PER_SECOND), (start_s + i) * 1000)
+
+    return run()
+
+
+def test_flush_before_releases_idle_speaker(tmp_path):
+    """一个说话人停顿后剩下不满一批的缓冲，另一个说话人继续说话，混音进度不应停在停顿处"""
+
+    async def main():
+        store = PcmStore(tmp_path)
+        await write_seconds(store, "a", 0, 3)
+        await write_seconds(store, "b", 0, 120)
+        # a 的 3 秒缓冲不足 FLUSH_BYTES，一直没有写出
+        assert store.pending_offset_ms() == 0
+
+        await store.flush_before(115000)
+        pending = store.pending_offset_ms()
+        assert pending is None or pending >= 115000
+
+        runs = [run for run in read_pcm_runs(tmp_path) if run.path.parent.name == "a"]
+        assert [(run.offset_ms, run.nbytes) for run in runs] == [
+            (0, 3 * BYTES_PER_SECOND)
+        ]
+        await store.close()
+
+    asyncio.run(main())
+
+
+def test_flush_speaker(tmp_path):
+    async def main():
+        store = PcmStore(tmp_path)
+        await write_seconds(store, "a", 0, 3)
+        await write_seconds(store, "b", 10, 3)
+        await store.flush_speaker("a")
+        assert store.pending_offset_ms() == 10000
+        await store.close()
+        assert store.pending_offset_ms() is None
+
+    asyncio.run(main())
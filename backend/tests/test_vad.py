@@ -0,0 +1,33 @@
+from app.core.asr.vad import BYTES_PER_MS, OffsetMap, VoicedSegment
+
+
+def make_map(start_ms: int, segments):
+    offset_map = OffsetMap(start_ms)
+    for pos_ms, length_ms in segments:
+        offset_map.add(VoicedSegment(pos_ms, bytes(length_ms * BYTES_PER_MS)))
+    return offset_map
+
+
+def test_real_ms_skips_silence():
+    # 1000~3000ms 的静音被门限丢弃
+    offset_map = make_map(500, [(0, 1000), (3000, 1000)])
+    assert offset_map.real_ms(500) == 1000
+    assert offset_map.real_ms(1500) == 4000
+
+
+def test_real_ms_skips_queue_drops():
+    """队列丢弃的音频没有发给 FunASR，其后的时间戳要顺延"""
+    offset_map = make_map(500, [(0, 1000), (3000, 1000)])
+    # 发送流中 200~500ms 分两块被丢弃
+    offset_map.drop(200 * BYTES_PER_MS, 100 * BYTES_PER_MS)
+    offset_map.drop(300 * BYTES_PER_MS, 200 * BYTES_PER_MS)
+    assert offset_map.real_ms(100) == 600
+    assert offset_map.real_ms(200) == 1000
+    # 发送流中的 1500ms 在静音之后
+    assert offset_map.real_ms(1200) == 4000
+
+
+def test_drop_ignores_previous_session():
+    offset_map = make_map(0, [(0, 1000)])
+    offset_map.drop(-100 * BYTES_PER_MS, 300 * BYTES_PER_MS)
+    assert offset_map.real_ms(0) == 200
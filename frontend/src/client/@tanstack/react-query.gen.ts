@@ -410,6 +410,103 @@ export const meetingsRequestTotalMutation = (options?: Partial<Options<MeetingsR
     return mutationOptions;
 };
 
+export const meetingsRequestTranscriptQueryKey = (options?: Options<MeetingsRequestTranscriptData>) => createQueryKey('meetingsRequestTranscript', options);
+
+/**
+ * Request Transcript
+ */
+export const meetingsRequestTranscriptOptions = (options?: Options<MeetingsRequestTranscriptData>) => {
+    return queryOptions({
+        queryFn: async ({ queryKey, signal }) => {
+            const { data } = await meetingsRequestTranscript({
+                ...options,
+                ...queryKey[0],
+                signal,
+                throwOnError: true
+            });
+            return data;
+        },
+        queryKey: meetingsRequestTranscriptQueryKey(options)
+    });
+};
+
+const createInfiniteParams = <K extends Pick<QueryKey<Options>[0], 'body' | 'headers' | 'path' | 'query'>>(queryKey: QueryKey<Options>, page: K) => {
+    const params = {
+        ...queryKey[0]
+    };
+    if (page.body) {
+        params.body = {
+            ...queryKey[0].body as any,
+            ...page.body as any
+        };
+    }
+    if (page.headers) {
+        params.headers = {
+            ...queryKey[0].headers,
+            ...page.headers
+        };
+    }
+    if (page.path) {
+        params.path = {
+            ...queryKey[0].path as any,
+            ...page.path as any
+        };
+    }
+    if (page.query) {
+        params.query = {
+            ...queryKey[0].query as any,
+            ...page.query as any
+        };
+    }
+    return params as unknown as typeof page;
+};
+
+export const meetingsRequestTranscriptInfiniteQueryKey = (options?: Options<MeetingsRequestTranscriptData>): QueryKey<Options<MeetingsRequestTranscriptData>> => createQueryKey('meetingsRequestTranscript', options, true);
+
+/**
+ * Request Transcript
+ */
+export const meetingsRequestTranscriptInfiniteOptions = (options?: Options<MeetingsRequestTranscriptData>) => {
+    return infiniteQueryOptions<MeetingsRequestTranscriptResponse, MeetingsRequestTranscriptError, InfiniteData<MeetingsRequestTranscriptResponse>, QueryKey<Options<MeetingsRequestTranscriptData>>, number | Pick<QueryKey<Options<MeetingsRequestTranscriptData>>[0], 'body' | 'headers' | 'path' | 'query'>>(
+    // @ts-ignore
+    {
+        queryFn: async ({ pageParam, queryKey, signal }) => {
+            // @ts-ignore
+            const page: Pick<QueryKey<Options<MeetingsRequestTranscriptData>>[0], 'body' | 'headers' | 'path' | 'query'> = typeof pageParam === 'object' ? pageParam : {
+                body: {
+                    start: pageParam
+                }
+            };
+            const params = createInfiniteParams(queryKey, page);
+            const { data } = await meetingsRequestTranscript({
+                ...options,
+                ...params,
+                signal,
+                throwOnError: true
+            });
+            return data;
+        },
+        queryKey: meetingsRequestTranscriptInfiniteQueryKey(options)
+    });
+};
+
+/**
+ * Request Transcript
+ */
+export const meetingsRequestTranscriptMutation = (options?: Partial<Options<MeetingsRequestTranscriptData>>): UseMutationOptions<MeetingsRequestTranscriptResponse, MeetingsRequestTranscriptError, Options<MeetingsRequestTranscriptData>> => {
+    const mutationOptions: UseMutationOptions<MeetingsRequestTranscriptResponse, MeetingsRequestTranscriptError, Options<MeetingsRequestTranscriptData>> = {
+        mutationFn: async (localOptions) => {
+            const { data } = await meetingsRequestTranscript({
+                ...options,
+                ...localOptions,
+                throwOnError: true
+            });
+            return data;
+        }
+    };
+    return mutationOptions;
+};
+
 export const meetingsChangeTitleQueryKey = (options: Options<MeetingsChangeTitleData>) => createQueryKey('meetingsChangeTitle', options);
 
 /**
@@ -779,6 +876,8 @@ export const meetingsGetAllMeetingsQueryKey = (options?: Options<MeetingsGetAllM
  * hash_id: hash_id,
  * title: title,
  * start_time: startTime,
+ * before_id: 上一页返回的 next_before_id，按游标翻页（可与 offset 同时使用）,
+ * with_total: 是否返回总数,
  * }
  * 输出
  * type MeetingItem = {
@@ -808,37 +907,6 @@ export const meetingsGetAllMeetingsOptions = (options?: Options<MeetingsGetAllMe
     });
 };
 
-const createInfiniteParams = <K extends Pick<QueryKey<Options>[0], 'body' | 'headers' | 'path' | 'query'>>(queryKey: QueryKey<Options>, page: K) => {
-    const params = {
-        ...queryKey[0]
-    };
-    if (page.body) {
-        params.body = {
-            ...queryKey[0].body as any,
-            ...page.body as any
-        };
-    }
-    if (page.headers) {
-        params.headers = {
-            ...queryKey[0].headers,
-            ...page.headers
-        };
-    }
-    if (page.path) {
-        params.path = {
-            ...queryKey[0].path as any,
-            ...page.path as any
-        };
-    }
-    if (page.query) {
-        params.query = {
-            ...queryKey[0].query as any,
-            ...page.query as any
-        };
-    }
-    return params as unknown as typeof page;
-};
-
 export const meetingsGetAllMeetingsInfiniteQueryKey = (options?: Options<MeetingsGetAllMeetingsData>): QueryKey<Options<MeetingsGetAllMeetingsData>> => createQueryKey('meetingsGetAllMeetings', options, true);
 
 /**
@@ -848,6 +916,8 @@ export const meetingsGetAllMeetingsInfiniteQueryKey = (options?: Options<Meeting
  * hash_id: hash_id,
  * title: title,
  * start_time: startTime,
+ * before_id: 上一页返回的 next_before_id，按游标翻页（可与 offset 同时使用）,
+ * with_total: 是否返回总数,
  * }
  * 输出
  * type MeetingItem = {
@@ -907,6 +977,30 @@ export const meetingsGetOngoingMeetingsOptions = (options: Options<MeetingsGetOn
     });
 };
 
+export const meetingsSearchQueryKey = (options: Options<MeetingsSearchData>) => createQueryKey('meetingsSearch', options);
+
+/**
+ * Search
+ * 在会议主题、transcript 句子和 issue map 节点中全文检索，按相关度排序。
+ * q 按空白拆分为多个关键词，结果须包含所有关键词，不足 3 个字的关键词在其他关键词的命中中过滤；
+ * 句子命中的 start_ms / end_ms 为相对会议开始的时间，ref 为句子在 total_asr.json 中的下标
+ * （进行中的会议为实时 transcript 中的下标）
+ */
+export const meetingsSearchOptions = (options: Options<MeetingsSearchData>) => {
+    return queryOptions({
+        queryFn: async ({ queryKey, signal }) => {
+            const { data } = await meetingsSearch({
+                ...options,
+                ...queryKey[0],
+                signal,
+                throwOnError: true
+            });
+            return data;
+        },
+        queryKey: meetingsSearchQueryKey(options)
+    });
+};
+
 export const meetingsRequestRecordQueryKey = (options?: Options<MeetingsRequestRecordData>) => createQueryKey('meetingsRequestRecord', options);
 
 /**
@@ -944,6 +1038,80 @@ export const meetingsRequestRecordMutation = (options?: Partial<Options<Meetings
     return mutationOptions;
 };
 
+export const meetingsGenerateMinutesQueryKey = (options?: Options<MeetingsGenerateMinutesData>) => createQueryKey('meetingsGenerateMinutes', options);
+
+/**
+ * Generate Minutes
+ */
+export const meetingsGenerateMinutesOptions = (options?: Options<MeetingsGenerateMinutesData>) => {
+    return queryOptions({
+        queryFn: async ({ queryKey, signal }) => {
+            const { data } = await meetingsGenerateMinutes({
+                ...options,
+                ...queryKey[0],
+                signal,
+                throwOnError: true
+            });
+            return data;
+        },
+        queryKey: meetingsGenerateMinutesQueryKey(options)
+    });
+};
+
+/**
+ * Generate Minutes
+ */
+export const meetingsGenerateMinutesMutation = (options?: Partial<Options<MeetingsGenerateMinutesData>>): UseMutationOptions<MeetingsGenerateMinutesResponse, MeetingsGenerateMinutesError, Options<MeetingsGenerateMinutesData>> => {
+    const mutationOptions: UseMutationOptions<MeetingsGenerateMinutesResponse, MeetingsGenerateMinutesError, Options<MeetingsGenerateMinutesData>> = {
+        mutationFn: async (localOptions) => {
+            const { data } = await meetingsGenerateMinutes({
+                ...options,
+                ...localOptions,
+                throwOnError: true
+            });
+            return data;
+        }
+    };
+    return mutationOptions;
+};
+
+export const meetingsRequestMinutesQueryKey = (options?: Options<MeetingsRequestMinutesData>) => createQueryKey('meetingsRequestMinutes', options);
+
+/**
+ * Request Minutes
+ */
+export const meetingsRequestMinutesOptions = (options?: Options<MeetingsRequestMinutesData>) => {
+    return queryOptions({
+        queryFn: async ({ queryKey, signal }) => {
+            const { data } = await meetingsRequestMinutes({
+                ...options,
+                ...queryKey[0],
+                signal,
+                throwOnError: true
+            });
+            return data;
+        },
+        queryKey: meetingsRequestMinutesQueryKey(options)
+    });
+};
+
+/**
+ * Request Minutes
+ */
+export const meetingsRequestMinutesMutation = (options?: Partial<Options<MeetingsRequestMinutesData>>): UseMutationOptions<MeetingsRequestMinutesResponse, MeetingsRequestMinutesError, Options<MeetingsRequestMinutesData>> => {
+    const mutationOptions: UseMutationOptions<MeetingsRequestMinutesResponse, MeetingsRequestMinutesError, Options<MeetingsRequestMinutesData>> = {
+        mutationFn: async (localOptions) => {
+            const { data } = await meetingsRequestMinutes({
+                ...options,
+                ...localOptions,
+                throwOnError: true
+            });
+            return data;
+        }
+    };
+    return mutationOptions;
+};
+
 export const meetingsDownloadAudioQueryKey = (options: Options<MeetingsDownloadAudioData>) => createQueryKey('meetingsDownloadAudio', options);
 
 /**
@@ -982,4 +1150,64 @@ export const meetingsGetAudioOptions = (options: Options<MeetingsGetAudioData>)
         },
         queryKey: meetingsGetAudioQueryKey(options)
     });
+};
+
+export const metricsGetMetricsQueryKey = (options?: Options<MetricsGetMetricsData>) => createQueryKey('metricsGetMetrics', options);
+
+/**
+ * Get Metrics
+ */
+export const metricsGetMetricsOptions = (options?: Options<MetricsGetMetricsData>) => {
+    return queryOptions({
+        queryFn: async ({ queryKey, signal }) => {
+            const { data } = await metricsGetMetrics({
+                ...options,
+                ...queryKey[0],
+                signal,
+                throwOnError: true
+            });
+            return data;
+        },
+        queryKey: metricsGetMetricsQueryKey(options)
+    });
+};
+
+export const metricsGetIngestMetricsQueryKey = (options?: Options<MetricsGetIngestMetricsData>) => createQueryKey('metricsGetIngestMetrics', options);
+
+/**
+ * Get Ingest Metrics
+ */
+export const metricsGetIngestMetricsOptions = (options?: Options<MetricsGetIngestMetricsData>) => {
+    return queryOptions({
+        queryFn: async ({ queryKey, signal }) => {
+            const { data } = await metricsGetIngestMetrics({
+                ...options,
+                ...queryKey[0],
+                signal,
+                throwOnError: true
+            });
+            return data;
+        },
+        queryKey: metricsGetIngestMetricsQueryKey(options)
+    });
+};
+
+export const metricsGetDbMetricsQueryKey = (options?: Options<MetricsGetDbMetricsData>) => createQueryKey('metricsGetDbMetrics', options);
+
+/**
+ * Get Db Metrics
+ */
+export const metricsGetDbMetricsOptions = (options?: Options<MetricsGetDbMetricsData>) => {
+    return queryOptions({
+        queryFn: async ({ queryKey, signal }) => {
+            const { data } = await metricsGetDbMetrics({
+                ...options,
+                ...queryKey[0],
+                signal,
+                throwOnError: true
+            });
+            return data;
+        },
+        queryKey: metricsGetDbMetricsQueryKey(options)
+    });
 };
\ No newline at end of file
@@ -151,6 +151,20 @@ export const meetingsRequestTotal = <ThrowOnError extends boolean = true>(option
     });
 };
 
+/**
+ * Request Transcript
+ */
+export const meetingsRequestTranscript = <ThrowOnError extends boolean = true>(options?: Options<MeetingsRequestTranscriptData, ThrowOnError>) => {
+    return (options?.client ?? _heyApiClient).post<MeetingsRequestTranscriptResponses, MeetingsRequestTranscriptErrors, ThrowOnError>({
+        url: '/api/requestTranscript',
+        ...options,
+        headers: {
+            'Content-Type': 'application/json',
+            ...options?.headers
+        }
+    });
+};
+
 /**
  * Change Title
  */
@@ -303,6 +317,8 @@ export const meetingsSendUserSummary = <ThrowOnError extends boolean = true>(opt
  * hash_id: hash_id,
  * title: title,
  * start_time: startTime,
+ * before_id: 上一页返回的 next_before_id，按游标翻页（可与 offset 同时使用）,
+ * with_total: 是否返回总数,
  * }
  * 输出
  * type MeetingItem = {
@@ -335,6 +351,20 @@ export const meetingsGetOngoingMeetings = <ThrowOnError extends boolean = true>(
     });
 };
 
+/**
+ * Search
+ * 在会议主题、transcript 句子和 issue map 节点中全文检索，按相关度排序。
+ * q 按空白拆分为多个关键词，结果须包含所有关键词，不足 3 个字的关键词在其他关键词的命中中过滤；
+ * 句子命中的 start_ms / end_ms 为相对会议开始的时间，ref 为句子在 total_asr.json 中的下标
+ * （进行中的会议为实时 transcript 中的下标）
+ */
+export const meetingsSearch = <ThrowOnError extends boolean = true>(options: Options<MeetingsSearchData, ThrowOnError>) => {
+    return (options.client ?? _heyApiClient).get<MeetingsSearchResponses, MeetingsSearchErrors, ThrowOnError>({
+        url: '/api/search',
+        ...options
+    });
+};
+
 /**
  * Request Record
  */
@@ -349,6 +379,34 @@ export const meetingsRequestRecord = <ThrowOnError extends boolean = true>(optio
     });
 };
 
+/**
+ * Generate Minutes
+ */
+export const meetingsGenerateMinutes = <ThrowOnError extends boolean = true>(options?: Options<MeetingsGenerateMinutesData, ThrowOnError>) => {
+    return (options?.client ?? _heyApiClient).post<MeetingsGenerateMinutesResponses, MeetingsGenerateMinutesErrors, ThrowOnError>({
+        url: '/api/generateMinutes',
+        ...options,
+        headers: {
+            'Content-Type': 'application/json',
+            ...options?.headers
+        }
+    });
+};
+
+/**
+ * Request Minutes
+ */
+export const meetingsRequestMinutes = <ThrowOnError extends boolean = true>(options?: Options<MeetingsRequestMinutesData, ThrowOnError>) => {
+    return (options?.client ?? _heyApiClient).post<MeetingsRequestMinutesResponses, MeetingsRequestMinutesErrors, ThrowOnError>({
+        url: '/api/requestMinutes',
+        ...options,
+        headers: {
+            'Content-Type': 'application/json',
+            ...options?.headers
+        }
+    });
+};
+
 /**
  * Download Audio
  */
@@ -367,4 +425,34 @@ export const meetingsGetAudio = <ThrowOnError extends boolean = true>(options: O
         url: '/audio/{meeting_id}',
         ...options
     });
+};
+
+/**
+ * Get Metrics
+ */
+export const metricsGetMetrics = <ThrowOnError extends boolean = true>(options?: Options<MetricsGetMetricsData, ThrowOnError>) => {
+    return (options?.client ?? _heyApiClient).get<MetricsGetMetricsResponses, MetricsGetMetricsErrors, ThrowOnError>({
+        url: '/api/metrics',
+        ...options
+    });
+};
+
+/**
+ * Get Ingest Metrics
+ */
+export const metricsGetIngestMetrics = <ThrowOnError extends boolean = true>(options?: Options<MetricsGetIngestMetricsData, ThrowOnError>) => {
+    return (options?.client ?? _heyApiClient).get<MetricsGetIngestMetricsResponses, MetricsGetIngestMetricsErrors, ThrowOnError>({
+        url: '/api/metrics/ingest',
+        ...options
+    });
+};
+
+/**
+ * Get Db Metrics
+ */
+export const metricsGetDbMetrics = <ThrowOnError extends boolean = true>(options?: Options<MetricsGetDbMetricsData, ThrowOnError>) => {
+    return (options?.client ?? _heyApiClient).get<MetricsGetDbMetricsResponses, MetricsGetDbMetricsErrors, ThrowOnError>({
+        url: '/api/metrics/db',
+        ...options
+    });
 };
\ No newline at end of file
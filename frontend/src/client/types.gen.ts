@@ -152,6 +152,20 @@ export type BodyMeetingsEndMeeting = {
     meeting_hash_id?: string | null;
 };
 
+/**
+ * Body_meetings-generate_minutes
+ */
+export type BodyMeetingsGenerateMinutes = {
+    /**
+     * Meeting Id
+     */
+    meeting_id?: string | null;
+    /**
+     * Meeting Hash Id
+     */
+    meeting_hash_id?: string | null;
+};
+
 /**
  * Body_meetings-join_meeting
  */
@@ -220,6 +234,20 @@ export type BodyMeetingsModifyNode = {
     meeting_hash_id?: string | null;
 };
 
+/**
+ * Body_meetings-request_minutes
+ */
+export type BodyMeetingsRequestMinutes = {
+    /**
+     * Meeting Id
+     */
+    meeting_id?: string | null;
+    /**
+     * Meeting Hash Id
+     */
+    meeting_hash_id?: string | null;
+};
+
 /**
  * Body_meetings-request_record
  */
@@ -238,6 +266,36 @@ export type BodyMeetingsRequestRecord = {
  * Body_meetings-request_total
  */
 export type BodyMeetingsRequestTotal = {
+    /**
+     * Sentence Cursor
+     */
+    sentence_cursor?: number | null;
+    /**
+     * Issue Map Version
+     */
+    issue_map_version?: number | null;
+    /**
+     * Meeting Id
+     */
+    meeting_id?: string | null;
+    /**
+     * Meeting Hash Id
+     */
+    meeting_hash_id?: string | null;
+};
+
+/**
+ * Body_meetings-request_transcript
+ */
+export type BodyMeetingsRequestTranscript = {
+    /**
+     * Start
+     */
+    start?: number;
+    /**
+     * Limit
+     */
+    limit?: number;
     /**
      * Meeting Id
      */
@@ -319,6 +377,71 @@ export type BodyUsersLoginForAccessToken = {
  */
 export type Code = 0 | 1 | 2 | 3 | 4 | 5 | 6 | 7 | 8 | 9 | 10 | 11;
 
+/**
+ * DBMetricsSnapshot
+ */
+export type DbMetricsSnapshot = {
+    /**
+     * Generated At
+     */
+    generated_at: string;
+    /**
+     * Pool Size
+     */
+    pool_size: number;
+    /**
+     * In Flight
+     */
+    in_flight: number;
+    /**
+     * Queries
+     */
+    queries: Array<DbQueryMetrics>;
+};
+
+/**
+ * DBQueryMetrics
+ * 按查询（manager 方法）聚合的数据库耗时
+ */
+export type DbQueryMetrics = {
+    /**
+     * Query
+     */
+    query: string;
+    /**
+     * Calls
+     */
+    calls: number;
+    /**
+     * Errors
+     */
+    errors: number;
+    /**
+     * Avg Wait Ms
+     */
+    avg_wait_ms: number | null;
+    /**
+     * Max Wait Ms
+     */
+    max_wait_ms: number;
+    /**
+     * Avg Exec Ms
+     */
+    avg_exec_ms: number | null;
+    /**
+     * P50 Exec Ms
+     */
+    p50_exec_ms: number | null;
+    /**
+     * P95 Exec Ms
+     */
+    p95_exec_ms: number | null;
+    /**
+     * Max Exec Ms
+     */
+    max_exec_ms: number;
+};
+
 /**
  * HTTPValidationError
  */
@@ -329,6 +452,83 @@ export type HttpValidationError = {
     detail?: Array<ValidationError>;
 };
 
+/**
+ * IngestMetricsSnapshot
+ */
+export type IngestMetricsSnapshot = {
+    /**
+     * Generated At
+     */
+    generated_at: string;
+    /**
+     * Queues
+     */
+    queues: Array<IngestQueueMetrics>;
+};
+
+/**
+ * IngestQueueMetrics
+ * 单个说话人音频队列的状态
+ */
+export type IngestQueueMetrics = {
+    /**
+     * Meeting Id
+     */
+    meeting_id: string;
+    /**
+     * Speaker Id
+     */
+    speaker_id: string;
+    /**
+     * Policy
+     */
+    policy: string;
+    /**
+     * Depth Chunks
+     */
+    depth_chunks: number;
+    /**
+     * Depth Bytes
+     */
+    depth_bytes: number;
+    /**
+     * Max Depth Chunks
+     */
+    max_depth_chunks: number;
+    /**
+     * Enqueued Chunks
+     */
+    enqueued_chunks: number;
+    /**
+     * Sent Messages
+     */
+    sent_messages: number;
+    /**
+     * Sent Bytes
+     */
+    sent_bytes: number;
+    /**
+     * Dropped Chunks
+     */
+    dropped_chunks: number;
+    /**
+     * Dropped Bytes
+     */
+    dropped_bytes: number;
+    /**
+     * Coalesced Chunks
+     */
+    coalesced_chunks: number;
+    /**
+     * Blocked Count
+     */
+    blocked_count: number;
+    /**
+     * Blocked Ms
+     */
+    blocked_ms: number;
+};
+
 /**
  * InvalidNodeResponse
  */
@@ -376,6 +576,89 @@ export type LoginResponse = {
     code: 0 | 9 | 8;
 };
 
+/**
+ * LLMCallRecord
+ * 一次 LLM 调用的遥测数据
+ */
+export type LlmCallRecord = {
+    /**
+     * Call Id
+     */
+    call_id?: string;
+    /**
+     * Stage
+     */
+    stage: string;
+    /**
+     * Meeting Id
+     */
+    meeting_id?: string | null;
+    /**
+     * Cnt
+     */
+    cnt?: number;
+    /**
+     * Endpoint
+     */
+    endpoint?: string | null;
+    /**
+     * Model
+     */
+    model?: string | null;
+    /**
+     * Route Reason
+     */
+    route_reason?: string | null;
+    /**
+     * Start Time
+     */
+    start_time?: string;
+    /**
+     * Queue Wait Ms
+     */
+    queue_wait_ms?: number;
+    /**
+     * Ttft Ms
+     */
+    ttft_ms?: number | null;
+    /**
+     * Latency Ms
+     */
+    latency_ms?: number;
+    /**
+     * Prompt Tokens
+     */
+    prompt_tokens?: number;
+    /**
+     * Completion Tokens
+     */
+    completion_tokens?: number;
+    /**
+     * Usage Estimated
+     */
+    usage_estimated?: boolean;
+    /**
+     * Retry Count
+     */
+    retry_count?: number;
+    /**
+     * Discarded
+     */
+    discarded?: boolean;
+    /**
+     * Invalid Output
+     */
+    invalid_output?: boolean;
+    /**
+     * Success
+     */
+    success?: boolean;
+    /**
+     * Error
+     */
+    error?: string | null;
+};
+
 /**
  * MeetingItem
  */
@@ -462,7 +745,29 @@ export type MeetingListResponse = {
     /**
      * Total
      */
-    total: number;
+    total: number | null;
+    /**
+     * Next Before Id
+     */
+    next_before_id?: number | null;
+};
+
+/**
+ * MeetingMinutes
+ */
+export type MeetingMinutes = {
+    /**
+     * Title
+     */
+    title: string;
+    /**
+     * Abstract
+     */
+    abstract: string;
+    /**
+     * Sections
+     */
+    sections: Array<MinutesSection>;
 };
 
 /**
@@ -523,6 +828,82 @@ export type MeetingStopResponse = {
     code: 0 | 1;
 };
 
+/**
+ * MetricsSnapshot
+ */
+export type MetricsSnapshot = {
+    /**
+     * Generated At
+     */
+    generated_at: string;
+    /**
+     * Stages
+     */
+    stages: Array<StageMetrics>;
+    /**
+     * Stage Models
+     */
+    stage_models: Array<StageMetrics>;
+    /**
+     * Recent Calls
+     */
+    recent_calls: Array<LlmCallRecord>;
+};
+
+/**
+ * MinutesResponse
+ */
+export type MinutesResponse = {
+    /**
+     * Code
+     */
+    code?: 0;
+    /**
+     * Analysis Status
+     */
+    analysis_status: 'Not Started' | 'In Progress' | 'Completed' | 'Failed';
+    /**
+     * Progress
+     * Fraction of finished LLM calls while the minutes job is in progress.
+     */
+    progress?: number | null;
+    minutes?: MeetingMinutes | null;
+};
+
+/**
+ * MinutesSection
+ */
+export type MinutesSection = {
+    /**
+     * Title
+     */
+    title: string;
+    /**
+     * Summary
+     */
+    summary: Array<string>;
+    /**
+     * First Sentence
+     * Index of the first sentence of this section in `total_asr.json`.
+     */
+    first_sentence: number;
+    /**
+     * Last Sentence
+     * Index of the last sentence of this section in `total_asr.json`.
+     */
+    last_sentence: number;
+};
+
+/**
+ * MinutesStartResponse
+ */
+export type MinutesStartResponse = {
+    /**
+     * Code
+     */
+    code: 0 | 1 | 7;
+};
+
 /**
  * NotMeetingHostResponse
  */
@@ -621,6 +1002,144 @@ export type Relation = {
     content: string;
 };
 
+/**
+ * SearchHit
+ */
+export type SearchHit = {
+    /**
+     * Meeting Id
+     */
+    meeting_id: string;
+    /**
+     * Hash Id
+     */
+    hash_id: string;
+    /**
+     * Topic
+     */
+    topic: string;
+    /**
+     * Create Time
+     */
+    create_time: string;
+    /**
+     * Kind
+     */
+    kind: 'topic' | 'sentence' | 'node';
+    /**
+     * Content
+     */
+    content: string;
+    /**
+     * Ref
+     * Sentence index in `total_asr.json` for sentences (in the live transcript while
+     * the meeting is running), `full_id` for nodes.
+     */
+    ref: string | null;
+    /**
+     * Speaker Id
+     */
+    speaker_id: string | null;
+    /**
+     * Speaker
+     */
+    speaker: string | null;
+    /**
+     * Start Ms
+     * Offset from the start of the meeting, for sentences.
+     */
+    start_ms: number | null;
+    /**
+     * End Ms
+     */
+    end_ms: number | null;
+    /**
+     * Score
+     * bm25 relevance, higher is better; None for keywords too short to match.
+     */
+    score: number | null;
+};
+
+/**
+ * SearchResponse
+ */
+export type SearchResponse = {
+    /**
+     * Code
+     */
+    code?: 0;
+    /**
+     * Hits
+     */
+    hits: Array<SearchHit>;
+};
+
+/**
+ * StageMetrics
+ */
+export type StageMetrics = {
+    /**
+     * Stage
+     */
+    stage: string;
+    /**
+     * Meeting Id
+     */
+    meeting_id?: string | null;
+    /**
+     * Model
+     */
+    model?: string | null;
+    /**
+     * Calls
+     */
+    calls: number;
+    /**
+     * Errors
+     */
+    errors: number;
+    /**
+     * Retries
+     */
+    retries: number;
+    /**
+     * Discarded
+     */
+    discarded: number;
+    /**
+     * Invalid Outputs
+     */
+    invalid_outputs: number;
+    /**
+     * Prompt Tokens
+     */
+    prompt_tokens: number;
+    /**
+     * Completion Tokens
+     */
+    completion_tokens: number;
+    /**
+     * Avg Latency Ms
+     */
+    avg_latency_ms: number | null;
+    /**
+     * P50 Latency Ms
+     */
+    p50_latency_ms: number | null;
+    /**
+     * P95 Latency Ms
+     */
+    p95_latency_ms: number | null;
+    /**
+     * Avg Ttft Ms
+     */
+    avg_ttft_ms: number | null;
+    /**
+     * Avg Queue Wait Ms
+     */
+    avg_queue_wait_ms: number | null;
+};
+
 /**
  * SuccessResponse
  */
@@ -631,6 +1150,46 @@ export type SuccessResponse = {
     code?: 0;
 };
 
+/**
+ * SummaryHierarchy
+ */
+export type SummaryHierarchy = {
+    /**
+     * Sections
+     */
+    sections: Array<SummarySection>;
+    /**
+     * Abstract
+     */
+    abstract: string;
+};
+
+/**
+ * SummarySection
+ */
+export type SummarySection = {
+    /**
+     * Id
+     */
+    id: number;
+    /**
+     * Title
+     */
+    title: string;
+    /**
+     * Summary
+     */
+    summary: Array<string>;
+    /**
+     * First Chunk
+     */
+    first_chunk: number;
+    /**
+     * Last Chunk
+     */
+    last_chunk: number;
+};
+
 /**
  * Token
  */
@@ -659,6 +1218,10 @@ export type TotalData = {
      * Sentences
      */
     sentences: Array<AsrSentence>;
+    /**
+     * Speaker Version
+     */
+    speaker_version?: number;
     /**
      * Meeting Id
      */
@@ -682,7 +1245,38 @@ export type TotalData = {
     /**
      * Issue Map
      */
-    issue_map: Array<Issue>;
+    issue_map: Array<Issue> | null;
+    /**
+     * Issue Map Version
+     */
+    issue_map_version?: number;
+    /**
+     * Sentence Offset
+     */
+    sentence_offset?: number;
+    /**
+     * Sentence Cursor
+     */
+    sentence_cursor?: number;
+    summary_hierarchy?: SummaryHierarchy | null;
+};
+
+/**
+ * TranscriptPage
+ */
+export type TranscriptPage = {
+    /**
+     * Sentences
+     */
+    sentences: Array<AsrSentence>;
+    /**
+     * Start
+     */
+    start: number;
+    /**
+     * Total
+     */
+    total: number;
 };
 
 /**
@@ -978,6 +1572,31 @@ export type MeetingsRequestTotalResponses = {
 
 export type MeetingsRequestTotalResponse = MeetingsRequestTotalResponses[keyof MeetingsRequestTotalResponses];
 
+export type MeetingsRequestTranscriptData = {
+    body?: BodyMeetingsRequestTranscript;
+    path?: never;
+    query?: never;
+    url: '/api/requestTranscript';
+};
+
+export type MeetingsRequestTranscriptErrors = {
+    /**
+     * Validation Error
+     */
+    422: HttpValidationError;
+};
+
+export type MeetingsRequestTranscriptError = MeetingsRequestTranscriptErrors[keyof MeetingsRequestTranscriptErrors];
+
+export type MeetingsRequestTranscriptResponses = {
+    /**
+     * Successful Response
+     */
+    200: TranscriptPage;
+};
+
+export type MeetingsRequestTranscriptResponse = MeetingsRequestTranscriptResponses[keyof MeetingsRequestTranscriptResponses];
+
 export type MeetingsChangeTitleData = {
     body: BodyMeetingsChangeTitle;
     path?: never;
@@ -1210,6 +1829,14 @@ export type MeetingsGetAllMeetingsData = {
          * Start Time
          */
         start_time?: string | null;
+        /**
+         * Before Id
+         */
+        before_id?: number | null;
+        /**
+         * With Total
+         */
+        with_total?: boolean;
     };
     url: '/api/getAllMeetings';
 };
@@ -1262,6 +1889,40 @@ export type MeetingsGetOngoingMeetingsResponses = {
 
 export type MeetingsGetOngoingMeetingsResponse = MeetingsGetOngoingMeetingsResponses[keyof MeetingsGetOngoingMeetingsResponses];
 
+export type MeetingsSearchData = {
+    body?: never;
+    path?: never;
+    query: {
+        /**
+         * Q
+         */
+        q: string;
+        /**
+         * Limit
+         */
+        limit?: number;
+    };
+    url: '/api/search';
+};
+
+export type MeetingsSearchErrors = {
+    /**
+     * Validation Error
+     */
+    422: HttpValidationError;
+};
+
+export type MeetingsSearchError = MeetingsSearchErrors[keyof MeetingsSearchErrors];
+
+export type MeetingsSearchResponses = {
+    /**
+     * Successful Response
+     */
+    200: SearchResponse;
+};
+
+export type MeetingsSearchResponse = MeetingsSearchResponses[keyof MeetingsSearchResponses];
+
 export type MeetingsRequestRecordData = {
     body?: BodyMeetingsRequestRecord;
     path?: never;
@@ -1287,6 +1948,57 @@ export type MeetingsRequestRecordResponses = {
 
 export type MeetingsRequestRecordResponse = MeetingsRequestRecordResponses[keyof MeetingsRequestRecordResponses];
 
+export type MeetingsGenerateMinutesData = {
+    body?: BodyMeetingsGenerateMinutes;
+    path?: never;
+    query?: never;
+    url: '/api/generateMinutes';
+};
+
+export type MeetingsGenerateMinutesErrors = {
+    /**
+     * Validation Error
+     */
+    422: HttpValidationError;
+};
+
+export type MeetingsGenerateMinutesError = MeetingsGenerateMinutesErrors[keyof MeetingsGenerateMinutesErrors];
+
+export type MeetingsGenerateMinutesResponses = {
+    /**
+     * Response Meetings-Generate Minutes
+     * Successful Response
+     */
+    200: MinutesStartResponse | NotMeetingHostResponse;
+};
+
+export type MeetingsGenerateMinutesResponse = MeetingsGenerateMinutesResponses[keyof MeetingsGenerateMinutesResponses];
+
+export type MeetingsRequestMinutesData = {
+    body?: BodyMeetingsRequestMinutes;
+    path?: never;
+    query?: never;
+    url: '/api/requestMinutes';
+};
+
+export type MeetingsRequestMinutesErrors = {
+    /**
+     * Validation Error
+     */
+    422: HttpValidationError;
+};
+
+export type MeetingsRequestMinutesError = MeetingsRequestMinutesErrors[keyof MeetingsRequestMinutesErrors];
+
+export type MeetingsRequestMinutesResponses = {
+    /**
+     * Successful Response
+     */
+    200: MinutesResponse;
+};
+
+export type MeetingsRequestMinutesResponse = MeetingsRequestMinutesResponses[keyof MeetingsRequestMinutesResponses];
+
 export type MeetingsDownloadAudioData = {
     body?: never;
     path: {
@@ -1349,6 +2061,82 @@ export type MeetingsGetAudioResponses = {
     200: unknown;
 };
 
+export type MetricsGetMetricsData = {
+    body?: never;
+    path?: never;
+    query?: {
+        /**
+         * Meeting Id
+         */
+        meeting_id?: string | null;
+    };
+    url: '/api/metrics';
+};
+
+export type MetricsGetMetricsErrors = {
+    /**
+     * Validation Error
+     */
+    422: HttpValidationError;
+};
+
+export type MetricsGetMetricsError = MetricsGetMetricsErrors[keyof MetricsGetMetricsErrors];
+
+export type MetricsGetMetricsResponses = {
+    /**
+     * Successful Response
+     */
+    200: MetricsSnapshot;
+};
+
+export type MetricsGetMetricsResponse = MetricsGetMetricsResponses[keyof MetricsGetMetricsResponses];
+
+export type MetricsGetIngestMetricsData = {
+    body?: never;
+    path?: never;
+    query?: {
+        /**
+         * Meeting Id
+         */
+        meeting_id?: string | null;
+    };
+    url: '/api/metrics/ingest';
+};
+
+export type MetricsGetIngestMetricsErrors = {
+    /**
+     * Validation Error
+     */
+    422: HttpValidationError;
+};
+
+export type MetricsGetIngestMetricsError = MetricsGetIngestMetricsErrors[keyof MetricsGetIngestMetricsErrors];
+
+export type MetricsGetIngestMetricsResponses = {
+    /**
+     * Successful Response
+     */
+    200: IngestMetricsSnapshot;
+};
+
+export type MetricsGetIngestMetricsResponse = MetricsGetIngestMetricsResponses[keyof MetricsGetIngestMetricsResponses];
+
+export type MetricsGetDbMetricsData = {
+    body?: never;
+    path?: never;
+    query?: never;
+    url: '/api/metrics/db';
+};
+
+export type MetricsGetDbMetricsResponses = {
+    /**
+     * Successful Response
+     */
+    200: DbMetricsSnapshot;
+};
+
+export type MetricsGetDbMetricsResponse = MetricsGetDbMetricsResponses[keyof MetricsGetDbMetricsResponses];
+
 export type ClientOptions = {
     baseUrl: `${string}://openapi.json` | (string & {});
 };
\ No newline at end of file
@@ -1,15 +1,16 @@
 import React, { useEffect, useRef, useState } from 'react';
 import { Card, Flex, Text, ScrollArea, Box } from '@mantine/core';
 import { IconUserFilled } from '@tabler/icons-react';
-import type { AsrSentence, SendAsrData } from '@/lib/models';
+import type { AsrSentence, PartialSentence, SendAsrData } from '@/lib/models';
 
 interface TransProps {
   trans: SendAsrData;
+  partials?: PartialSentence[];  // 尚未定稿的中间结果，显示在列表末尾
   setCurrentTime?: (time: number) => void;
   IsEditable?: boolean;
 }
 
-const CardList: React.FC<TransProps> = ({ trans, setCurrentTime, IsEditable = false }) => {
+const CardList: React.FC<TransProps> = ({ trans, partials = [], setCurrentTime, IsEditable = false }) => {
   const scrollContainerRef = useRef<HTMLDivElement>(null);
   const [selectedIndex, setSelectedIndex] = useState<number | null>(null);
   const [showTooltip, setShowTooltip] = useState<boolean>(false);
@@ -19,7 +20,7 @@ const CardList: React.FC<TransProps> = ({ trans, setCurrentTime, IsEditable = fa
     if (scrollContainerRef.current) {
       scrollContainerRef.current.scrollTo({ top: scrollContainerRef.current.scrollHeight, behavior: 'smooth' });
     }
-  }, [trans]);
+  }, [trans, partials]);
 
   useEffect(() => {
     let timer: number;
@@ -99,6 +100,17 @@ const CardList: React.FC<TransProps> = ({ trans, setCurrentTime, IsEditable = fa
             </Flex>
           </Card>
         ))}
+        {partials.map((partial) => (
+          <Card key={`partial-${partial.speaker_id}`} style={{ marginBottom: 10, padding: '1px' }}>
+            <Flex align="center" mb={4}>
+              <IconUserFilled size={16} style={{ marginRight: 4 }} color="#228be6" />
+              <Text size="sm">{trans.speaker[partial.speaker_id] || '参会者'}</Text>
+            </Flex>
+            <Text size="sm" color="gray" style={{ marginTop: 0, lineHeight: 1.6 }}>
+              {partial.content}
+            </Text>
+          </Card>
+        ))}
       </Flex>
 
       {/* 独立的 Tooltip */}
@@ -7,11 +7,13 @@ import Superscript from '@tiptap/extension-superscript';
 import SubScript from '@tiptap/extension-subscript';
 import '@mantine/tiptap/styles.css';
 import { useSocket } from '@/lib/socket';
-import { Loader, Button, Stack, Group } from '@mantine/core';
+import { Loader, Button, Stack, Group, List, ScrollArea, Text } from '@mantine/core';
 import { meetingsManualUpdate } from '@/client';
 import { useTranslation } from 'react-i18next';
+import type { SummaryHierarchy } from '@/lib/models';
+import { useValueChange } from '@/hooks/useValueChange';
 
-export function SummaryPoints(props: { meeting_hash_id: string; topic: string }) {
+export function SummaryPoints(props: { meeting_hash_id: string; topic: string; hierarchy?: SummaryHierarchy | null }) {
   const { t } = useTranslation();
   const editor = useEditor({
     extensions: [
@@ -61,6 +63,16 @@ export function SummaryPoints(props: { meeting_hash_id: string; topic: string })
     }
   }, [editor]));
 
+  // 分层摘要：section summary 和会议摘要，加入或重连时由 requestTotal 返回初始值
+  const [hierarchy, setHierarchy] = useState<SummaryHierarchy | null>(props.hierarchy ?? null);
+  useValueChange((newHierarchy) => {
+    setHierarchy(newHierarchy ?? null);
+  }, props.hierarchy);
+  useSocket("sendSummaryHierarchy", useCallback((data) => {
+    console.log('onSendSummaryHierarchy', data);
+    setHierarchy(data);
+  }, []));
+
   useSocket("statusAI", useCallback((data) => {
     console.log("onStatusAI", data);
     setRunning(data.running);
@@ -79,6 +91,27 @@ export function SummaryPoints(props: { meeting_hash_id: string; topic: string })
         {running && <Loader color="blue" size="sm" />}
       </Group>
 
+      {hierarchy && (hierarchy.abstract || hierarchy.sections.length > 0) && (
+        <ScrollArea.Autosize mah='40%' type='auto'>
+          <Stack gap='xs'>
+            {hierarchy.abstract && (
+              <div>
+                <Text fw={600} size='sm'>{t('summaryAbstract')}</Text>
+                <Text size='sm'>{hierarchy.abstract}</Text>
+              </div>
+            )}
+            {hierarchy.sections.map((section) => (
+              <div key={section.id}>
+                <Text fw={600} size='sm'>{section.title}</Text>
+                <List size='sm'>
+                  {section.summary.map((point, i) => <List.Item key={i}>{point}</List.Item>)}
+                </List>
+              </div>
+            ))}
+          </Stack>
+        </ScrollArea.Autosize>
+      )}
+
       <RichTextEditor editor={editor} style={{ 
         height: '100%',  // 使编辑器占满父容器的高度
         overflowY: 'auto',  // 超过高度时滚动
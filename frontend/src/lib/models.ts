@@ -75,6 +75,7 @@ export interface SendAsrData {
     [k: string]: string;
   };
   sentences: AsrSentence[];
+  speaker_version?: number;
 }
 export interface AsrSentence {
   content: string;
@@ -82,6 +83,29 @@ export interface AsrSentence {
   speaker_id: string;
   [k: string]: unknown;
 }
+export interface SendPartialData {
+  speaker: {
+    [k: string]: string;
+  };
+  partials: PartialSentence[];
+  speaker_version?: number;
+}
+export interface PartialSentence {
+  speaker_id: string;
+  content: string;
+  start_time: number;
+}
+export interface SummaryHierarchy {
+  sections: SummarySection[];
+  abstract: string;
+}
+export interface SummarySection {
+  id: number;
+  title: string;
+  summary: string[];
+  first_chunk: number;
+  last_chunk: number;
+}
 export interface ToggleMicrophone {
   meeting_id: string;
   enable: boolean;
@@ -90,4 +114,5 @@ export interface ToggleMicrophone {
 export interface UpdateIssueData {
   issue_map: Issue[];
   chosen_id: string;
+  issue_map_version: number;
 }
@@ -1,6 +1,6 @@
 import { io, Socket } from 'socket.io-client';
 import { API_BASE_URL } from '@/lib/constants';
-import type { AllSummaries, AudioChunkMeta, Identification, ProcessStatus, RequestData, SendAsrData, ToggleMicrophone, UpdateIssueData } from '@/lib/models';
+import type { AllSummaries, AudioChunkMeta, Identification, ProcessStatus, RequestData, SendAsrData, SendPartialData, SummaryHierarchy, ToggleMicrophone, UpdateIssueData } from '@/lib/models';
 import { useEffect } from 'react';
 import type { ReservedOrUserEventNames, ReservedOrUserListener } from '@socket.io/component-emitter';
 
@@ -13,9 +13,11 @@ interface ListenEvents {
   meetingEnd: () => void;
   requestData: (d: RequestData) => void;
   sendCurrent: (d: SendAsrData) => void;
+  sendPartial: (d: SendPartialData) => void;
   updateIssue: (d: UpdateIssueData) => void;
   statusAI: (d: ProcessStatus) => void;
   sendSummaryNew: (d: AllSummaries) => void;
+  sendSummaryHierarchy: (d: SummaryHierarchy) => void;
 }
 
 
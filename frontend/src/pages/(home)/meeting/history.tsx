@@ -48,7 +48,9 @@ export default function History() {
   });
 
   const [loading, setLoading] = useState(false);
-  const [total, setTotal] = useState(meetingList.total);
+  const [total, setTotal] = useState(meetingList.total ?? 0);
+  // 下一页的游标，顺序翻到下一页时按游标查询，不随页数变慢
+  const [nextBeforeId, setNextBeforeId] = useState(meetingList.next_before_id ?? null);
 
   const totalPages = Math.ceil(total / PAGE_SIZE);
 
@@ -58,11 +60,12 @@ export default function History() {
   const [dataSource, setDataSource] = useState<MeetingItem[]>(meetingList.meetings);
   useValueChange((newMeetingList) => {
     setDataSource(newMeetingList.meetings);
+    setNextBeforeId(newMeetingList.next_before_id ?? null);
   }, meetingList);
 
   const inputRef = useRef<HTMLInputElement>(null);
 
-  const onSearch = (value: string, page: number) => {
+  const onSearch = (value: string, page: number, beforeId: number | null = null) => {
     console.log("Searching for meetings with title:", value, "on page:", page);
     setLoading(true);
     queryClient.fetchQuery(meetingsGetAllMeetingsOptions({
@@ -70,12 +73,18 @@ export default function History() {
         // hash_id: params?.hash_id,
         title: value,
         limit: PAGE_SIZE,
-        offset: (page - 1) * PAGE_SIZE,
+        // 有游标时不需要 offset，总数沿用之前的结果
+        ...(beforeId !== null
+          ? { before_id: beforeId, with_total: false }
+          : { offset: (page - 1) * PAGE_SIZE }),
       }
     }))
     .then((res) => {
         setDataSource(res.meetings);
-        setTotal(res.total);
+        if (res.total !== null) {
+          setTotal(res.total);
+        }
+        setNextBeforeId(res.next_before_id ?? null);
     })
     .catch((err) => {
       console.log("Unknown error fetching discussions:", String(err.detail));
@@ -93,7 +102,7 @@ export default function History() {
     if (inputRef.current) {
       inputRef.current.value = searchValue;  // 恢复搜索框的值，如果被临时更改
     }
-    onSearch?.(searchValue, newPage);
+    onSearch?.(searchValue, newPage, newPage === page + 1 ? nextBeforeId : null);
   };
 
   const handleKeyDown = (e: KeyboardEvent<HTMLInputElement>) => {
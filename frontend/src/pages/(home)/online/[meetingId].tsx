@@ -11,12 +11,12 @@ import { message } from "@/lib/notifications";
 import { useMediaQuery } from '@mantine/hooks';
 import { SummaryPoints } from "@/components/SummaryPoints";
 import { useSocket } from "@/lib/socket";
-import { meetingsUpdateHotWords } from "@/client";
+import { meetingsRequestTotal, meetingsUpdateHotWords } from "@/client";
 import { useMeetingStore } from "@/store/meetingStore";
 import { useShallow } from "zustand/react/shallow";
 import { useSuspenseQuery } from "@tanstack/react-query";
 import { meetingsRequestTotalOptions } from "@/client/@tanstack/react-query.gen";
-import type { SendAsrData } from "@/lib/models";
+import type { PartialSentence, SendAsrData, SendPartialData, UpdateIssueData } from "@/lib/models";
 import { SideResizable } from "@/components/SideResizable/SideResizable";
 import { useValueChange } from "@/hooks/useValueChange";
 import { useTranslation } from "react-i18next";
@@ -39,9 +39,19 @@ export default function OnlineMeeting() {
     const [leftSidebarCollapsed, setLeftSidebarCollapsed] = useState(false);//左侧边栏缩放
     // 渲染从Loader获取的初始转写数据
     const [onlineTransData, setOnlineTransData] = useState<SendAsrData>(initialAsrData);  //实时转写数据
+    const [partials, setPartials] = useState<PartialSentence[]>([]);  //尚未定稿的中间结果
+    const [issueMap, setIssueMap] = useState(initialAsrData.issue_map ?? []);  //重连后更新的 issue map
+    const [hierarchy, setHierarchy] = useState(initialAsrData.summary_hierarchy);  //重连后更新的分层摘要
+    // 重连时传给 requestTotal 的游标：已收到的 transcript 句数和 issue map 版本，只请求断线期间缺少的部分
+    const sentenceCursor = useRef(initialAsrData.sentence_cursor ?? 0);
+    const issueMapVersion = useRef(initialAsrData.issue_map_version ?? 0);
     // 监听 initialAsrData 变化，同步 onlineTransData
     useValueChange((newInitialAsrData) => {
         setOnlineTransData(newInitialAsrData);
+        setIssueMap(newInitialAsrData.issue_map ?? []);
+        setHierarchy(newInitialAsrData.summary_hierarchy);
+        sentenceCursor.current = newInitialAsrData.sentence_cursor ?? 0;
+        issueMapVersion.current = newInitialAsrData.issue_map_version ?? 0;
     }, initialAsrData);
 
     const theme = useMantineTheme();
@@ -149,6 +159,8 @@ export default function OnlineMeeting() {
     // 正确排序：必须先展示全部转写数据，再展示后来收到的每一小份update
     const handleAsrResult = useCallback((data: SendAsrData) => {
         console.log(data);
+        // 广播的句子依次进入服务端的 transcript
+        sentenceCursor.current += data.sentences.length;
         // 显示在列表的最后端
         setOnlineTransData((prevData) => ({
             ...prevData,
@@ -165,6 +177,62 @@ export default function OnlineMeeting() {
 
     useSocket('sendCurrent', handleAsrResult);
 
+    // 中间结果整体替换，定稿后的句子通过 sendCurrent 到达
+    const handlePartial = useCallback((data: SendPartialData) => {
+        setPartials(data.partials);
+    }, []);
+
+    useSocket('sendPartial', handlePartial);
+
+    useSocket('updateIssue', useCallback((data: UpdateIssueData) => {
+        issueMapVersion.current = data.issue_map_version;
+    }, []));
+
+    // 断线重连后补齐断线期间错过的句子和 issue map
+    const disconnected = useRef(false);
+    useSocket('disconnect', useCallback(() => {
+        disconnected.current = true;
+    }, []));
+
+    useSocket('connect', useCallback(() => {
+        if (!disconnected.current) {
+            return;
+        }
+        disconnected.current = false;
+        meetingsRequestTotal({
+            body: {
+                meeting_id: params.meetingId,
+                sentence_cursor: sentenceCursor.current,
+                issue_map_version: issueMapVersion.current,
+            }
+        })
+        .then((res) => {
+            const data = res.data;
+            const offset = data.sentence_offset ?? 0;
+            sentenceCursor.current = data.sentence_cursor ?? offset + data.sentences.length;
+            setOnlineTransData((prevData) => ({
+                ...prevData,
+                // 返回的句子从 sentence_offset 开始，替换本地在此之后的部分
+                sentences: [...prevData.sentences.slice(0, offset), ...data.sentences],
+                speaker: {
+                    ...prevData.speaker,
+                    ...data.speaker,
+                },
+            }));
+            // issue map 没有变化时为 null
+            if (data.issue_map) {
+                setIssueMap(data.issue_map);
+            }
+            issueMapVersion.current = data.issue_map_version ?? issueMapVersion.current;
+            if (data.summary_hierarchy) {
+                setHierarchy(data.summary_hierarchy);
+            }
+        })
+        .catch((error) => {
+            console.error("Failed to resync after reconnect:", error);
+        });
+    }, [params.meetingId]));
+
     // ---------- socket related end ----------
 
     return (
@@ -252,7 +320,7 @@ export default function OnlineMeeting() {
                                 {t('updateHotwords')}
                             </Button>
                         </Group>
-                        <CardList trans={onlineTransData} />
+                        <CardList trans={onlineTransData} partials={partials} />
                         <Recorder />
                     </Flex>
                 }
@@ -297,9 +365,9 @@ export default function OnlineMeeting() {
             <Flex direction='column' style={{ width: "100%" }}>
                 {
                     meetingTypeGraph ?
-                    <Flow initialNodeData={initialAsrData.issue_map} isEditable={true} />
+                    <Flow initialNodeData={issueMap} isEditable={true} />
                     :
-                    <SummaryPoints meeting_hash_id={meetingHashId} topic={title} />
+                    <SummaryPoints meeting_hash_id={meetingHashId} topic={title} hierarchy={hierarchy} />
                 }
             </Flex>
         </Flex >
@@ -167,9 +167,9 @@ export default function MeetingRecord() {
             <Flex direction='column' style={{ width: "100%" }}>
                 {
                     meetingTypeGraph ?
-                    <Flow initialNodeData={initialAsrData.issue_map} isEditable={false} />
+                    <Flow initialNodeData={initialAsrData.issue_map ?? []} isEditable={false} />
                     :
-                    <SummaryPoints meeting_hash_id={meetingHashId} topic={title} />
+                    <SummaryPoints meeting_hash_id={meetingHashId} topic={title} hierarchy={initialAsrData.summary_hierarchy} />
                 }
             </Flex>
         </Flex >